@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Сверка ID перевода с ID текущих файлов игры
+
+Находит:
+1. Лишние записи (orphans) — ID из translation_ru.tsv, которых нет в игре:
+   перевод для них больше не используется
+2. Отсутствующие записи (missing) — ID игры, для которых нет записи в TSV
+
+ID игры собираются из таблиц записей текстовых блоков (как в wwm_build.py:
+8 байт ID в каждой 16-байтной записи) — в контейнерах .bin или в уже
+распакованных .dat (блоки *_0.dat, как и при извлечении, пропускаются).
+Набор хранится отсортированным массивом uint64 в файле кэша и пересобирается,
+только если изменились файлы игры (размер или время изменения). Без файлов
+игры используется набор из кэша как есть — так проверка работает в pull
+request, где файлов игры нет.
+
+Оба набора — отсортированные массивы без повторов; разности считаются одним
+проходом слиянием.
+
+Отчёт информационный: код выхода 0, если файлы прочитаны.
+
+ИСПОЛЬЗОВАНИЕ:
+  python check_game_ids.py translation_ru.tsv --game game_files/*.bin --cache game_ids.bin
+  python check_game_ids.py translation_ru.tsv --cache game_ids.bin --orphans orphans.txt --missing missing.txt
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from tsv_entries import read_tsv
+
+
+CONTAINER_MAGIC = b'\xEF\xBE\xAD\xDE'
+ID_CACHE_MAGIC = b'WWMIDS\x00\x01'
+ID_CACHE_VERSION = 1
+# Заголовок текстового блока до управляющих байт и хвост после них (см. wwm_build.parse_text_block)
+TEXT_BLOCK_HEADER = 24
+TEXT_BLOCK_TRAILER = 17
+ID_RECORD = struct.Struct('>Q8x')
+REPORT_LIMIT = 20
+
+
+def block_ids(data: bytes) -> List[int]:
+    """ID записей текстового блока (uint64 в порядке байт файла, как hex в TSV). Не текстовый блок — []."""
+    if len(data) < TEXT_BLOCK_HEADER:
+        return []
+    count_full = struct.unpack_from('<I', data, 0)[0]
+    table_start = TEXT_BLOCK_HEADER + count_full + TEXT_BLOCK_TRAILER
+    table_end = table_start + count_full * ID_RECORD.size
+    if count_full == 0 or table_end > len(data):
+        return []
+    return [record[0] for record in ID_RECORD.iter_unpack(memoryview(data)[table_start:table_end])]
+
+
+def file_ids(path: Path) -> List[int]:
+    """ID всех текстовых блоков контейнера (.bin) или распакованного блока (.dat)."""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic != CONTAINER_MAGIC:
+        if path.name.endswith('_0.dat'):
+            return []
+        return block_ids(path.read_bytes())
+
+    # pyzstd нужен только для контейнеров: проверка по кэшу ID работает без него
+    from wwm_build import decompress_block, iter_container_blocks
+
+    ids = []
+    for index, comp_block in iter_container_blocks(str(path)):
+        if index == 0:
+            continue
+        data = decompress_block(comp_block, index)
+        if data is not None:
+            ids.extend(block_ids(data))
+    return ids
+
+
+def game_files(paths: List[str]) -> List[Path]:
+    """Файлы игры: файлы как есть, из папок — все .bin и .dat рекурсивно. Отсортированы."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(p for p in path.rglob('*') if p.suffix in ('.bin', '.dat') and p.is_file())
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def fingerprint(files: List[Path]) -> List[list]:
+    return [[str(path), stat.st_size, stat.st_mtime_ns] for path, stat in ((p, p.stat()) for p in files)]
+
+
+def sorted_unique(values) -> array:
+    return array('Q', sorted(set(values)))
+
+
+def load_id_cache(path: Path) -> Optional[Tuple[dict, array]]:
+    """(заголовок, отсортированный массив ID) из файла кэша, либо None."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(ID_CACHE_MAGIC)) != ID_CACHE_MAGIC:
+                return None
+            header_len = struct.unpack('<I', f.read(4))[0]
+            header = json.loads(f.read(header_len).decode('utf-8'))
+            ids = array('Q')
+            ids.frombytes(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+    if header.get('version') != ID_CACHE_VERSION or len(ids) != header.get('count'):
+        return None
+    if header.get('byteorder') != sys.byteorder:
+        ids.byteswap()
+    return header, ids
+
+
+def save_id_cache(path: Path, sources: List[list], ids: array):
+    header = json.dumps({
+        'version': ID_CACHE_VERSION,
+        'byteorder': sys.byteorder,
+        'count': len(ids),
+        'sources': sources,
+    }, ensure_ascii=False).encode('utf-8')
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(ID_CACHE_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        ids.tofile(f)
+    os.replace(tmp_path, path)
+
+
+def load_game_ids(paths: List[str], cache_path: Optional[Path]) -> Optional[array]:
+    """
+    Отсортированный массив ID игры: из кэша, если файлы игры не изменились
+    (или не заданы), иначе — чтением файлов с пересохранением кэша.
+    """
+    cached = load_id_cache(cache_path) if cache_path is not None else None
+
+    if not paths:
+        if cached is None:
+            print("❌ Не заданы файлы игры (--game) и нет кэша ID (--cache)")
+            return None
+        header, ids = cached
+        print(f"📦 ID игры из кэша {cache_path}: {len(ids)} (файлов игры: {len(header.get('sources', []))})")
+        return ids
+
+    files = game_files(paths)
+    sources = fingerprint(files)
+    if cached is not None and cached[0].get('sources') == sources:
+        print(f"📦 ID игры из кэша {cache_path}: {len(cached[1])} (файлы игры не изменились)")
+        return cached[1]
+
+    values = []
+    for path in files:
+        ids = file_ids(path)
+        print(f"📂 {path.name}: {len(ids)} ID")
+        values.extend(ids)
+    ids = sorted_unique(values)
+    print(f"📦 ID игры: {len(ids)} уникальных из {len(files)} файлов")
+
+    if cache_path is not None:
+        try:
+            save_id_cache(cache_path, sources, ids)
+        except OSError as e:
+            print(f"⚠️  Не удалось сохранить кэш ID {cache_path}: {e}")
+    return ids
+
+
+def split_sorted(a: array, b: array) -> Tuple[array, array]:
+    """Для отсортированных массивов без повторов: (есть только в a, есть только в b) за один проход."""
+    only_a = array('Q')
+    only_b = array('Q')
+    i = j = 0
+    len_a, len_b = len(a), len(b)
+    while i < len_a and j < len_b:
+        x = a[i]
+        y = b[j]
+        if x == y:
+            i += 1
+            j += 1
+        elif x < y:
+            only_a.append(x)
+            i += 1
+        else:
+            only_b.append(y)
+            j += 1
+    only_a.extend(a[i:])
+    only_b.extend(b[j:])
+    return only_a, only_b
+
+
+def format_id(value: int) -> str:
+    return f"{value:016x}"
+
+
+def write_ids(path: Path, ids: array):
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.writelines(f"{value:016x}\n" for value in ids)
+
+
+def main():
+    # Настройка кодировки для Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Сверка ID перевода с ID файлов игры')
+    parser.add_argument('file', nargs='?', default='translation_ru.tsv', help='Файл перевода (RU)')
+    parser.add_argument('--game', nargs='*', default=[],
+                        help='Контейнеры игры (.bin), распакованные блоки (.dat) или папки с ними')
+    parser.add_argument('--cache', default=None, help='Файл кэша ID игры')
+    parser.add_argument('--orphans', default=None, help='Сохранить лишние ID (нет в игре) в файл')
+    parser.add_argument('--missing', default=None, help='Сохранить отсутствующие ID (нет в TSV) в файл')
+    args = parser.parse_args()
+
+    game_ids = load_game_ids(args.game, Path(args.cache) if args.cache else None)
+    if game_ids is None:
+        return 1
+
+    try:
+        parsed = read_tsv(args.file)
+    except Exception as e:
+        print(f"❌ Ошибка при чтении файла {args.file}: {e}")
+        return 1
+    tsv_ids = sorted_unique(int(entry.id, 16) for entry in parsed.entries)
+
+    orphans, missing = split_sorted(tsv_ids, game_ids)
+
+    print(f"\n🔍 Сверка {args.file} ({len(tsv_ids)} ID) с игрой ({len(game_ids)} ID):")
+    print(f"   Лишние записи (ID нет в игре): {len(orphans)}")
+    print(f"   Нет перевода (ID игры нет в TSV): {len(missing)}")
+
+    if orphans:
+        print(f"\n⚠️  Лишние ID (первые {min(len(orphans), REPORT_LIMIT)}):")
+        for value in orphans[:REPORT_LIMIT]:
+            entry = parsed.first_entry(format_id(value)) or parsed.first_entry(format_id(value).upper())
+            line = f"строка {entry.start_line}" if entry is not None else ""
+            print(f"   {format_id(value)} {line}")
+
+    if args.orphans:
+        write_ids(Path(args.orphans), orphans)
+        print(f"💾 Лишние ID: {args.orphans}")
+    if args.missing:
+        write_ids(Path(args.missing), missing)
+        print(f"💾 Отсутствующие ID: {args.missing}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Изменённая часть TSV перевода относительно git-ревизии (validate_all.py --changed-since).
+
+Из `git diff -U0` берутся номера изменённых строк файла, затем каждая строка
+расширяется до записи, в которую она входит: от строки с ID до строки перед
+следующим ID (продолжения многострочного текста и пустые строки внутри записи).
+Удалённые строки отмечаются соседними строками нового файла.
+"""
+
+import re
+import subprocess
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+from tsv_entries import ParsedTSV
+
+
+HUNK_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+
+def _git(cwd: Path, *args: str) -> str:
+    result = subprocess.run(
+        ['git', *args], cwd=cwd, capture_output=True, text=True, encoding='utf-8'
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {' '.join(args)}: код {result.returncode}")
+    return result.stdout
+
+
+def changed_lines(path: Path, ref: str) -> Set[int]:
+    """
+    Номера строк файла (с 1, как в отчётах валидаторов), изменённых относительно
+    общей с ref ревизии (как в pull request). Сравнивается рабочая копия.
+    Ошибки git (нет репозитория, неизвестная ревизия) — RuntimeError.
+    """
+    path = Path(path).resolve()
+    cwd = path.parent
+    try:
+        base = _git(cwd, 'merge-base', ref, 'HEAD').strip()
+    except RuntimeError:
+        base = ref
+    diff = _git(cwd, 'diff', '--no-color', '--no-ext-diff', '-U0', base, '--', path.name)
+
+    lines: Set[int] = set()
+    for line in diff.splitlines():
+        match = HUNK_PATTERN.match(line)
+        if not match:
+            continue
+        start = int(match.group(1))
+        count = int(match.group(2)) if match.group(2) is not None else 1
+        if count:
+            lines.update(range(start, start + count))
+        else:
+            # Только удаление: start — строка перед удалённым фрагментом
+            lines.update(n for n in (start, start + 1) if n >= 1)
+    return lines
+
+
+def change_scope(parsed: ParsedTSV, lines: Set[int]) -> Tuple[Set[int], Set[str]]:
+    """
+    Расширяет изменённые строки до записей целиком.
+    Возвращает (номера строк затронутых записей, их ID). Строки до первой
+    записи (заголовок, строки без ID) остаются сами по себе.
+    """
+    starts = [entry.start_line for entry in parsed.entries]
+    total = len(parsed.lines)
+    scope_lines: Set[int] = set()
+    ids: Set[str] = set()
+    for line_num in lines:
+        if line_num > total:
+            continue
+        k = bisect_right(starts, line_num) - 1
+        if k < 0:
+            scope_lines.add(line_num)
+            continue
+        entry = parsed.entries[k]
+        if entry.id in ids and entry.start_line in scope_lines:
+            continue
+        end = starts[k + 1] - 1 if k + 1 < len(starts) else total
+        scope_lines.update(range(entry.start_line, end + 1))
+        ids.add(entry.id)
+    return scope_lines, ids
+
+
+def changed_scope(parsed: ParsedTSV, ref: str) -> Optional[Tuple[Set[int], Set[str]]]:
+    """change_scope по git diff; None, если git недоступен (тогда нужна полная проверка)."""
+    try:
+        lines = changed_lines(Path(parsed.path), ref)
+    except (RuntimeError, OSError) as e:
+        print(f"⚠️  Не удалось получить изменения относительно {ref}: {e}")
+        return None
+    return change_scope(parsed, lines)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Общий разбор TSV перевода для валидаторов.
+
+Файл читается один раз, строки после заголовка собираются в записи:
+строка с ID (16 hex + табуляция) начинает запись, следующие строки без ID —
+её продолжение (многострочный текст). Пустые строки внутри записи не входят
+в её текст, но запоминаются: validate_tsv.py считает их разрывом записи.
+
+Строки без ID до первой записи собираются отдельно (orphans).
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+ENTRY_START_PATTERN = re.compile(r'^[0-9a-fA-F]{16}\t')
+
+
+class Entry:
+    """Запись TSV: ID, номер первой строки, исходные строки (с переводами строк) и пустые строки внутри."""
+
+    __slots__ = ('id', 'start_line', 'lines', 'blank_lines')
+
+    def __init__(self, id_value: str, start_line: int, first_line: str):
+        self.id = id_value
+        self.start_line = start_line
+        self.lines: List[Tuple[int, str]] = [(start_line, first_line)]
+        self.blank_lines: List[int] = []
+
+    @property
+    def full_text(self) -> str:
+        return ''.join(line for _, line in self.lines)
+
+
+class ParsedTSV:
+    """Строки файла и записи, разобранные за один проход."""
+
+    def __init__(self, path: str, lines: List[str]):
+        self.path = path
+        self.lines = lines
+        self.orphans: List[Tuple[int, str]] = []
+        self.entries: List[Entry] = []
+        self._first_by_id: Optional[Dict[str, Entry]] = None
+
+        current = None
+        for line_num, original_line in enumerate(lines[1:], start=2):
+            line = original_line.rstrip('\n\r')
+
+            if not line.strip():
+                if current is not None:
+                    current.blank_lines.append(line_num)
+                continue
+
+            if ENTRY_START_PATTERN.match(line):
+                current = Entry(line.split('\t', 1)[0], line_num, original_line)
+                self.entries.append(current)
+            elif current is not None:
+                current.lines.append((line_num, original_line))
+            else:
+                self.orphans.append((line_num, line))
+
+    def first_entry(self, entry_id: str) -> Optional[Entry]:
+        """Первая запись с данным ID; индекс строится при первом обращении."""
+        if self._first_by_id is None:
+            self._first_by_id = {}
+            for entry in self.entries:
+                self._first_by_id.setdefault(entry.id, entry)
+        return self._first_by_id.get(entry_id)
+
+
+def read_tsv(path: str) -> ParsedTSV:
+    """Читает и разбирает файл. Ошибки чтения (OSError, UnicodeDecodeError) пробрасываются."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    return ParsedTSV(str(path), lines)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Единая проверка файла перевода: validate_translation.py, validate_tsv.py,
+validate_tags.py и validate_parity.py (сверка тегов с EN) за один запуск.
+
+Файл читается и разбирается на записи один раз (tsv_entries.py), после чего
+по этим данным прогоняются все наборы правил. Сообщения, коды ошибок и
+порядок вывода — те же, что у отдельных скриптов.
+
+С --changed-since <ref> проверяются только записи, изменённые относительно
+ref (git diff, многострочные записи — целиком), плюс проверки всего файла:
+заголовок и дубликаты ID. Для затронутых записей результат тот же, что при
+полной проверке; итоговые счётчики относятся только к ним.
+
+Результаты проверки записей сохраняются между запусками в .validation_cache.json
+рядом с файлом (validation_cache.py): неизменённые записи не проверяются
+повторно, а при изменении правил валидатора его кэш сбрасывается сам.
+Отчёт с кэшем и без него одинаков.
+
+С --jobs N записи, которых нет в кэше, проверяются в N процессах
+(validate_parallel.py); отчёт тот же, что при последовательной проверке.
+
+ВОЗВРАЩАЕТ:
+  - 0 если ни один набор правил не нашёл блокирующих ошибок
+  - 1 если хотя бы один нашёл
+
+ИСПОЛЬЗОВАНИЕ:
+  python validate_all.py translation_ru.tsv
+  python validate_all.py translation_ru.tsv --en translation_en.tsv --only tsv,tags
+  python validate_all.py translation_ru.tsv --changed-since origin/main
+  python validate_all.py translation_ru.tsv --jobs 0
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import validate_parity
+import validate_tags
+import validate_translation
+import validate_tsv
+from tsv_changes import changed_scope
+from tsv_entries import read_tsv
+from validate_parallel import prefill, tags_items, translation_items, tsv_items
+from validation_cache import DEFAULT_CACHE_NAME, ValidationCache, rules_version
+
+
+CHECKS = ['translation', 'tsv', 'tags', 'parity']
+
+
+def cache_section(cache, name, module):
+    if cache is None:
+        return None
+    return cache.section(name, rules_version(module.__file__))
+
+
+def run_translation(ru_file, parsed, scope_lines=None, cache=None, jobs=1):
+    section = cache_section(cache, 'translation', validate_translation)
+    if jobs > 1:
+        prefill(section, translation_items(parsed, scope_lines), validate_translation.check_line_chunk, jobs)
+    errors, warnings = validate_translation.check_lines(parsed.lines, scope_lines, section)
+    return validate_translation.print_report(str(ru_file), parsed.lines, errors, warnings)
+
+
+def run_tsv(ru_file, parsed, scope_lines=None, cache=None, jobs=1):
+    section = cache_section(cache, 'tsv', validate_tsv)
+    if jobs > 1:
+        prefill(section, tsv_items(parsed, scope_lines), validate_tsv.entry_messages_chunk, jobs)
+    _, errors = validate_tsv.validate_parsed(parsed, scope_lines, section)
+    return validate_tsv.print_report(str(ru_file), errors)
+
+
+def run_tags(ru_file, parsed, en_file, en_parsed=None, ids=None, cache=None, jobs=1):
+    section = cache_section(cache, 'tags', validate_tags)
+    if jobs > 1:
+        prefill(section, tags_items([parsed, en_parsed], ids), validate_tags.tag_codes_chunk, jobs)
+    return validate_tags.run_checks(ru_file, en_file, parsed, en_parsed, ids, section)
+
+
+def run_parity(ru_file, parsed, en_file, en_parsed=None, ids=None):
+    return validate_parity.run_checks(ru_file, en_file, parsed, en_parsed, ids)
+
+
+def main():
+    # Настройка кодировки для Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Проверка translation_ru.tsv всеми валидаторами за один разбор')
+    parser.add_argument('file', nargs='?', default='translation_ru.tsv', help='Файл перевода (RU)')
+    parser.add_argument('--en', default=None,
+                        help='Английский файл для проверки и сверки тегов (по умолчанию translation_en.tsv рядом с RU)')
+    parser.add_argument('--only', default=','.join(CHECKS),
+                        help=f"Наборы правил через запятую: {', '.join(CHECKS)}")
+    parser.add_argument('--changed-since', metavar='REF', default=None,
+                        help='Проверять только записи, изменённые относительно git-ревизии REF')
+    parser.add_argument('--cache', default=None,
+                        help=f'Файл кэша результатов (по умолчанию {DEFAULT_CACHE_NAME} рядом с RU)')
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать кэш результатов')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Число процессов для проверки записей (0 — по числу ядер)')
+    args = parser.parse_args()
+
+    checks = [c.strip() for c in args.only.split(',') if c.strip()]
+    for check in checks:
+        if check not in CHECKS:
+            parser.error(f"неизвестный набор правил: {check}")
+
+    ru_file = Path(args.file)
+    en_file = Path(args.en) if args.en else ru_file.parent / 'translation_en.tsv'
+
+    try:
+        parsed = read_tsv(ru_file)
+    except FileNotFoundError:
+        print(f"❌ Файл не найден: {ru_file}")
+        return 1
+    except Exception as e:
+        print(f"❌ Ошибка при чтении файла: {e}")
+        return 1
+
+    ref = args.changed_since
+    scope_lines = scope_ids = None
+    if ref is not None:
+        scope = changed_scope(parsed, ref)
+        if scope is None:
+            print("ℹ️  Выполняется полная проверка")
+            ref = None
+        else:
+            scope_lines, scope_ids = scope
+            print(f"ℹ️  Изменено относительно {ref}: записей {len(scope_ids)}, "
+                  f"строк {len(scope_lines)}. Проверяются только они (заголовок и дубликаты ID — по всему файлу)")
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    cache = None
+    if not args.no_cache:
+        cache = ValidationCache(Path(args.cache) if args.cache else ru_file.parent / DEFAULT_CACHE_NAME)
+    elif jobs > 1:
+        # Пул процессов отдаёт результаты через кэш: без файла — только в памяти
+        cache = ValidationCache(None)
+
+    en_parsed = None
+    if ('tags' in checks or 'parity' in checks) and en_file.exists():
+        try:
+            en_parsed = read_tsv(en_file)
+        except Exception:
+            en_parsed = None  # валидаторы сами прочитают файл и напечатают ошибку
+
+    # Метка [RU]/[EN] и сверка с EN зависят от обоих файлов: берём ID,
+    # изменённые в любом из них, и проверяем их записи в обоих
+    en_ids = None
+    if ref is not None:
+        en_ids = set(scope_ids)
+        if en_parsed is not None:
+            en_scope = changed_scope(en_parsed, ref)
+            if en_scope is None:
+                en_ids = None
+            else:
+                en_ids |= en_scope[1]
+
+    exit_code = 0
+    for check in CHECKS:
+        if check not in checks:
+            continue
+        print(f"\n━━━ validate_{check}.py ━━━")
+        if check == 'translation':
+            code = run_translation(ru_file, parsed, scope_lines, cache, jobs)
+        elif check == 'tsv':
+            code = run_tsv(ru_file, parsed, scope_lines, cache, jobs)
+        elif check == 'tags':
+            code = run_tags(ru_file, parsed, en_file, en_parsed, en_ids, cache, jobs)
+        else:
+            code = run_parity(ru_file, parsed, en_file, en_parsed, en_ids)
+        exit_code = max(exit_code, code)
+
+    if cache is not None:
+        # После полной проверки устаревшие записи выбрасываются
+        cache.save(prune=scope_lines is None)
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
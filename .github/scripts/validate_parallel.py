@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Параллельная проверка для validate_all.py --jobs N.
+
+Записи (строки — для validate_translation.py), которых ещё нет в кэше
+(validation_cache.py), делятся на части по границам записей и проверяются
+в пуле процессов; результаты кладутся в кэш. Затем обычный последовательный
+проход валидатора берёт их оттуда и собирает отчёт в порядке файла, поэтому
+вывод тот же, что при последовательной проверке.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+
+# Меньше этого число задач не окупает запуск процессов — их проверит обычный проход
+MIN_PARALLEL_ITEMS = 2000
+MIN_CHUNK_SIZE = 500
+
+
+def prefill(section, items: Iterable[Tuple[str, tuple]], worker: Callable, jobs: int):
+    """
+    Заполняет раздел кэша результатами worker для записей, которых в нём нет.
+    items — (текст-ключ кэша, аргументы записи для worker); worker получает
+    список аргументов и возвращает список результатов в том же порядке.
+    """
+    keys: List[str] = []
+    pending: List[tuple] = []
+    seen: Set[str] = set()
+    for key, args in items:
+        if key in seen or section.get(key) is not None:
+            continue
+        seen.add(key)
+        keys.append(key)
+        pending.append(args)
+
+    if jobs < 2 or len(pending) < MIN_PARALLEL_ITEMS:
+        return
+
+    chunk_size = max(MIN_CHUNK_SIZE, -(-len(pending) // (jobs * 4)))
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    offset = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for results in pool.map(worker, chunks):
+            for value in results:
+                section.put(keys[offset], value)
+                offset += 1
+
+
+def translation_items(parsed, scope_lines: Optional[Set[int]] = None):
+    """Строки, которые validate_translation.check_lines проверит через _check_line."""
+    for line_num, original_line in enumerate(parsed.lines[1:], start=2):
+        line = original_line.rstrip('\n')
+        if not line.strip() or '\t' not in line:
+            continue
+        if scope_lines is not None and line_num not in scope_lines:
+            continue
+        yield line, line
+
+
+def tsv_items(parsed, scope_lines: Optional[Set[int]] = None):
+    """Записи, которые validate_tsv.validate_parsed проверит через _validate_entry."""
+    for entry in parsed.entries:
+        if entry.blank_lines:
+            continue
+        if scope_lines is not None and entry.start_line not in scope_lines:
+            continue
+        full_text = entry.full_text
+        yield full_text, (entry.start_line, full_text, entry.id)
+
+
+def tags_items(parsed_files, ids: Optional[Set[str]] = None):
+    """Записи RU и EN, которые проверит validate_tags.validate_parsed_tags."""
+    for parsed in parsed_files:
+        if parsed is None:
+            continue
+        for entry in parsed.entries:
+            if ids is not None and entry.id not in ids:
+                continue
+            full_text = entry.full_text
+            yield full_text, (entry.start_line, full_text, entry.id)
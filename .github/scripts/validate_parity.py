@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Сверка тегов translation_ru.tsv с английским оригиналом translation_en.tsv
+
+Для каждой записи RU, у которой есть запись EN с тем же ID, сравнивает
+сигнатуры — мультимножества тегов строки:
+1. Переменные в фигурных скобках: {0}, {name}, {0int}
+2. Теги цвета (#G, #ffc89c) и закрывающие #E
+3. Теги-ссылки <Название|780|#C|15> — без первой части (название можно переводить)
+
+Порядок тегов не важен; фигурные скобки внутри тега-ссылки относятся к ней.
+Сигнатуры EN считаются один раз и хранятся в .tag_signatures_cache.json рядом
+с EN файлом, пока не изменится сам файл или этот скрипт.
+
+Расхождения — предупреждения: коммит они не блокируют.
+
+ИСПОЛЬЗОВАНИЕ:
+  python validate_parity.py translation_ru.tsv [--en translation_en.tsv]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from tsv_entries import ParsedTSV, read_tsv
+from validation_cache import rules_version
+
+
+SIGNATURE_CACHE_VERSION = 1
+SIGNATURE_CACHE_NAME = '.tag_signatures_cache.json'
+# Разделитель тегов в сохранённой сигнатуре (в тексте строк не встречается)
+SIGNATURE_SEPARATOR = '\x1f'
+
+
+# Теги для сигнатуры: те же альтернативы и приоритет, что у validate_tags.TAG_TOKEN_PATTERN
+# (тег-ссылка целиком, #E, hex-код, буквенный тег), а вместо отдельных скобок — переменная
+# {...} целиком. findall собирает всё за один проход в C, без разбора каждого токена в Python.
+SIGNATURE_PATTERN = re.compile(
+    r'<[^>]*>'
+    r'|#E'
+    r'|#[0-9A-Fa-f]{3,}(?![0-9A-Fa-f])'
+    r'|#[A-Za-z][A-Za-z0-9]*'
+    r'|\{[^{}]*\}'
+)
+
+
+def tag_signature(text: str) -> Tuple[str, ...]:
+    """Отсортированные теги строки."""
+    items = SIGNATURE_PATTERN.findall(text)
+    if '<' in text:
+        tags = []
+        for item in items:
+            if item[0] == '<':
+                # Тег-ссылка: название (первая часть) можно переводить, остальное должно совпадать
+                parts = item[1:-1].split('|')
+                if len(parts) < 2:
+                    continue
+                item = '<…|' + '|'.join(parts[1:]) + '>'
+            tags.append(item)
+        items = tags
+    items.sort()
+    return tuple(items)
+
+
+def _entry_text(entry) -> str:
+    parts = entry.full_text.rstrip('\n\r').split('\t', 1)
+    return parts[1] if len(parts) > 1 else ''
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_signatures(parsed: ParsedTSV) -> Dict[str, str]:
+    """Сигнатуры первых записей каждого ID: {ID: теги через SIGNATURE_SEPARATOR}."""
+    signatures: Dict[str, str] = {}
+    for entry in parsed.entries:
+        if entry.id not in signatures:
+            signatures[entry.id] = SIGNATURE_SEPARATOR.join(tag_signature(_entry_text(entry)))
+    return signatures
+
+
+def load_en_signatures(en_file: Path, en_parsed: Optional[ParsedTSV] = None) -> Dict[str, str]:
+    """
+    Сигнатуры EN из кэша, если хэш файла и правила не изменились; иначе — разбор
+    файла (или уже разобранного en_parsed) и пересохранение кэша.
+    """
+    en_file = Path(en_file)
+    cache_path = en_file.parent / SIGNATURE_CACHE_NAME
+    file_hash = _file_hash(en_file)
+    rules = rules_version(__file__)
+
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if (data.get('version') == SIGNATURE_CACHE_VERSION and data.get('rules') == rules
+                and data.get('file_hash') == file_hash):
+            return data['signatures']
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    if en_parsed is None:
+        en_parsed = read_tsv(en_file)
+    signatures = build_signatures(en_parsed)
+
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'version': SIGNATURE_CACHE_VERSION,
+                'rules': rules,
+                'file_hash': file_hash,
+                'signatures': signatures,
+            }, ensure_ascii=False, separators=(',', ':')))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  Не удалось сохранить кэш сигнатур {cache_path}: {e}")
+    return signatures
+
+
+def check_parity(
+    parsed: ParsedTSV, en_signatures: Dict[str, str], ids: Optional[Set[str]] = None
+) -> Tuple[int, List[Tuple[object, List[str], List[str]]]]:
+    """
+    Сравнивает записи RU с сигнатурами EN.
+    Возвращает (число сверенных записей, [(запись, нет в RU, лишние в RU)]) в порядке файла.
+    """
+    checked = 0
+    mismatches = []
+    for entry in parsed.entries:
+        if ids is not None and entry.id not in ids:
+            continue
+        en_signature = en_signatures.get(entry.id)
+        if en_signature is None:
+            continue
+        checked += 1
+        ru_tags = tag_signature(_entry_text(entry))
+        if SIGNATURE_SEPARATOR.join(ru_tags) == en_signature:
+            continue
+        en_counts = Counter(en_signature.split(SIGNATURE_SEPARATOR) if en_signature else [])
+        ru_counts = Counter(ru_tags)
+        mismatches.append((entry, _format_counts(en_counts - ru_counts), _format_counts(ru_counts - en_counts)))
+    return checked, mismatches
+
+
+def _format_counts(counts: Counter) -> List[str]:
+    return [tag if n == 1 else f"{tag} ×{n}" for tag, n in sorted(counts.items())]
+
+
+def print_report(checked: int, mismatches: list) -> int:
+    """Печатает расхождения. Возвращает код выхода (всегда 0: это предупреждения)."""
+    if not mismatches:
+        print(f"✅ Теги во всех {checked} записях, сверенных с EN, совпадают")
+        return 0
+
+    print()
+    for entry, missing, extra in mismatches:
+        details = []
+        if missing:
+            details.append(f"нет в RU: {', '.join(missing)}")
+        if extra:
+            details.append(f"лишние в RU: {', '.join(extra)}")
+        context = _entry_text(entry).replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+        print(
+            f"⚠️ Строка {entry.start_line}, ID: {entry.id}: Теги не совпадают с EN ({'; '.join(details)}). "
+            f"Контекст: '{context[:100]}'"
+        )
+
+    print(f"\n⚠️  Найдено расхождений с EN: {len(mismatches)} записей (из {checked} сверенных)")
+    print("ℹ️  Это предупреждения, а не критичные ошибки. Коммит не будет заблокирован.")
+    return 0
+
+
+def run_checks(ru_file: Path, en_file: Path, ru_parsed: ParsedTSV = None,
+               en_parsed: ParsedTSV = None, ids: Optional[Set[str]] = None) -> int:
+    """Сверка RU с EN с выводом отчёта. Возвращает код выхода."""
+    print(f"🔍 Сверка тегов {Path(ru_file).name} с {Path(en_file).name}...")
+    if not Path(en_file).exists():
+        print(f"⚠️  Файл {en_file} не найден, сверка с EN пропущена")
+        return 0
+
+    try:
+        if ru_parsed is None:
+            ru_parsed = read_tsv(ru_file)
+        en_signatures = load_en_signatures(en_file, en_parsed)
+    except Exception as e:
+        print(f"❌ Ошибка при чтении файла: {e}")
+        return 1
+
+    checked, mismatches = check_parity(ru_parsed, en_signatures, ids)
+    return print_report(checked, mismatches)
+
+
+def main():
+    # Настройка кодировки для Windows
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    parser = argparse.ArgumentParser(description='Сверка тегов RU с английским оригиналом')
+    parser.add_argument('file', nargs='?', default='translation_ru.tsv', help='Файл перевода (RU)')
+    parser.add_argument('--en', default=None,
+                        help='Английский файл (по умолчанию translation_en.tsv рядом с RU)')
+    args = parser.parse_args()
+
+    ru_file = Path(args.file)
+    en_file = Path(args.en) if args.en else ru_file.parent / 'translation_en.tsv'
+    if not ru_file.exists():
+        print(f"❌ Файл {ru_file} не найден")
+        return 1
+    return run_checks(ru_file, en_file)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
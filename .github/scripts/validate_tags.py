@@ -17,7 +17,9 @@ import sys
 import re
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, Set, Tuple, List
+from typing import Dict, Set, Tuple, List, Optional
+
+from tsv_entries import ParsedTSV, read_tsv
 
 
 # Коды ошибок
@@ -37,72 +39,48 @@ def validate_tags(file_path: str) -> Dict[str, Set[str]]:
     Returns:
         dict: {id: set of error codes}
     """
-    errors_by_id: Dict[str, Set[str]] = defaultdict(set)
+    parsed = _load(file_path)
+    if parsed is None:
+        return defaultdict(set)
+    return validate_parsed_tags(parsed)
+
+
+def _load(file_path: str) -> Optional[ParsedTSV]:
+    """Читает и разбирает файл; при ошибке печатает её и возвращает None."""
     file_path_obj = Path(file_path)
     
     if not file_path_obj.exists():
         print(f"❌ Файл {file_path} не найден")
-        return errors_by_id
+        return None
     
     try:
-        with open(file_path_obj, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        return read_tsv(file_path_obj)
     except Exception as e:
         print(f"❌ Ошибка при чтении файла: {e}")
-        return errors_by_id
-    
-    if len(lines) == 0:
-        return errors_by_id
-    
-    # Паттерны для проверки
+        return None
+
+
+def validate_parsed_tags(parsed: ParsedTSV, ids: Optional[Set[str]] = None, cache=None) -> Dict[str, Set[str]]:
+    """
+    Проверка тегов в уже разобранном файле (tsv_entries.read_tsv); ids — проверять только эти ID.
+    cache — раздел validation_cache: коды ошибок записи по её тексту.
+    """
+    errors_by_id: Dict[str, Set[str]] = defaultdict(set)
     id_pattern = re.compile(r'^[0-9a-fA-F]{16}$')
     
-    # Проверка каждой строки
-    current_entry_lines = []
-    entry_start_line = None
-    current_id = None
-    
-    for line_num, line in enumerate(lines[1:], start=2):
-        original_line = line
-        line = line.rstrip('\n\r')
-        
-        # Пропускаем пустые строки
-        if not line.strip():
+    for entry in parsed.entries:
+        if ids is not None and entry.id not in ids:
             continue
-        
-        # Проверяем, начинается ли строка с ID
-        is_new_entry = re.match(r'^[0-9a-fA-F]{16}\t', line)
-        
-        if is_new_entry:
-            # Если это новая запись, обрабатываем предыдущую
-            if current_entry_lines:
-                full_text = ''.join(current_entry_lines)
-                if entry_start_line and current_id:
-                    _validate_entry_tags(
-                        errors_by_id, entry_start_line, full_text, id_pattern,
-                        current_id
-                    )
-            
-            # Начинаем новую запись
-            current_entry_lines = [original_line]
-            entry_start_line = line_num
-            
-            parts = line.split('\t', 1)
-            if len(parts) == 2:
-                current_id = parts[0]
-        else:
-            # Продолжение предыдущей записи
-            if current_entry_lines:
-                current_entry_lines.append(original_line)
-    
-    # Обрабатываем последнюю запись
-    if current_entry_lines:
-        full_text = ''.join(current_entry_lines)
-        if entry_start_line and current_id:
-            _validate_entry_tags(
-                errors_by_id, entry_start_line, full_text, id_pattern,
-                current_id
-            )
+        if cache is None:
+            _validate_entry_tags(errors_by_id, entry.start_line, entry.full_text, id_pattern, entry.id)
+            continue
+        full_text = entry.full_text
+        codes = cache.get(full_text)
+        if codes is None:
+            codes = _entry_tag_codes(entry.start_line, full_text, id_pattern, entry.id)
+            cache.put(full_text, codes)
+        if codes:
+            errors_by_id[entry.id].update(codes)
     
     return errors_by_id
 
@@ -121,110 +99,116 @@ def _validate_entry_tags(
     
     id_value, text = parts
     
-    # 1. Проверка тегов цветового оформления #G...#E и русских букв после #
-    # Сначала находим все теги-ссылки, чтобы пропустить теги внутри них
-    link_ranges = []
-    for link_match in re.finditer(r'<([^>]*)>', text):
-        link_ranges.append((link_match.start(), link_match.end()))
-    
-    def is_inside_link_tag(pos):
-        """Проверяет, находится ли позиция внутри тега-ссылки."""
-        for start, end in link_ranges:
-            if start <= pos < end:
-                return True
-        return False
-    
-    # Проходим по тексту и проверяем парность тегов
-    tag_stack = []
-    i = 0
-    while i < len(text):
-        # Пропускаем теги внутри тегов-ссылок
-        if is_inside_link_tag(i):
-            i += 1
-            continue
+    codes = validate_text_tags(text)
+    if codes:
+        errors_by_id[current_id].update(codes)
+
+
+def _entry_tag_codes(start_line: int, full_text: str, id_pattern: re.Pattern, entry_id: str) -> List[str]:
+    """Коды ошибок одной записи списком (в таком виде они хранятся в кэше)."""
+    found: Dict[str, Set[str]] = defaultdict(set)
+    _validate_entry_tags(found, start_line, full_text, id_pattern, entry_id)
+    return sorted(found.get(entry_id, ()))
+
+
+def tag_codes_chunk(entries: List[Tuple[int, str, str]]) -> List[List[str]]:
+    """_entry_tag_codes для списка (start_line, full_text, id) (задача пула процессов validate_all.py --jobs)."""
+    id_pattern = re.compile(r'^[0-9a-fA-F]{16}$')
+    return [_entry_tag_codes(start_line, full_text, id_pattern, entry_id)
+            for start_line, full_text, entry_id in entries]
+
+
+# Токены тегов. Порядок альтернатив повторяет приоритет проверок:
+# тег-ссылка целиком (теги # внутри неё не разбираются), #E, hex-код цвета,
+# буквенный тег, # перед русской буквой, фигурные скобки.
+TAG_TOKEN_PATTERN = re.compile(
+    r'(?P<link><[^>]*>)'
+    r'|(?P<close>#E)'
+    r'|(?P<hex>#[0-9A-Fa-f]{3,}(?![0-9A-Fa-f]))'
+    r'|(?P<color>#[A-Za-z][A-Za-z0-9]*)'
+    r'|(?P<hash_russian>#(?=[\u0400-\u04FF]))'
+    r'|(?P<brace_open>\{)'
+    r'|(?P<brace_close>\})'
+)
+BRACE_PATTERN = re.compile(r'[{}]')
+
+
+def tokenize_tags(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Разбирает текст на токены тегов за один проход: [(вид, начало, конец)].
+    Виды: link, close, hex, color, hash_russian, brace_open, brace_close.
+    Скобки внутри тега-ссылки идут отдельными токенами сразу после него.
+    """
+    tokens = []
+    for match in TAG_TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        tokens.append((kind, match.start(), match.end()))
+        if kind == 'link':
+            for brace in BRACE_PATTERN.finditer(text, match.start(), match.end()):
+                tokens.append(('brace_open' if brace.group() == '{' else 'brace_close', brace.start(), brace.end()))
+    return tokens
+
+
+def validate_text_tags(text: str) -> Set[str]:
+    """Проверяет теги в тексте одной строки. Возвращает множество кодов ошибок."""
+    codes: Set[str] = set()
+    open_tags = 0
+    open_braces = 0
+    close_braces = 0
+    brace_depth = 0
+    
+    for kind, start, end in tokenize_tags(text):
+        # 1. Теги цветового оформления #G...#E и русские буквы после #
+        if kind == 'close':
+            if open_tags:
+                open_tags -= 1
+            else:
+                codes.add(ERROR_CODE_CLOSING_TAG_WITHOUT_OPENING)
+        elif kind == 'hex':
+            # Hex-код открывает тег, только если после него идет текст, а не сразу #E
+            if end < len(text) and not text.startswith('#E', end):
+                open_tags += 1
+        elif kind == 'color':
+            open_tags += 1
+        elif kind == 'hash_russian':
+            codes.add(ERROR_CODE_RUSSIAN_AFTER_HASH)
         
-        # Проверяем, не начинается ли здесь открывающий тег
-        if text[i] == '#' and i + 1 < len(text):
-            # Сначала проверяем закрывающий тег #E
-            if text[i:i+2] == '#E':
-                if tag_stack:
-                    tag_stack.pop()
-                else:
-                    errors_by_id[current_id].add(ERROR_CODE_CLOSING_TAG_WITHOUT_OPENING)
-                i += 2
-                continue
-            
-            # Проверяем hex код цвета (#000, #FFFFFF, #ffc89c10 и т.д.)
-            hex_match = re.match(r'#([0-9A-Fa-f]{3,})(?![0-9A-Fa-f])', text[i:])
-            if hex_match:
-                hex_code = hex_match.group(0)
-                hex_code_len = len(hex_code)
-                
-                # Проверяем, используется ли hex код как открывающий тег с закрывающим #E
-                if i + hex_code_len < len(text) and text[i + hex_code_len:i + hex_code_len + 2] != '#E':
-                    # После hex кода идет текст - это может быть открывающий тег с закрывающим #E
-                    tag_stack.append((i, hex_code))
-                
-                i += hex_code_len
-                continue
-            
-            # Проверяем буквенный тег (#G, #R, #Y и т.д.)
-            letter_match = re.match(r'#([A-Za-z][A-Za-z0-9]*)', text[i:])
-            if letter_match:
-                tag = letter_match.group(0)
-                if tag != '#E':
-                    tag_stack.append((i, tag))
-                i += len(tag)
-                continue
-            
-            # Проверяем на русскую букву после #
-            if i + 1 < len(text) and '\u0400' <= text[i+1] <= '\u04FF':
-                errors_by_id[current_id].add(ERROR_CODE_RUSSIAN_AFTER_HASH)
-                i += 1
+        # 3. Теги-ссылки <...|...|...|...>
+        # Проверяем только теги, которые содержат символ | (теги-ссылки)
+        # Если в <> просто текст без |, то это не ошибка (например, <Water Loong Army>)
+        elif kind == 'link':
+            link_content = text[start + 1:end - 1]
+            # Игнорируем HTML-подобные теги (например, <TEXT>, </TEXT>, <IMAGE>)
+            if re.match(r'^[A-Z/]', link_content.strip()):
                 continue
+            if '|' in link_content:
+                parts = link_content.split('|')
+                if len(parts) != 3 and len(parts) != 4 and len(parts) != 5:
+                    codes.add(ERROR_CODE_LINK_TAG_INVALID)
         
-        i += 1
+        # 4. Переменные {...}
+        elif kind == 'brace_open':
+            open_braces += 1
+            brace_depth += 1
+        elif kind == 'brace_close':
+            close_braces += 1
+            if brace_depth:
+                brace_depth -= 1
+            else:
+                codes.add(ERROR_CODE_CLOSING_BRACE_WITHOUT_OPENING)
     
     # Проверяем незакрытые открывающие теги
-    if tag_stack:
-        errors_by_id[current_id].add(ERROR_CODE_OPENING_TAG_WITHOUT_CLOSING)
-    
-    # 3. Проверка тегов-ссылок <...|...|...|...>
-    # Проверяем только теги, которые содержат символ | (теги-ссылки)
-    # Если в <> просто текст без |, то это не ошибка (например, <Water Loong Army>)
-    for link_match in re.finditer(r'<([^>]*)>', text):
-        link_content = link_match.group(1)
-        # Игнорируем HTML-подобные теги (например, <TEXT>, </TEXT>, <IMAGE>)
-        if re.match(r'^[A-Z/]', link_content.strip()):
-            continue
-        
-        # Проверяем только если есть символ | (это тег-ссылка)
-        if '|' in link_content:
-            parts = link_content.split('|')
-            if len(parts) != 3 and len(parts) != 4 and len(parts) != 5:
-                errors_by_id[current_id].add(ERROR_CODE_LINK_TAG_INVALID)
-        # Если нет |, то это просто текст в угловых скобках - не ошибка
+    if open_tags:
+        codes.add(ERROR_CODE_OPENING_TAG_WITHOUT_CLOSING)
     
-    # 4. Проверка переменных {...}
-    open_braces = text.count('{')
-    close_braces = text.count('}')
     if open_braces != close_braces:
-        errors_by_id[current_id].add(ERROR_CODE_UNBALANCED_BRACES)
-    
-    # Проверяем, что все переменные правильно закрыты
-    brace_stack = []
-    for i, char in enumerate(text):
-        if char == '{':
-            brace_stack.append(i)
-        elif char == '}':
-            if not brace_stack:
-                errors_by_id[current_id].add(ERROR_CODE_CLOSING_BRACE_WITHOUT_OPENING)
-            else:
-                brace_stack.pop()
+        codes.add(ERROR_CODE_UNBALANCED_BRACES)
     
     # Проверяем незакрытые переменные
-    if brace_stack:
-        errors_by_id[current_id].add(ERROR_CODE_OPENING_BRACE_WITHOUT_CLOSING)
+    if brace_depth:
+        codes.add(ERROR_CODE_OPENING_BRACE_WITHOUT_CLOSING)
+    
+    return codes
 
 
 def _get_error_message(error_code: str, start_line: int, display_id: str, context: str) -> str:
@@ -258,48 +242,17 @@ def _get_context(text: str, search_str: str, context_len: int = 30, pos: int = N
     return context
 
 
-def _get_entry_text_by_id(file_path: str, target_id: str) -> Tuple[int, str]:
-    """Получает текст записи по ID и номер строки."""
-    file_path_obj = Path(file_path)
-    if not file_path_obj.exists():
-        return 0, ""
-    
-    try:
-        with open(file_path_obj, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except Exception:
-        return 0, ""
-    
-    current_entry_lines = []
-    entry_start_line = None
-    current_id = None
-    
-    for line_num, line in enumerate(lines[1:], start=2):
-        original_line = line
-        line = line.rstrip('\n\r')
-        
-        if not line.strip():
+def _get_entry_text_by_id(parsed_files: List[Optional[ParsedTSV]], target_id: str) -> Tuple[int, str]:
+    """
+    Текст первой записи с ID и номер её строки: сначала в RU, затем в EN.
+    Поиск по индексу уже разобранных файлов, без повторного чтения.
+    """
+    for parsed in parsed_files:
+        if parsed is None:
             continue
-        
-        is_new_entry = re.match(r'^[0-9a-fA-F]{16}\t', line)
-        
-        if is_new_entry:
-            if current_entry_lines and current_id == target_id:
-                return entry_start_line or 0, ''.join(current_entry_lines)
-            
-            current_entry_lines = [original_line]
-            entry_start_line = line_num
-            
-            parts = line.split('\t', 1)
-            if len(parts) == 2:
-                current_id = parts[0]
-        else:
-            if current_entry_lines:
-                current_entry_lines.append(original_line)
-    
-    if current_entry_lines and current_id == target_id:
-        return entry_start_line or 0, ''.join(current_entry_lines)
-    
+        entry = parsed.first_entry(target_id)
+        if entry is not None:
+            return entry.start_line, entry.full_text
     return 0, ""
 
 
@@ -319,15 +272,33 @@ def main():
         print(f"❌ Файл {ru_file} не найден")
         sys.exit(1)
     
+    sys.exit(run_checks(ru_file, en_file))
+
+
+def run_checks(
+    ru_file: Path, en_file: Path, ru_parsed: ParsedTSV = None,
+    en_parsed: ParsedTSV = None, ids: Optional[Set[str]] = None, cache=None
+) -> int:
+    """
+    Проверка RU (и EN, если есть) с выводом отчёта. Возвращает код выхода.
+    ids — проверять только записи с этими ID в обоих файлах (метка [RU]/[EN]
+    зависит от ошибок в обоих, поэтому ID отбираются сразу для двух файлов).
+    cache — раздел validation_cache (общий для RU и EN: коды зависят только от текста).
+    """
     # Сначала проверяем RU файл
     print("🔍 Проверка translation_ru.tsv...")
-    ru_errors = validate_tags(str(ru_file))
+    if ru_parsed is None:
+        ru_parsed = _load(str(ru_file))
+    ru_errors = validate_parsed_tags(ru_parsed, ids, cache) if ru_parsed is not None else {}
     
     # Затем проверяем EN файл
     en_errors = {}
     if en_file.exists():
         print("🔍 Проверка translation_en.tsv...")
-        en_errors = validate_tags(str(en_file))
+        if en_parsed is None:
+            en_parsed = _load(str(en_file))
+        if en_parsed is not None:
+            en_errors = validate_parsed_tags(en_parsed, ids, cache)
     else:
         print(f"⚠️  Файл {en_file} не найден, проверяется только RU файл")
     
@@ -336,7 +307,7 @@ def main():
     
     if not all_ids:
         print(f"✅ Все теги в файлах валидны!")
-        sys.exit(0)
+        return 0
     
     print(f"\n🔍 Валидация тегов:\n")
     
@@ -361,9 +332,7 @@ def main():
             has_ru_only_errors = True
         
         # Получаем текст записи для контекста
-        start_line, entry_text = _get_entry_text_by_id(str(ru_file), entry_id)
-        if not entry_text:
-            start_line, entry_text = _get_entry_text_by_id(str(en_file), entry_id)
+        start_line, entry_text = _get_entry_text_by_id([ru_parsed, en_parsed], entry_id)
         
         parts = entry_text.split('\t', 1)
         text = parts[1] if len(parts) > 1 else ""
@@ -386,11 +355,11 @@ def main():
         print(f"\n❌ Найдено ошибок только в RU: {ru_only_count} записей (блокирующие)")
         print(f"⚠️  Найдено предупреждений: {total_unique - ru_only_count} записей (RU\\EN: {total_ru - ru_only_count}, EN: {total_en})")
         print("❌ Ошибки только в RU файле требуют исправления. Коммит будет заблокирован.")
-        sys.exit(1)
+        return 1
     else:
         print(f"\n⚠️  Найдено предупреждений: {total_unique} записей (RU\\EN: {total_ru}, EN: {total_en})")
         print("ℹ️  Это предупреждения, а не критичные ошибки. Коммит не будет заблокирован.")
-        sys.exit(0)
+        return 0
 
 
 if __name__ == '__main__':
@@ -37,19 +37,30 @@ import re
 from collections import defaultdict
 
 def validate_tsv(filepath):
-    errors = []
-    warnings = []
-    seen_ids = defaultdict(list)
-    
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             lines = f.readlines()
     except FileNotFoundError:
         print(f"❌ Файл не найден: {filepath}")
         sys.exit(1)
-        
+    
+    errors, warnings = check_lines(lines)
+    return print_report(filepath, lines, errors, warnings)
+
+
+def check_lines(lines, scope=None, cache=None):
+    """
+    Построчные проверки уже прочитанного файла (включая заголовок). Возвращает (errors, warnings).
+    scope — номера строк файла (заголовок — строка 1), которые нужно проверить;
+    заголовок и дубликаты ID проверяются по всему файлу всегда.
+    cache — раздел validation_cache для результатов отдельных строк.
+    """
+    errors = []
+    warnings = []
+    seen_ids = defaultdict(list)
+    
     # Убираем возможный BOM (UTF-8 BOM: \ufeff) и переводы строк
-    header = lines[0].lstrip('\ufeff').rstrip('\n\r')
+    header = lines[0].lstrip('\ufeff').rstrip('\n\r') if lines else ''
     if not header.startswith('ID\tOriginalText'):
         errors.append(
             f"❌ Неверный заголовок. Ожидается: 'ID\\tOriginalText', получено: '{header[:50]}'"
@@ -61,10 +72,14 @@ def validate_tsv(filepath):
     for line_num, line in enumerate(lines, 1):
         line = line.rstrip('\n')
         if not line.strip(): continue
+        # Вне scope проверяются только дубликаты ID (нумерация строк здесь — без заголовка)
+        in_scope = scope is None or line_num + 1 in scope
         
         # Проверка структуры TSV
         parts = line.split('\t', 1)
         if len(parts) != 2:
+            if not in_scope:
+                continue
             if '\t' not in line:
                 errors.append(f"Строка {line_num}: нет TAB. Формат: ID\\tТекст")
             else:
@@ -73,8 +88,17 @@ def validate_tsv(filepath):
         
         id_str, text = parts
         
+        if in_scope:
+            # Результат проверок строки не зависит от её номера и кэшируется по тексту
+            checks = cache.get(line) if cache is not None else None
+            if checks is None:
+                checks = _check_line(line, id_str, text)
+                if cache is not None:
+                    cache.put(line, checks)
+            strange_id, line_errors = checks
+        
         # Проверка ID
-        if not re.match(r'^[a-f0-9]{16}$', id_str):
+        if in_scope and strange_id:
             warnings.append(f"Строка {line_num}: странный ID '{id_str}'")
         
         # Проверка дубликатов ID
@@ -83,20 +107,51 @@ def validate_tsv(filepath):
         else:
             seen_ids[id_str].append(line_num)
         
-        # Проверка техтегов (слова с подчеркиванием)
-        underscored_words = re.findall(r'\b\w+_\w+(?:_\d+)?\b', line)
-        if underscored_words:
-            for word in underscored_words:
-                if re.match(r'^[а-яёА-ЯЁ]', word):
-                    errors.append(f"Строка {line_num}: переведен техтег '{word}'. Теги с '_' нельзя менять!")
+        if not in_scope:
+            continue
         
-        # Проверка на пустой текст
-        if not text.strip():
-            errors.append(f"Строка {line_num}: пустой перевод для ID '{id_str}'")
+        for message in line_errors:
+            errors.append(f"Строка {line_num}{message}")
+
+    return errors, warnings
+
+
+def _check_line(line, id_str, text):
+    """
+    Проверки одной строки без номера: [странный ID, [сообщения об ошибках]]
+    (списки — чтобы результат хранился в JSON-кэше). Сообщения начинаются после «Строка N».
+    """
+    strange_id = not re.match(r'^[a-f0-9]{16}$', id_str)
+    line_errors = []
+    
+    # Проверка техтегов (слова с подчеркиванием)
+    underscored_words = re.findall(r'\b\w+_\w+(?:_\d+)?\b', line)
+    if underscored_words:
+        for word in underscored_words:
+            if re.match(r'^[а-яёА-ЯЁ]', word):
+                line_errors.append(f": переведен техтег '{word}'. Теги с '_' нельзя менять!")
+    
+    # Проверка на пустой текст
+    if not text.strip():
+        line_errors.append(f": пустой перевод для ID '{id_str}'")
+    
+    return [strange_id, line_errors]
+
+
+def check_line_chunk(lines):
+    """_check_line для списка строк с табуляцией (задача пула процессов validate_all.py --jobs)."""
+    results = []
+    for line in lines:
+        id_str, text = line.split('\t', 1)
+        results.append(_check_line(line, id_str, text))
+    return results
+
 
+def print_report(filepath, lines, errors, warnings):
+    """Печатает итоги проверки. Возвращает код выхода."""
     # Вывод итогов
     print(f"\n📋 Проверка файла: {filepath}")
-    print(f"📊 Всего строк: {len(lines)}")
+    print(f"📊 Всего строк: {len(lines) - 1 if lines else 0}")
     
     if errors:
         print(f"\n❌ ОШИБКИ ({len(errors)}):")
@@ -13,6 +13,23 @@ import sys
 import re
 from pathlib import Path
 
+from tsv_entries import ParsedTSV, read_tsv
+
+
+# Коды ошибок (для validation_api.py; в текстовом отчёте не выводятся)
+ERROR_CODE_INVALID_HEADER = "01"
+ERROR_CODE_LINE_WITHOUT_ID = "02"
+ERROR_CODE_BLANK_LINE_IN_ENTRY = "03"
+ERROR_CODE_INVALID_ENTRY_FORMAT = "04"
+ERROR_CODE_INVALID_ID = "05"
+ERROR_CODE_EXTRA_TABS = "06"
+ERROR_CODE_EMPTY_TEXT = "07"
+ERROR_CODE_QUOTE_NOT_CLOSED = "08"
+ERROR_CODE_QUOTE_NOT_OPENED = "09"
+ERROR_CODE_QUOTED_FIELD_BROKEN = "10"
+ERROR_CODE_ODD_QUOTES = "11"
+ERROR_CODE_EMPTY_FILE = "12"
+
 
 def validate_tsv(file_path: str) -> tuple[bool, list[str]]:
     """
@@ -29,107 +46,70 @@ def validate_tsv(file_path: str) -> tuple[bool, list[str]]:
         return False, errors
     
     try:
-        with open(file_path_obj, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        parsed = read_tsv(file_path_obj)
     except Exception as e:
         errors.append(f"❌ Ошибка при чтении файла: {e}")
         return False, errors
     
+    return validate_parsed(parsed)
+
+
+def validate_parsed(
+    parsed: ParsedTSV, scope: set[int] = None, cache=None, details: list = None
+) -> tuple[bool, list[str]]:
+    """
+    Проверки уже разобранного файла (tsv_entries.read_tsv).
+    scope — номера строк, которые нужно проверить (запись — по строке с ID); заголовок проверяется всегда.
+    cache — раздел validation_cache для результатов отдельных записей.
+    details — если задан, в него параллельно errors добавляются (код, номер строки, ID) каждой ошибки;
+    кэш при этом не используется.
+    """
+    errors = []
+    lines = parsed.lines
+    
     if len(lines) == 0:
-        errors.append("❌ Файл пуст")
+        _append(errors, details, ERROR_CODE_EMPTY_FILE, 0, None, "❌ Файл пуст")
         return False, errors
     
-    # Проверка заголовка
-    if len(lines) < 1:
-        errors.append("❌ Файл должен содержать заголовок")
-        return False, errors
-
     # Убираем возможный BOM (UTF-8 BOM: \ufeff) и переводы строк
     header = lines[0].lstrip('\ufeff').rstrip('\n\r')
     if not header.startswith('ID\tOriginalText'):
-        errors.append(
+        _append(
+            errors, details, ERROR_CODE_INVALID_HEADER, 1, None,
             f"❌ Неверный заголовок. Ожидается: 'ID\\tOriginalText', получено: '{header[:50]}'"
         )
     
     # ID должен быть 16 символов hex
     id_pattern = re.compile(r'^[0-9a-fA-F]{16}$')
     
-    # Проверка каждой строки
-    current_entry_lines = []  # Для отслеживания многострочных записей
-    entry_start_line = None
-    current_id = None  # Для хранения ID текущей записи
+    # Строки до первой записи не начинаются с ID и не относятся ни к какой записи
+    for line_num, line in parsed.orphans:
+        if scope is not None and line_num not in scope:
+            continue
+        _append(errors, details, ERROR_CODE_LINE_WITHOUT_ID, line_num, None, _orphan_line_error(line_num, line))
     
-    for line_num, line in enumerate(lines[1:], start=2):
-        original_line = line
-        line = line.rstrip('\n\r')
-        
-        # Пропускаем пустые строки
-        if not line.strip():
-            if current_entry_lines:
-                # Пустая строка внутри записи - это ошибка
-                id_info = f"ID: {current_id}, " if current_id else ""
-                errors.append(
-                    f"❌ Строка {line_num}: {id_info}Пустая строка внутри записи, начатой на строке {entry_start_line}. "
-                    f"Возможно, запись разорвана."
-                )
-                current_entry_lines = []
-                entry_start_line = None
-                current_id = None
+    for entry in parsed.entries:
+        if scope is not None and entry.start_line not in scope:
             continue
-        
-        # Проверяем, начинается ли строка с ID (16 hex символов + табуляция)
-        is_new_entry = re.match(r'^[0-9a-fA-F]{16}\t', line)
-        
-        if is_new_entry:
-            # Если это новая запись, обрабатываем предыдущую
-            if current_entry_lines:
-                # Валидируем предыдущую запись
-                full_text = ''.join(current_entry_lines)
-                if entry_start_line:
-                    _validate_entry(errors, entry_start_line, full_text, id_pattern, current_id)
-            
-            # Начинаем новую запись
-            current_entry_lines = [original_line]
-            entry_start_line = line_num
-            
-            # Проверяем первую строку новой записи
-            parts = line.split('\t', 1)  # Разделяем только на первую табуляцию
-            if len(parts) != 2:
-                # Пытаемся извлечь ID из начала строки
-                potential_id = line[:16] if len(line) >= 16 else line
-                errors.append(
-                    f"❌ Строка {line_num}, ID: {potential_id}: Отсутствует разделитель табуляции после ID. "
-                    f"Начало строки: '{line[:100]}'"
-                )
-                current_entry_lines = []
-                entry_start_line = None
-                current_id = None
-            else:
-                id_value = parts[0]
-                current_id = id_value
-                if not id_pattern.match(id_value):
-                    errors.append(
-                        f"❌ Строка {line_num}, ID: {id_value}: Неверный формат ID. "
-                        f"Ожидается 16 hex символов, получено: '{id_value}'"
+        if entry.blank_lines:
+            # Пустая строка внутри записи - это ошибка: запись не проверяется,
+            # а её следующие строки считаются строками без записи
+            blank_line = entry.blank_lines[0]
+            _append(
+                errors, details, ERROR_CODE_BLANK_LINE_IN_ENTRY, blank_line, entry.id,
+                f"❌ Строка {blank_line}: ID: {entry.id}, Пустая строка внутри записи, начатой на строке {entry.start_line}. "
+                f"Возможно, запись разорвана."
+            )
+            for line_num, line in entry.lines:
+                if line_num > blank_line:
+                    _append(
+                        errors, details, ERROR_CODE_LINE_WITHOUT_ID, line_num, None,
+                        _orphan_line_error(line_num, line.rstrip('\n\r'))
                     )
+        elif cache is None or details is not None:
+            _validate_entry(errors, entry.start_line, entry.full_text, id_pattern, entry.id, details)
         else:
-            # Это продолжение предыдущей записи (многострочное значение)
-            if not current_entry_lines:
-                # Строка не начинается с ID и нет активной записи - это ошибка
-                errors.append(
-                    f"❌ Строка {line_num}: Строка не начинается с корректного ID (16 hex символов + табуляция). "
-                    f"Возможно, строка разорвана или предыдущая запись не завершена. "
-                    f"Начало строки: '{line[:100]}'"
-                )
-            else:
-                # Добавляем к текущей записи
-                current_entry_lines.append(original_line)
-    
-    # Обрабатываем последнюю запись
-    if current_entry_lines:
-        full_text = ''.join(current_entry_lines)
-        if entry_start_line:
-            _validate_entry(errors, entry_start_line, full_text, id_pattern, current_id)
+            _validate_entry_cached(errors, cache, entry, id_pattern)
     
     # Фатальными считаем только сообщения, которые НЕ начинаются с ⚠ (предупреждения)
     has_fatal_errors = any(not err.lstrip().startswith('⚠') for err in errors)
@@ -137,7 +117,54 @@ def validate_tsv(file_path: str) -> tuple[bool, list[str]]:
     return is_valid, errors
 
 
-def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: re.Pattern, current_id: str = None):
+def _append(errors: list, details: list, code: str, line_num: int, entry_id: str, message: str):
+    """Добавляет сообщение и, если нужно, его код, строку и ID."""
+    errors.append(message)
+    if details is not None:
+        details.append((code, line_num, entry_id))
+
+
+def _orphan_line_error(line_num: int, line: str) -> str:
+    return (
+        f"❌ Строка {line_num}: Строка не начинается с корректного ID (16 hex символов + табуляция). "
+        f"Возможно, строка разорвана или предыдущая запись не завершена. "
+        f"Начало строки: '{line[:100]}'"
+    )
+
+
+def _validate_entry_cached(errors: list, cache, entry, id_pattern: re.Pattern):
+    """_validate_entry с кэшем по тексту записи."""
+    full_text = entry.full_text
+    parts = cache.get(full_text)
+    if parts is None:
+        parts = _entry_messages(entry.start_line, full_text, id_pattern, entry.id)
+        cache.put(full_text, parts)
+    for head, tail in parts:
+        errors.append(f"{head}Строка {entry.start_line}{tail}")
+
+
+def _entry_messages(start_line: int, full_text: str, id_pattern: re.Pattern, current_id: str) -> list:
+    """
+    Сообщения _validate_entry без номера строки: [[начало до «Строка N», остаток после него]].
+    В таком виде они хранятся в кэше и не зависят от положения записи в файле.
+    """
+    found = []
+    _validate_entry(found, start_line, full_text, id_pattern, current_id)
+    marker = f"Строка {start_line}"
+    return [message.split(marker, 1) for message in found]
+
+
+def entry_messages_chunk(entries: list) -> list:
+    """_entry_messages для списка (start_line, full_text, id) (задача пула процессов validate_all.py --jobs)."""
+    id_pattern = re.compile(r'^[0-9a-fA-F]{16}$')
+    return [_entry_messages(start_line, full_text, id_pattern, entry_id)
+            for start_line, full_text, entry_id in entries]
+
+
+def _validate_entry(
+    errors: list, start_line: int, full_text: str, id_pattern: re.Pattern,
+    current_id: str = None, details: list = None
+):
     """Валидирует одну запись TSV."""
     # Убираем последний перенос строки, если есть
     full_text = full_text.rstrip('\n\r')
@@ -147,7 +174,8 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
     
     if len(parts) != 2:
         id_info = f"ID: {current_id}, " if current_id else ""
-        errors.append(
+        _append(
+            errors, details, ERROR_CODE_INVALID_ENTRY_FORMAT, start_line, current_id,
             f"❌ Строка {start_line}, {id_info}Неверный формат записи. "
             f"Ожидается ID и текст, разделённые табуляцией. "
             f"Начало: '{full_text[:100]}'"
@@ -161,7 +189,8 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
     
     # Проверяем формат ID
     if not id_pattern.match(id_value):
-        errors.append(
+        _append(
+            errors, details, ERROR_CODE_INVALID_ID, start_line, display_id,
             f"❌ Строка {start_line}, ID: {display_id}: Неверный формат ID. "
             f"Ожидается 16 hex символов, получено: '{id_value}'"
         )
@@ -169,7 +198,8 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
     # Проверяем, что в тексте нет дополнительных табуляций
     # (табуляция должна быть только разделителем между ID и текстом)
     if '\t' in text:
-        errors.append(
+        _append(
+            errors, details, ERROR_CODE_EXTRA_TABS, start_line, display_id,
             f"❌ Строка {start_line}, ID: {display_id}: В тексте найдены дополнительные табуляции. "
             f"Табуляция должна использоваться только как разделитель между ID и текстом. "
             f"Текст содержит {text.count(chr(9))} дополнительных табуляций. "
@@ -178,7 +208,8 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
     
     # Проверяем, что текст не пустой
     if not text.strip():
-        errors.append(
+        _append(
+            errors, details, ERROR_CODE_EMPTY_TEXT, start_line, display_id,
             f"⚠️  Строка {start_line}, ID: {display_id}: Пустой текст"
         )
 
@@ -197,13 +228,15 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
 
         # Открывающая без закрывающей
         if starts_with_quote and not ends_with_quote:
-            errors.append(
+            _append(
+                errors, details, ERROR_CODE_QUOTE_NOT_CLOSED, start_line, display_id,
                 f"❌ Строка {start_line}, ID: {display_id}: Некорректное использование кавычек "
                 f'(открывающая кавычка без закрывающей). Начало текста: "{text[:100]}"'
             )
         # Закрывающая без открывающей
         elif ends_with_quote and not starts_with_quote:
-            errors.append(
+            _append(
+                errors, details, ERROR_CODE_QUOTE_NOT_OPENED, start_line, display_id,
                 f"❌ Строка {start_line}, ID: {display_id}: Некорректное использование кавычек "
                 f'(закрывающая кавычка без открывающей). Начало текста: "{text[:100]}"'
             )
@@ -211,7 +244,8 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
         # В этом случае любое нечётное количество кавычек — гарантированно поломанное поле,
         # которое может склеить строки/столбцы при импорте → считаем фатальной ошибкой.
         elif starts_with_quote and ends_with_quote and quote_count % 2 != 0:
-            errors.append(
+            _append(
+                errors, details, ERROR_CODE_QUOTED_FIELD_BROKEN, start_line, display_id,
                 f"❌ Строка {start_line}, ID: {display_id}: Поломанные кавычки в кавычечной обёртке. "
                 f"Поле начинается и заканчивается на \", но общее количество кавычек нечётное ({quote_count}), "
                 f"что ломает CSV/TSV-парсеры. Начало текста: \"{text[:100]}\""
@@ -219,7 +253,8 @@ def _validate_entry(errors: list, start_line: int, full_text: str, id_pattern: r
         # Остальные случаи: кавычки где-то внутри, но не на границах поля.
         # Нечётное количество кавычек здесь подозрительно, но не всегда фатально → предупреждение.
         elif quote_count % 2 != 0:
-            errors.append(
+            _append(
+                errors, details, ERROR_CODE_ODD_QUOTES, start_line, display_id,
                 f"⚠️ Строка {start_line}, ID: {display_id}: Нечётное количество двойных кавычек ({quote_count}). "
                 f"Это может ломать TSV/CSV-конвертацию. Начало текста: \"{text[:100]}\""
             )
@@ -238,7 +273,11 @@ def main():
     
     file_path = sys.argv[1]
     is_valid, errors = validate_tsv(file_path)
-    
+    sys.exit(print_report(file_path, errors))
+
+
+def print_report(file_path: str, errors: list[str]) -> int:
+    """Печатает результат проверки. Возвращает код выхода."""
     fatal_errors = [e for e in errors if not e.lstrip().startswith('⚠')]
     warnings = [e for e in errors if e.lstrip().startswith('⚠')]
 
@@ -251,14 +290,13 @@ def main():
         print(f"\n❌ Найдено ошибок: {len(fatal_errors)}")
         if warnings:
             print(f"⚠️ Найдено предупреждений: {len(warnings)}")
-        sys.exit(1)
+        return 1
     elif warnings:
         print(f"\n⚠️ Найдено предупреждений: {len(warnings)}")
-        sys.exit(0)
+        return 0
     else:
         print(f"✅ Файл {file_path} валиден!")
-        sys.exit(0)
-
+        return 0
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Программный интерфейс валидаторов для других инструментов (GUI мультитула).
+
+Проверяет уже прочитанные строки TSV в текущем процессе — без запуска
+отдельного интерпретатора и повторного чтения файла — и возвращает ошибки
+объектами Issue вместо текстового отчёта. Правила и тексты сообщений те же,
+что у validate_tsv.py и validate_tags.py.
+
+Пример:
+    from validation_api import validate_lines
+    issues = validate_lines(lines, en_lines)
+    for issue in issues:
+        print(issue.check, issue.code, issue.severity, issue.id, issue.line, issue.message)
+"""
+
+from typing import Iterable, List, Optional
+
+import validate_tags
+import validate_tsv
+from tsv_entries import ParsedTSV
+
+
+CHECKS = ('tsv', 'tags')
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+
+class Issue:
+    """
+    Одна найденная проблема.
+    check — набор правил ('tsv' или 'tags'), code — код ошибки в нём,
+    severity — 'error' (блокирующая) или 'warning', id — ID записи (или None),
+    line — номер строки файла (0 — без привязки к строке), message — текст
+    как в отчёте валидатора, context — начало текста записи или строки.
+    """
+
+    __slots__ = ('check', 'code', 'severity', 'id', 'line', 'message', 'context')
+
+    def __init__(self, check: str, code: str, severity: str, entry_id: Optional[str],
+                 line: int, message: str, context: str):
+        self.check = check
+        self.code = code
+        self.severity = severity
+        self.id = entry_id
+        self.line = line
+        self.message = message
+        self.context = context
+
+    def __repr__(self):
+        return f"Issue({self.check}:{self.code} {self.severity} id={self.id} line={self.line})"
+
+
+def _escape(text: str) -> str:
+    return text.replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+
+
+def _entry_context(entry) -> str:
+    parts = entry.full_text.rstrip('\n\r').split('\t', 1)
+    return _escape(parts[1] if len(parts) > 1 else parts[0])[:100]
+
+
+def parse_lines(lines: List[str], path: str = '<memory>') -> ParsedTSV:
+    """Разбор строк файла (с переводами строк, как из readlines()) без чтения с диска."""
+    return ParsedTSV(path, lines)
+
+
+def check_tsv(parsed: ParsedTSV) -> List[Issue]:
+    """Правила validate_tsv.py. Порядок — как в отчёте."""
+    details = []
+    _, errors = validate_tsv.validate_parsed(parsed, details=details)
+
+    entries_by_line = {entry.start_line: entry for entry in parsed.entries}
+    issues = []
+    for message, (code, line_num, entry_id) in zip(errors, details):
+        severity = SEVERITY_WARNING if message.lstrip().startswith('⚠') else SEVERITY_ERROR
+        entry = entries_by_line.get(line_num)
+        if entry is not None:
+            context = _entry_context(entry)
+        elif 1 <= line_num <= len(parsed.lines):
+            context = _escape(parsed.lines[line_num - 1].rstrip('\n\r'))[:100]
+        else:
+            context = ''
+        issues.append(Issue('tsv', code, severity, entry_id, line_num, message, context))
+    return issues
+
+
+def check_tags(parsed: ParsedTSV, en_parsed: Optional[ParsedTSV] = None) -> List[Issue]:
+    """
+    Правила validate_tags.py. Как в отчёте: ошибка, найденная только в RU, —
+    блокирующая; если та же запись с ошибками и в EN — предупреждение.
+    Порядок — по ID, затем по коду.
+    """
+    ru_errors = validate_tags.validate_parsed_tags(parsed)
+    en_errors = validate_tags.validate_parsed_tags(en_parsed) if en_parsed is not None else {}
+
+    issues = []
+    for entry_id in sorted(set(ru_errors) | set(en_errors)):
+        ru_codes = ru_errors.get(entry_id, set())
+        en_codes = en_errors.get(entry_id, set())
+        if ru_codes and en_codes:
+            label, severity = "[RU\\EN]", SEVERITY_WARNING
+        elif en_codes:
+            label, severity = "[EN]", SEVERITY_WARNING
+        else:
+            label, severity = "[RU]", SEVERITY_ERROR
+
+        entry = None
+        for source in (parsed, en_parsed):
+            if source is not None:
+                entry = source.first_entry(entry_id)
+                if entry is not None:
+                    break
+        start_line = entry.start_line if entry is not None else 0
+        parts = entry.full_text.split('\t', 1) if entry is not None else []
+        context = _escape(parts[1]) if len(parts) > 1 else ""
+
+        for code in sorted(ru_codes | en_codes):
+            message = f"{label} {validate_tags._get_error_message(code, start_line, entry_id, context)}"
+            issues.append(Issue('tags', code, severity, entry_id, start_line, message, context[:100]))
+    return issues
+
+
+def validate_lines(
+    lines: List[str], en_lines: Optional[List[str]] = None,
+    checks: Iterable[str] = CHECKS, path: str = '<memory>'
+) -> List[Issue]:
+    """Все выбранные проверки для строк файла. en_lines — английский файл для проверки тегов."""
+    parsed = parse_lines(lines, path)
+    issues = []
+    for check in checks:
+        if check == 'tsv':
+            issues.extend(check_tsv(parsed))
+        elif check == 'tags':
+            en_parsed = parse_lines(en_lines) if en_lines is not None else None
+            issues.extend(check_tags(parsed, en_parsed))
+        else:
+            raise ValueError(f"неизвестный набор правил: {check}")
+    return issues
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Кэш результатов проверки между запусками validate_all.py.
+
+Для каждого валидатора хранится раздел: версия правил (хэш исходника
+валидатора) и словарь «хэш текста записи (ID + текст) → найденные ошибки»
+в виде, не зависящем от номера строки. Если исходник валидатора изменился,
+его раздел отбрасывается при загрузке — отдельная инвалидация не нужна.
+
+Формат файла (JSON):
+  {"version": 1, "sections": {"tags": {"rules": "...", "entries": {key: value}}}}
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_NAME = '.validation_cache.json'
+
+
+def rules_version(source_path: str) -> str:
+    """Версия правил — хэш исходного файла валидатора."""
+    with open(source_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def _key(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class CacheSection:
+    """Результаты одного валидатора. Отмечает использованные записи, чтобы не хранить устаревшие."""
+
+    def __init__(self, rules: str, entries: Dict[str, Any]):
+        self.rules = rules
+        self.old = entries
+        self.used: Dict[str, Any] = {}
+        self.added = False
+
+    def get(self, text: str) -> Optional[Any]:
+        key = _key(text)
+        value = self.used.get(key)
+        if value is None:
+            value = self.old.get(key)
+            if value is None:
+                return None
+            self.used[key] = value
+        return value
+
+    def put(self, text: str, value: Any):
+        self.used[_key(text)] = value
+        self.added = True
+
+
+class ValidationCache:
+    """Кэш в файле path; при path=None — только в памяти на время запуска (validate_all.py --jobs --no-cache)."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = Path(path) if path is not None else None
+        self.sections: Dict[str, CacheSection] = {}
+        self._stored: Dict[str, dict] = {}
+        if self.path is None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self._stored = data.get('sections', {})
+        except (OSError, ValueError, AttributeError):
+            self._stored = {}
+
+    def section(self, name: str, rules: str) -> CacheSection:
+        """Раздел валидатора; при другой версии правил — пустой."""
+        if name not in self.sections:
+            stored = self._stored.get(name) or {}
+            entries = stored.get('entries', {}) if stored.get('rules') == rules else {}
+            self.sections[name] = CacheSection(rules, entries)
+        return self.sections[name]
+
+    def save(self, prune: bool = True):
+        """
+        Сохраняет кэш. prune — оставить только записи, встреченные в этом запуске
+        (после полной проверки); иначе старые записи сохраняются вместе с новыми.
+        Разделы, не использованные в этом запуске, сохраняются как были.
+        Если ничего не изменилось, файл не перезаписывается.
+        """
+        if self.path is None:
+            return
+        sections = dict(self._stored)
+        changed = False
+        for name, section in self.sections.items():
+            entries = section.used if prune else {**section.old, **section.used}
+            changed = changed or section.added or len(entries) != len(section.old)
+            sections[name] = {'rules': section.rules, 'entries': entries}
+        if not changed:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'version': CACHE_VERSION, 'sections': sections},
+                                   ensure_ascii=False, separators=(',', ':')))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Не удалось сохранить кэш проверок {self.path}: {e}")
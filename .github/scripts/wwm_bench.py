@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк стадий сборки wwm_build.py на синтетических контейнерах (wwm_synth.py).
+
+Для каждого размера генерирует контейнер и перевод, прогоняет стадии
+extract_file → extract_text → apply_translation → pak_text → pak_file
+и считает пропускную способность (MB/s по входу стадии и записей/с).
+
+С --baseline сравнивает с сохранёнными результатами и завершается с кодом 1,
+если какая-то стадия стала медленнее больше чем на --max-regression.
+
+ИСПОЛЬЗОВАНИЕ:
+  python wwm_bench.py --sizes small,medium --save-baseline bench_baseline.json
+  python wwm_bench.py --sizes small,medium --baseline bench_baseline.json --max-regression 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import wwm_build
+import wwm_synth
+
+
+# Размеры: (блоков, записей в блоке)
+SIZES = {
+    'small': (10, 200),
+    'medium': (50, 500),
+    'large': (200, 1000),
+}
+
+STAGES = ['extract_file', 'extract_text', 'apply_translation', 'pak_text', 'pak_file']
+
+
+def run_stages(container_path, tsv_path, work_dir):
+    """Один прогон всех стадий. Возвращает {стадия: (секунды, байт на входе)}."""
+    base_name = os.path.basename(container_path)
+    extract_dir = os.path.join(work_dir, base_name)
+    csv_path = os.path.join(work_dir, f"TextExtractor_{base_name}.csv")
+    translated_csv = os.path.join(work_dir, f"TextExtractor_{base_name}_translated.csv")
+    output_file = os.path.join(work_dir, f"{base_name}.out")
+
+    steps = [
+        ('extract_file', lambda: wwm_build.extract_file(container_path, work_dir),
+         lambda: wwm_build.file_size(container_path)),
+        ('extract_text', lambda: wwm_build.extract_text(extract_dir, work_dir, base_name),
+         lambda: wwm_build.dir_size(extract_dir)),
+        ('apply_translation', lambda: wwm_build.apply_translation(tsv_path, csv_path, translated_csv),
+         lambda: wwm_build.file_size(csv_path)),
+        ('pak_text', lambda: wwm_build.pak_text(translated_csv, extract_dir),
+         lambda: wwm_build.file_size(translated_csv)),
+        ('pak_file', lambda: wwm_build.pak_file(extract_dir, output_file),
+         lambda: wwm_build.dir_size(extract_dir)),
+    ]
+
+    results = {}
+    for name, func, size_in in steps:
+        bytes_in = size_in()
+        # Логи стадий в бенчмарке не нужны
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            ok = func()
+            elapsed = time.perf_counter() - started
+        if not ok:
+            raise RuntimeError(f"стадия {name} завершилась с ошибкой")
+        results[name] = (elapsed, bytes_in)
+    return results
+
+
+def bench_size(size_name, repeat, seed):
+    blocks, records = SIZES[size_name]
+    with tempfile.TemporaryDirectory(prefix=f"wwm_bench_{size_name}_") as tmp:
+        container_path, tsv_path, total = wwm_synth.generate(
+            os.path.join(tmp, 'input'), blocks=blocks, records=records, seed=seed,
+        )
+
+        best = {}
+        for run in range(repeat):
+            work_dir = os.path.join(tmp, f"work_{run}")
+            os.makedirs(work_dir)
+            for name, (elapsed, bytes_in) in run_stages(container_path, tsv_path, work_dir).items():
+                if name not in best or elapsed < best[name][0]:
+                    best[name] = (elapsed, bytes_in)
+
+    result = {}
+    for name in STAGES:
+        elapsed, bytes_in = best[name]
+        elapsed = max(elapsed, 1e-9)
+        result[name] = {
+            'seconds': elapsed,
+            'bytes_in': bytes_in,
+            'mb_per_s': bytes_in / elapsed / (1024 * 1024),
+            'records_per_s': total / elapsed,
+        }
+    return {'blocks': blocks, 'records': total, 'stages': result}
+
+
+def find_regressions(results, baseline, max_regression):
+    """Стадии, у которых записей/с упало больше чем на max_regression относительно baseline."""
+    regressions = []
+    for size_name, size_result in results.items():
+        base_size = baseline.get(size_name)
+        if not base_size:
+            continue
+        for stage, stats in size_result['stages'].items():
+            base_stats = base_size['stages'].get(stage)
+            if not base_stats:
+                continue
+            limit = base_stats['records_per_s'] * (1 - max_regression)
+            if stats['records_per_s'] < limit:
+                drop = 1 - stats['records_per_s'] / base_stats['records_per_s']
+                regressions.append((size_name, stage, drop))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк стадий wwm_build.py')
+    parser.add_argument('--sizes', default='small,medium', help=f"Размеры через запятую: {', '.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=3, help='Повторов на размер (берётся лучший)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', default=None, help='Сохранить результаты в JSON')
+    parser.add_argument('--baseline', default=None, help='JSON с эталонными результатами для сравнения')
+    parser.add_argument('--save-baseline', default=None, help='Сохранить результаты как эталон')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Допустимое падение записей/с относительно эталона (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    for size_name in sizes:
+        if size_name not in SIZES:
+            print(f"❌ Неизвестный размер: {size_name}")
+            return 1
+
+    results = {}
+    for size_name in sizes:
+        print(f"⏱️  Размер {size_name}...")
+        results[size_name] = bench_size(size_name, args.repeat, args.seed)
+
+        size_result = results[size_name]
+        print(f"   блоков: {size_result['blocks']}, записей: {size_result['records']}")
+        for stage, stats in size_result['stages'].items():
+            print(f"   {stage:<18} {stats['seconds']:8.3f} с  {stats['mb_per_s']:8.1f} MB/s  "
+                  f"{stats['records_per_s']:12.0f} зап/с")
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            print(f"💾 Результаты сохранены: {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print(f"\n❌ Регрессии производительности (порог {args.max_regression:.0%}):")
+            for size_name, stage, drop in regressions:
+                print(f"   {size_name}/{stage}: медленнее на {drop:.0%}")
+            return 1
+        print(f"\n✅ Регрессий нет (порог {args.max_regression:.0%})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
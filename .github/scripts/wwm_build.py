@@ -13,12 +13,160 @@ import struct
 import pyzstd
 import csv
 import re
+import hashlib
+import json
+import time
+import queue
+import threading
+import cProfile
+import tracemalloc
+import zipfile
+from collections import ChainMap
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import validate_tags
+
+try:
+    import resource
+except ImportError:
+    resource = None
 
 
 def log(msg):
     print(f"[WWM] {msg}")
 
 
+def rss_peak_bytes():
+    """Пиковый RSS процесса в байтах (None, если модуля resource нет — Windows)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def dir_size(path, suffix='.dat'):
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.name.endswith(suffix))
+    except OSError:
+        return 0
+
+
+def dir_count(path, suffix='.dat'):
+    try:
+        return sum(1 for entry in os.scandir(path) if entry.name.endswith(suffix))
+    except OSError:
+        return 0
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class BuildReport:
+    """
+    Замеры сборки для --report: wall/CPU время, байты на входе/выходе, количество
+    блоков и записей, пики памяти (tracemalloc и RSS) по каждому контейнеру и стадии.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.containers = {}
+        self.started = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if trace_memory:
+            tracemalloc.start()
+
+    def container(self, name):
+        return self.containers.setdefault(name, {
+            'ok': None, 'wall': 0.0, 'cpu': 0.0, 'bytes_in': 0, 'bytes_out': 0, 'stages': {},
+        })
+
+    def stage(self, container, name):
+        return self.container(container)['stages'].setdefault(name, {
+            'wall': 0.0, 'cpu': 0.0, 'bytes_in': 0, 'bytes_out': 0, 'blocks': 0, 'records': 0,
+        })
+
+    @contextmanager
+    def measure(self, stats):
+        """Замер участка целиком (стадия файлового режима или контейнер)."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats['wall'] += time.perf_counter() - wall
+            stats['cpu'] += time.process_time() - cpu
+            if self.trace_memory:
+                nested = [s.get('tracemalloc_peak', 0) for s in stats.get('stages', {}).values()]
+                stats['tracemalloc_peak'] = max([tracemalloc.get_traced_memory()[1], stats.get('tracemalloc_peak', 0)] + nested)
+            stats['rss_peak'] = rss_peak_bytes()
+
+    def wrap_stage(self, container, name, func):
+        """
+        Обёртка стадии поблочной сборки. wall/cpu — суммарное время работы стадии
+        над блоками (CPU потока), т.к. в режиме --pipeline стадии идут параллельно.
+        """
+        stats = self.stage(container, name)
+
+        def item_size(item):
+            # При сборке вариантов у блока несколько версий: считаем их суммарно
+            groups_size = sum(item_size(group) for group in item.get('groups', {}).values())
+            if groups_size:
+                return groups_size
+            for key in ('record', 'data', 'comp'):
+                if item.get(key) is not None:
+                    return len(item[key])
+            return 0
+
+        def wrapped(item):
+            size_in = item_size(item)
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            result = func(item)
+            stats['wall'] += time.perf_counter() - wall
+            stats['cpu'] += time.thread_time() - cpu
+            stats['bytes_in'] += size_in
+            if result is not None:
+                stats['blocks'] += 1
+                stats['bytes_out'] += item_size(result)
+                parsed = result.get('parsed')
+                if parsed is not None:
+                    stats['records'] += len(parsed[2])
+            return result
+
+        return wrapped
+
+    def save(self, path, **meta):
+        for stats in self.containers.values():
+            stages = stats['stages'].values()
+            stats['blocks'] = max((s['blocks'] for s in stages), default=0)
+            stats['records'] = max((s['records'] for s in stages), default=0)
+
+        report = {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'python': sys.version.split()[0],
+            'zstd': pyzstd.zstd_version,
+            **meta,
+            'total': {
+                'wall': time.perf_counter() - self.wall_start,
+                'cpu': time.process_time() - self.cpu_start,
+                'rss_peak': rss_peak_bytes(),
+                'tracemalloc_peak': tracemalloc.get_traced_memory()[1] if self.trace_memory else None,
+            },
+            'containers': self.containers,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
 def extract_file(input_file, output_dir):
     try:
         base_name = os.path.splitext(os.path.basename(input_file))[0]
@@ -102,7 +250,7 @@ def extract_file(input_file, output_dir):
         return False
 
 
-def extract_text(input_dir, output_dir, file_prefix):
+def extract_text(input_dir, output_dir, file_prefix, stats=None):
     try:
         output_path = os.path.join(output_dir, f"TextExtractor_{file_prefix}.csv")
         
@@ -155,6 +303,8 @@ def extract_text(input_dir, output_dir, file_prefix):
                     log(f"⚠️  Ошибка при чтении {filename}: {e}")
                     continue
         
+        if stats is not None:
+            stats['records'] = k
         log(f"✅ Текстовый файл создан: {output_path} ({k} записей)")
         return output_path
     except Exception as e:
@@ -164,20 +314,184 @@ def extract_text(input_dir, output_dir, file_prefix):
         return None
 
 
-def apply_translation(tsv_path, csv_path, output_csv_path):
+def load_translations(tsv_path):
+    translations = {}
+    with open(tsv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter='\t')
+        next(reader, None)
+        for row in reader:
+            if len(row) >= 2:
+                translations[row[0].strip()] = row[1].strip()
+    return translations
+
+
+# Слои перевода, загруженные в этом процессе: путь -> ((mtime, размер), словарь)
+_LAYER_CACHE = {}
+
+
+def load_translation_layer(tsv_path):
+    """Слой перевода разбирается один раз; повторно — только если файл изменился."""
+    st = os.stat(tsv_path)
+    key = os.path.abspath(tsv_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _LAYER_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    layer = load_translations(tsv_path)
+    _LAYER_CACHE[key] = (stamp, layer)
+    return layer
+
+
+def load_translation_layers(tsv_paths):
+    """
+    Стек слоёв перевода (например, основной, бета, правки пользователя).
+    Более поздний слой перекрывает ранние; поиск по ID идёт лениво по цепочке
+    слоёв, без слияния словарей.
+    """
+    if isinstance(tsv_paths, (str, os.PathLike)):
+        tsv_paths = [tsv_paths]
+    return ChainMap(*[load_translation_layer(path) for path in reversed(tsv_paths)])
+
+
+def describe_layers(translations):
+    """Строк в каждом слое (в порядке файлов) для лога — без слияния ключей всех слоёв, как у len(ChainMap)."""
+    sizes = [len(layer) for layer in reversed(translations.maps)]
+    return f"{' + '.join(map(str, sizes))} (слоёв: {len(sizes)})"
+
+
+class TagGate:
+    """
+    Проверка тегов при применении перевода (правила validate_tags.py).
+    Если перевод вносит ошибки тегов, которых нет в оригинальной строке,
+    в сборку идёт оригинал, а запись попадает в отчёт.
+    """
+
+    def __init__(self):
+        self.rejected = []
+        self._lock = threading.Lock()
+        with open(validate_tags.__file__, 'rb') as f:
+            # Входит в ключи кэша блоков: правила изменились — блоки пересобираются
+            self.rules_hash = hashlib.sha1(f.read()).hexdigest()[:12]
+
+    @staticmethod
+    def check(original, translated):
+        """Коды ошибок, которые появились в переводе (пустой список — перевод годен)."""
+        if original == translated:
+            return []
+        return sorted(validate_tags.validate_text_tags(translated) - validate_tags.validate_text_tags(original))
+
+    def add(self, container, entries, variants=None):
+        if not entries:
+            return
+        with self._lock:
+            for entry in entries:
+                entry = dict(entry, container=container)
+                if variants is not None:
+                    entry['variants'] = list(variants)
+                self.rejected.append(entry)
+
+    def save(self, path):
+        report = {
+            'rules': self.rules_hash,
+            'rejected': len(self.rejected),
+            'entries': self.rejected,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+def rejected_entry(id_val, codes, original, translated):
+    return {'id': id_val, 'codes': codes, 'original': original, 'translation': translated}
+
+
+# --- Покрытие перевода ---
+# Считается при применении перевода, по каждому блоку: сколько строк переведено,
+# не переведено, совпадает с английским оригиналом, пустых и всё ещё с китайским.
+
+COVERAGE_FIELDS = ['total', 'translated', 'untranslated', 'identical', 'empty', 'chinese',
+                   'chars', 'chars_translated']
+
+CHINESE_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+
+def new_coverage():
+    return dict.fromkeys(COVERAGE_FIELDS, 0)
+
+
+def count_coverage(coverage, original, text, applied):
+    """Учитывает одну запись: original — строка игры, text — строка в сборке, applied — применён ли перевод."""
+    coverage['total'] += 1
+    coverage['chars'] += len(text)
+    if not applied:
+        coverage['untranslated'] += 1
+    elif text == original:
+        coverage['identical'] += 1
+    else:
+        coverage['translated'] += 1
+        coverage['chars_translated'] += len(text)
+    if not text.strip():
+        coverage['empty'] += 1
+    elif CHINESE_PATTERN.search(text):
+        coverage['chinese'] += 1
+
+
+def sum_coverage(items):
+    total = new_coverage()
+    for coverage in items:
+        for field in COVERAGE_FIELDS:
+            total[field] += coverage[field]
+    return total
+
+
+class CoverageReport:
+    """Покрытие перевода по контейнерам и блокам; сохраняется компактным JSON для www/status.html."""
+
+    def __init__(self):
+        self.containers = {}
+        self._lock = threading.Lock()
+
+    def add(self, container, index, coverage):
+        with self._lock:
+            self.containers.setdefault(container, {})[index] = coverage
+
+    def to_json(self):
+        containers = {}
+        for name, blocks in self.containers.items():
+            containers[name] = {
+                'total': sum_coverage(blocks.values()),
+                'blocks': [[index] + [blocks[index][field] for field in COVERAGE_FIELDS] for index in sorted(blocks)],
+            }
+        return {
+            'total': sum_coverage(c['total'] for c in containers.values()),
+            'containers': containers,
+        }
+
+    @staticmethod
+    def save(path, reports):
+        """reports: {имя варианта: CoverageReport}; без вариантов — {None: CoverageReport}."""
+        if list(reports) == [None]:
+            data = reports[None].to_json()
+        else:
+            data = {'variants': {name: report.to_json() for name, report in reports.items()}}
+        data['fields'] = ['index'] + COVERAGE_FIELDS
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+
+def apply_translation(tsv_path, csv_path, output_csv_path, stats=None, tag_gate=None, container='',
+                      coverage=None):
     try:
-        translations = {}
-        with open(tsv_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter='\t')
-            next(reader, None)
-            for row in reader:
-                if len(row) >= 2:
-                    translations[row[0].strip()] = row[1].strip()
+        translations = load_translation_layers(tsv_path)
         
-        log(f"✅ Загружено переводов: {len(translations)}")
+        log(f"✅ Загружено переводов: {describe_layers(translations)}")
         
         replaced = 0
         total = 0
+        rejected = []
         with open(csv_path, 'r', encoding='utf-8', newline='') as src, \
              open(output_csv_path, 'w', encoding='utf-8', newline='') as out:
             
@@ -189,22 +503,49 @@ def apply_translation(tsv_path, csv_path, output_csv_path):
             
             id_idx = header.index('ID')
             text_idx = header.index('OriginalText')
+            file_idx = header.index('File')
+            block_coverage = {}
             
             for row in reader:
-                if len(row) <= max(id_idx, text_idx):
+                if len(row) <= max(id_idx, text_idx, file_idx):
                     writer.writerow(row)
                     continue
                 
                 total += 1
                 id_val = row[id_idx].strip()
+                original = row[text_idx]
+                applied = False
                 
                 if id_val in translations:
-                    row[text_idx] = translations[id_val]
-                    replaced += 1
+                    translated = translations[id_val]
+                    codes = tag_gate.check(original, translated) if tag_gate is not None else None
+                    if codes:
+                        rejected.append(rejected_entry(id_val, codes, original, translated))
+                    else:
+                        row[text_idx] = translated
+                        replaced += 1
+                        applied = True
+                
+                block = block_coverage.get(row[file_idx])
+                if block is None:
+                    block = block_coverage[row[file_idx]] = new_coverage()
+                count_coverage(block, original, row[text_idx], applied)
                 
                 writer.writerow(row)
         
+        if coverage is not None:
+            for filename, block in block_coverage.items():
+                match = re.search(r'(\d+)\.dat$', filename)
+                coverage.add(container, int(match.group(1)) if match else -1, block)
+        if tag_gate is not None:
+            tag_gate.add(container, rejected)
+        if stats is not None:
+            stats['records'] = total
+            stats['replaced'] = replaced
+            stats['rejected'] = len(rejected)
         log(f"✅ Применено переводов: {replaced} из {total}")
+        if rejected:
+            log(f"🛡️  Сломаны теги, оставлен оригинал: {len(rejected)}")
         return True
     except Exception as e:
         log(f"❌ Ошибка применения: {e}")
@@ -311,7 +652,7 @@ def pak_text(csv_path, extract_dir):
         return False
 
 
-def pak_file(dat_folder, output_file):
+def pak_file(dat_folder, output_file, release=None, arcname=None):
     try:
         files = [f for f in os.listdir(dat_folder) if f.endswith('.dat')]
         
@@ -323,7 +664,7 @@ def pak_file(dat_folder, output_file):
         
         log(f"🔍 Найдено файлов для упаковки: {len(files)}")
         
-        with open(output_file, 'wb') as outfile:
+        with open_output(output_file, release, arcname) as outfile:
             # 1. Заголовок + версия
             outfile.write(b'\xEF\xBE\xAD\xDE\x01\x00\x00\x00')
             
@@ -361,7 +702,976 @@ def pak_file(dat_folder, output_file):
         return False
 
 
-def process_game_file(input_file, translation_file, work_dir, output_dir):
+# --- Архив релиза ---
+
+class ReleaseArchive:
+    """
+    Детерминированный zip релиза, который пишется по мере сборки контейнеров.
+    Фиксированные дата и атрибуты записей, порядок — порядок сборки, поэтому
+    одинаковые контейнеры дают байт-в-байт одинаковый архив. Контейнеры уже
+    сжаты zstd, поэтому записи хранятся без сжатия. В конец архива (и рядом
+    с ним) кладётся манифест: имя, размер и sha256 каждого файла.
+    """
+
+    DATE_TIME = (1980, 1, 1, 0, 0, 0)
+    MANIFEST_NAME = 'manifest.json'
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = f"{os.path.splitext(path)[0]}_manifest.json"
+        self.tmp_path = f"{path}.tmp"
+        self.files = []
+        self.zip = zipfile.ZipFile(self.tmp_path, 'w', zipfile.ZIP_STORED)
+
+    def _info(self, arcname):
+        info = zipfile.ZipInfo(arcname, self.DATE_TIME)
+        info.compress_type = zipfile.ZIP_STORED
+        info.create_system = 3
+        info.external_attr = 0o644 << 16
+        return info
+
+    @contextmanager
+    def entry(self, arcname):
+        """Поток записи одного файла архива; размер и хэш считаются на лету."""
+        entry = _ArchiveEntry()
+        with self.zip.open(self._info(arcname), 'w', force_zip64=True) as dst:
+            entry.dst = dst
+            yield entry
+        self.files.append({'name': arcname, 'size': entry.size, 'sha256': entry.sha256.hexdigest()})
+
+    def close(self):
+        manifest = json.dumps({'files': self.files}, ensure_ascii=False, indent=2).encode('utf-8')
+        with self.entry(self.MANIFEST_NAME) as entry:
+            entry.write(manifest)
+        self.files.pop()
+        self.zip.close()
+        os.replace(self.tmp_path, self.path)
+        with open(self.manifest_path, 'wb') as f:
+            f.write(manifest)
+
+    def abort(self):
+        self.zip.close()
+        os.remove(self.tmp_path)
+
+
+class _ArchiveEntry:
+    def __init__(self):
+        self.dst = None
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.dst.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+
+
+class _TeeWriter:
+    def __init__(self, *targets):
+        self.targets = targets
+
+    def write(self, data):
+        for target in self.targets:
+            target.write(data)
+
+
+@contextmanager
+def open_output(output_file, release=None, arcname=None):
+    """Выходной файл контейнера; с release всё записанное сразу уходит и в zip релиза."""
+    with open(output_file, 'wb') as f:
+        if release is None:
+            yield f
+            return
+        with release.entry(arcname or os.path.basename(output_file)) as entry:
+            yield _TeeWriter(f, entry)
+
+
+# --- Поблочная сборка в памяти ---
+# Те же форматы, что у extract_file / extract_text / pak_text / pak_file,
+# но без промежуточных .dat и CSV: каждый блок обрабатывается отдельно,
+# поэтому готовые записи блоков можно кэшировать между сборками.
+
+BLOCK_CACHE_VERSION = 2
+
+
+def iter_container_blocks(input_file):
+    """Потоково читает сжатые записи блоков контейнера: (номер блока, запись), запись = 9 байт заголовка + zstd."""
+    with open(input_file, 'rb') as f:
+        if f.read(4) != b'\xEF\xBE\xAD\xDE':
+            raise ValueError(f"Неверный формат файла: {input_file}")
+
+        f.read(4)
+        offset_count = struct.unpack('<I', f.read(4))[0] + 1
+
+        if offset_count == 1:
+            comp_block_len = struct.unpack('<I', f.read(4))[0]
+            comp_block = f.read(comp_block_len)
+            if len(comp_block) >= comp_block_len and len(comp_block) >= 9:
+                yield 0, comp_block
+            return
+
+        offsets = [struct.unpack('<I', f.read(4))[0] for _ in range(offset_count)]
+        data_start = f.tell()
+
+        for i in range(offset_count - 1):
+            block_len = offsets[i + 1] - offsets[i]
+            f.seek(data_start + offsets[i])
+            comp_block = f.read(block_len)
+            if len(comp_block) < block_len or len(comp_block) < 9:
+                continue
+            yield i, comp_block
+
+
+def read_container_blocks(input_file):
+    """Все сжатые записи блоков контейнера списком, либо None при неверном формате."""
+    try:
+        return list(iter_container_blocks(input_file))
+    except ValueError as e:
+        log(f"❌ {e}")
+        return None
+
+
+def decompress_block(comp_block, index):
+    comp_type, comp_size, decomp_size = struct.unpack('<BII', comp_block[:9])
+    if comp_type != 0x04:
+        return None
+    try:
+        return pyzstd.decompress(comp_block[9:])
+    except Exception as e:
+        log(f"⚠️  Ошибка распаковки блока {index}: {e}")
+        return None
+
+
+def parse_text_block(data, name=''):
+    """
+    Разбор текстового блока (как extract_text): возвращает (count_full, count_text, records),
+    records = [(unknown_hex, id_hex, text)]. Текст хранится в том же виде, что и в CSV
+    (переводы строк экранированы), чтобы сборка давала байт-в-байт тот же результат.
+    """
+    records = []
+    count_full = count_text = 0
+    try:
+        count_full = struct.unpack('<I', data[0:4])[0]
+        count_text = struct.unpack('<I', data[8:12])[0]
+        code = data[24:24 + count_full].hex()
+        data_start = min(24 + count_full + 17, len(data))
+
+        for i in range(count_full):
+            pos = data_start + i * 16
+            id_raw = data[pos:pos + 8]
+            start_text_offset = pos + len(id_raw)
+            offset_text = struct.unpack('<I', data[start_text_offset:start_text_offset + 4])[0]
+            length = struct.unpack('<I', data[start_text_offset + 4:start_text_offset + 8])[0]
+
+            text_pos = start_text_offset + offset_text
+            text = data[text_pos:text_pos + length].decode('utf-8', errors='ignore')
+            text = text.replace('\n', '\\n')
+            text = text.replace('\r', '\\r')
+
+            records.append((code[i*2:(i+1)*2], id_raw.hex(), text))
+    except Exception as e:
+        log(f"⚠️  Ошибка при чтении {name}: {e}")
+        if not records:
+            return None
+
+    return count_full, count_text, records
+
+
+def apply_block_translations(records, translations, tag_gate=None, rejected=None, coverage=None):
+    """
+    Подставляет переводы в записи блока. Возвращает (новые записи, количество замен).
+    С tag_gate переводы со сломанными тегами не применяются и добавляются в rejected;
+    с coverage в том же проходе считается покрытие блока.
+    """
+    result = []
+    replaced = 0
+    for unk, id_val, original in records:
+        text = original
+        applied = False
+        translated = translations.get(id_val.strip())
+        if translated is not None:
+            codes = tag_gate.check(original, translated) if tag_gate is not None else None
+            if codes:
+                if rejected is not None:
+                    rejected.append(rejected_entry(id_val.strip(), codes, original, translated))
+            else:
+                text = translated
+                replaced += 1
+                applied = True
+        if coverage is not None:
+            count_coverage(coverage, original, text, applied)
+        result.append((unk, id_val, text))
+    return result, replaced
+
+
+def build_text_block(count_full, count_text, records):
+    """Сборка текстового блока из записей (как pak_text для одного .dat)."""
+    start_unk = 24
+    start_id = start_unk + count_full + 17
+    curr_text = start_id + count_full * 16
+
+    filled_bytes_unk = b''
+    filled_bytes_id = []
+    filled_bytes_text = []
+
+    for unk, id_val, text in records:
+        text = text.replace('\\n', '\x0A').encode('utf-8')
+
+        filled_bytes_unk += bytes.fromhex(unk)
+        start_unk += 1
+
+        if start_unk >= count_full + 24:
+            if len(filled_bytes_unk) >= 16:
+                filled_bytes_unk += b'\xFF' + filled_bytes_unk[:16]
+            else:
+                filled_bytes_unk += b'\xFF' + filled_bytes_unk + b'\x80' * (16 - len(filled_bytes_unk))
+
+        filled_bytes_id.append(bytes.fromhex(id_val))
+        start_id += 8
+        filled_bytes_id.append(struct.pack('<II', (curr_text - start_id), len(text)))
+        start_id += 8
+
+        filled_bytes_text.append(text)
+        curr_text += len(text)
+
+    return b''.join([
+        struct.pack('<II', count_full, 0),
+        struct.pack('<II', count_text, 0),
+        b'\xDC\x96\x58\x59\x00\x00\x00\x00',
+        filled_bytes_unk,
+        b''.join(filled_bytes_id),
+        b''.join(filled_bytes_text),
+    ])
+
+
+def patch_block(data, parsed, translations, tag_gate=None, rejected=None):
+    """Применяет переводы к разобранному блоку. Возвращает (данные блока, количество замен)."""
+    if parsed is None or not parsed[2]:
+        return data, 0
+    count_full, count_text, records = parsed
+    records, replaced = apply_block_translations(records, translations, tag_gate, rejected)
+    return build_text_block(count_full, count_text, records), replaced
+
+
+def compress_block(data):
+    comp_data = pyzstd.compress(data)
+    return struct.pack('<BII', 4, len(comp_data), len(data)) + comp_data
+
+
+def write_container(output_file, block_records, release=None, arcname=None):
+    """Запись контейнера из готовых сжатых записей (как pak_file)."""
+    if not block_records:
+        raise ValueError("нет блоков для упаковки")
+
+    # Пишем во временный файл и подменяем целиком: игра не увидит недописанный контейнер
+    tmp_path = f"{output_file}.tmp"
+    with open_output(tmp_path, release, arcname or os.path.basename(output_file)) as outfile:
+        outfile.write(b'\xEF\xBE\xAD\xDE\x01\x00\x00\x00')
+        outfile.write(struct.pack('<I', len(block_records) - 1))
+
+        archive_len = 0
+        for record in block_records[:-1]:
+            outfile.write(struct.pack('<I', archive_len))
+            archive_len += len(record)
+        archive_len += len(block_records[-1])
+        outfile.write(struct.pack('<I', archive_len))
+
+        for record in block_records:
+            outfile.write(record)
+
+    os.replace(tmp_path, output_file)
+    return archive_len
+
+
+def translation_subset_hash(ids, translations):
+    """Хэш переводов только для ID, которые есть в блоке."""
+    h = hashlib.sha1()
+    for id_val in ids:
+        text = translations.get(id_val.strip())
+        if text is not None:
+            h.update(f"{id_val}\t{text}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+class BlockCache:
+    """
+    Кэш готовых сжатых записей блоков одного контейнера.
+    Ключ записи: хэш исходного блока + хэш переводов для ID этого блока.
+    Манифест хранит список ID каждого исходного блока, чтобы при попадании
+    в кэш не распаковывать блок вовсе, а для каждой записи — покрытие перевода
+    и отклонённые проверкой тегов переводы, чтобы отчёты были полными и при попадании.
+    """
+
+    def __init__(self, cache_dir, base_name):
+        self.records_dir = os.path.join(cache_dir, base_name)
+        self.manifest_path = os.path.join(cache_dir, f"{base_name}.json")
+        os.makedirs(self.records_dir, exist_ok=True)
+
+        self.blocks = {}
+        self.info = {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == BLOCK_CACHE_VERSION and manifest.get('zstd') == pyzstd.zstd_version:
+                self.blocks = manifest.get('blocks', {})
+                self.info = manifest.get('info', {})
+        except (OSError, ValueError):
+            pass
+
+        self.seen_blocks = {}
+        self.used_keys = set()
+        self.used_info = {}
+
+    @staticmethod
+    def block_hash(comp_block):
+        return hashlib.sha1(comp_block).hexdigest()
+
+    @staticmethod
+    def make_key(block_hash, subset_hash, tag_gate=None):
+        if tag_gate is not None:
+            subset_hash += f":tags-{tag_gate.rules_hash}"
+        return hashlib.sha1(f"{block_hash}:{subset_hash}".encode('ascii')).hexdigest()
+
+    def block_ids(self, block_hash):
+        return self.blocks.get(block_hash)
+
+    def get(self, key):
+        """Готовая запись и её сведения ({'coverage', 'rejected'}) или (None, None)."""
+        info = self.info.get(key)
+        if info is None:
+            return None, None
+        try:
+            with open(os.path.join(self.records_dir, f"{key}.bin"), 'rb') as f:
+                return f.read(), info
+        except OSError:
+            return None, None
+
+    def put(self, key, record):
+        tmp_path = os.path.join(self.records_dir, f"{key}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(record)
+        os.replace(tmp_path, os.path.join(self.records_dir, f"{key}.bin"))
+
+    def mark(self, block_hash, ids, key, info):
+        self.seen_blocks[block_hash] = ids
+        self.used_keys.add(key)
+        self.used_info[key] = info
+
+    def save(self):
+        # Оставляем только блоки и записи текущей сборки — старые версии игры не копятся
+        manifest = {'version': BLOCK_CACHE_VERSION, 'zstd': pyzstd.zstd_version, 'blocks': self.seen_blocks,
+                    'info': self.used_info}
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+        for filename in os.listdir(self.records_dir):
+            if filename.endswith('.bin') and filename[:-4] not in self.used_keys:
+                os.remove(os.path.join(self.records_dir, filename))
+
+
+# --- Исполнители стадий поблочной сборки ---
+# Стадия — функция item -> item (или None, чтобы отбросить блок).
+
+_PIPELINE_END = object()
+
+
+def run_sequential(source, stages, sink):
+    for item in source:
+        for name, func in stages:
+            item = func(item)
+            if item is None:
+                break
+        else:
+            sink(item)
+
+
+def run_pipeline(source, stages, sink, queue_size=8):
+    """
+    Конвейер: отдельный поток на чтение, на каждую стадию и на сбор результатов
+    (sink), между ними ограниченные очереди (backpressure). Порядок блоков
+    сохраняется. При ошибке в любом потоке остальные останавливаются, а первая
+    ошибка пробрасывается наружу.
+
+    Запись контейнера в конвейер не входит: таблица смещений в начале файла
+    требует размеры всех сжатых блоков, поэтому sink только собирает готовые
+    записи, а write_container пишет файл после последнего блока. Пик памяти —
+    сжатые записи всего контейнера (исходные блоки распакованными не копятся).
+    """
+    stop = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    def fail(e):
+        errors.append(e)
+        stop.set()
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _PIPELINE_END
+
+    def reader():
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+            put(queues[0], _PIPELINE_END)
+        except BaseException as e:
+            fail(e)
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    def worker(func, q_in, q_out):
+        try:
+            while True:
+                item = get(q_in)
+                if item is _PIPELINE_END:
+                    put(q_out, _PIPELINE_END)
+                    return
+                item = func(item)
+                if item is not None and not put(q_out, item):
+                    return
+        except BaseException as e:
+            fail(e)
+
+    def collector():
+        try:
+            while True:
+                item = get(queues[-1])
+                if item is _PIPELINE_END:
+                    return
+                sink(item)
+        except BaseException as e:
+            fail(e)
+
+    threads = [threading.Thread(target=reader, name='read', daemon=True)]
+    for i, (name, func) in enumerate(stages):
+        threads.append(threading.Thread(target=worker, args=(func, queues[i], queues[i + 1]),
+                                        name=name, daemon=True))
+    threads.append(threading.Thread(target=collector, name='collect', daemon=True))
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+
+
+def make_block_stages(base_name, translations, cache, counters, tag_gate=None, coverage=None):
+    """
+    Стадии сборки блока: распаковка → разбор → перевод → сериализация → сжатие.
+    Счётчики, покрытие, отчёт о тегах и отметки кэша обновляются только в
+    последней стадии: в конвейере она работает в одном потоке и получает блоки
+    по порядку, поэтому блокировки не нужны, а порядок отчётов не зависит от потоков.
+    """
+
+    def account(item):
+        info = item['info']
+        counters['replaced'] += item.get('replaced', 0)
+        if info['coverage'] is not None:
+            counters['total'] += info['coverage']['total']
+            if coverage is not None:
+                coverage.add(base_name, item['index'], info['coverage'])
+        counters['rejected'] += len(info['rejected'])
+        if tag_gate is not None:
+            tag_gate.add(base_name, info['rejected'])
+
+    def stage_decompress(item):
+        if cache is not None:
+            item['hash'] = cache.block_hash(item['comp'])
+            ids = cache.block_ids(item['hash'])
+            if ids is not None:
+                key = cache.make_key(item['hash'], translation_subset_hash(ids, translations), tag_gate)
+                record, info = cache.get(key)
+                if record is not None:
+                    item['ids'] = ids
+                    item['key'] = key
+                    item['record'] = record
+                    item['info'] = info
+                    item['replaced'] = (sum(1 for id_val in ids if id_val.strip() in translations)
+                                        - len(info['rejected']))
+                    return item
+
+        item['data'] = decompress_block(item['comp'], item['index'])
+        return item if item['data'] is not None else None
+
+    def stage_parse(item):
+        if 'record' not in item and item['index'] != 0:
+            item['parsed'] = parse_text_block(item['data'], f"{base_name}_{item['index']}.dat")
+        return item
+
+    def stage_apply(item):
+        if 'record' in item:
+            return item
+        parsed = item.get('parsed')
+        item['info'] = {'coverage': None, 'rejected': []}
+        if parsed is not None and parsed[2]:
+            item['info']['coverage'] = new_coverage()
+            records, replaced = apply_block_translations(parsed[2], translations, tag_gate,
+                                                         item['info']['rejected'], item['info']['coverage'])
+            item['records'] = records
+            item['replaced'] = replaced
+        return item
+
+    def stage_serialize(item):
+        if 'records' in item:
+            count_full, count_text, _ = item['parsed']
+            item['data'] = build_text_block(count_full, count_text, item['records'])
+        return item
+
+    def stage_compress(item):
+        if 'record' in item:
+            counters['hits'] += 1
+        else:
+            item['record'] = compress_block(item['data'])
+            counters['rebuilt'] += 1
+            if cache is not None:
+                parsed = item.get('parsed')
+                item['ids'] = [id_val for _, id_val, _ in parsed[2]] if parsed is not None else []
+                item['key'] = cache.make_key(item['hash'], translation_subset_hash(item['ids'], translations),
+                                             tag_gate)
+                cache.put(item['key'], item['record'])
+        if cache is not None:
+            cache.mark(item['hash'], item['ids'], item['key'], item['info'])
+        account(item)
+        return item
+
+    return [
+        ('decompress', stage_decompress),
+        ('parse', stage_parse),
+        ('apply', stage_apply),
+        ('serialize', stage_serialize),
+        ('compress', stage_compress),
+    ]
+
+
+def process_game_file_blocks(input_file, translation_file, output_dir, cache_dir=None, pipelined=False,
+                             report=None, tag_gate=None, release=None, coverage=None):
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    mode = 'конвейер' if pipelined else 'поблочно'
+    if cache_dir:
+        mode += ', с кэшем блоков'
+
+    log(f"\n{'='*50}")
+    log(f"Обработка файла ({mode}): {base_name}")
+    log(f"{'='*50}")
+
+    try:
+        translations = load_translation_layers(translation_file)
+        log(f"✅ Загружено переводов: {describe_layers(translations)}")
+
+        cache = BlockCache(cache_dir, base_name) if cache_dir else None
+        counters = {'hits': 0, 'rebuilt': 0, 'replaced': 0, 'total': 0, 'rejected': 0}
+        stages = make_block_stages(base_name, translations, cache, counters, tag_gate, coverage)
+        if report is not None:
+            stages = [(name, report.wrap_stage(base_name, name, func)) for name, func in stages]
+        source = ({'index': index, 'comp': comp_block} for index, comp_block in iter_container_blocks(input_file))
+
+        block_records = []
+        executor = run_pipeline if pipelined else run_sequential
+        executor(source, stages, lambda item: block_records.append(item['record']))
+
+        log(f"✅ Применено переводов: {counters['replaced']} из {counters['total']}")
+        if counters['rejected']:
+            log(f"🛡️  Сломаны теги, оставлен оригинал: {counters['rejected']}")
+        if cache is not None:
+            log(f"♻️  Блоков из кэша: {counters['hits']}, пересобрано: {counters['rebuilt']}")
+
+        output_file = os.path.join(output_dir, f"{base_name}")
+        archive_len = write_container(output_file, block_records, release)
+        if cache is not None:
+            cache.save()
+
+        log(f"✅ Сборка завершена. Упаковано: {len(block_records)} блоков")
+        log(f"✅ Размер архива: {archive_len} байт")
+        log(f"✅ Файл сохранен как: {output_file}")
+    except Exception as e:
+        log(f"❌ Ошибка поблочной сборки: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    log(f"\n✅ {base_name} готов!")
+    return True
+
+
+# --- Несколько вариантов сборки из одного разбора контейнера ---
+
+DEBUG_TAG_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz123456789"
+
+
+def debug_tag(id_val):
+    """Детерминированный тег из 4 символов (тот же алфавит, что у UUID мультитула)."""
+    digest = int.from_bytes(hashlib.sha1(id_val.encode('utf-8')).digest()[:8], 'little')
+    chars = []
+    for _ in range(4):
+        digest, rem = divmod(digest, len(DEBUG_TAG_CHARS))
+        chars.append(DEBUG_TAG_CHARS[rem])
+    return ''.join(chars)
+
+
+class DebugTaggedTranslations(Mapping):
+    """
+    Перевод для debug-сборки: к каждой непустой строке добавляется [тег], как в
+    debug_*.tsv мультитула. Теги берутся из *_uuid.tsv, а для ID без тега
+    вычисляются из самого ID.
+    """
+
+    def __init__(self, translations, tags=None):
+        self.translations = translations
+        self.tags = tags or {}
+
+    def __getitem__(self, id_val):
+        text = self.translations[id_val]
+        if not text.strip():
+            return text
+        return f"[{self.tags.get(id_val) or debug_tag(id_val)}]{text}"
+
+    def __contains__(self, id_val):
+        return id_val in self.translations
+
+    def __iter__(self):
+        return iter(self.translations)
+
+    def __len__(self):
+        return len(self.translations)
+
+
+def parse_variant_spec(spec):
+    """'NAME=layer1.tsv,layer2.tsv' → (NAME, [layer1.tsv, layer2.tsv])."""
+    name, sep, layers = spec.partition('=')
+    layers = [path for path in layers.split(',') if path]
+    if not sep or not name or not layers:
+        raise ValueError(f"Неверный вариант '{spec}', ожидается NAME=base.tsv[,beta.tsv...]")
+    return name, layers
+
+
+def make_variant_stages(base_name, variants, cache, counters, tag_gate=None, coverage=None):
+    """
+    Стадии сборки сразу нескольких вариантов. Блок распаковывается и разбирается
+    один раз; варианты с одинаковыми переводами для ID блока объединяются в группу,
+    и каждая группа сериализуется и сжимается один раз. Счётчики, покрытие, отчёт
+    о тегах и отметки кэша — только в последней стадии (см. make_block_stages).
+    """
+
+    def group_variants(ids):
+        groups = {}
+        for name, translations in variants.items():
+            subset_hash = translation_subset_hash(ids, translations)
+            groups.setdefault(subset_hash, {'variants': []})['variants'].append(name)
+        return groups
+
+    def count(item):
+        for name, translations in variants.items():
+            counters[name]['total'] += len(item['ids'])
+            counters[name]['replaced'] += sum(1 for id_val in item['ids'] if id_val.strip() in translations)
+        for group in item['groups'].values():
+            info = group['info']
+            for name in group['variants']:
+                counters[name]['replaced'] -= len(info['rejected'])
+                counters[name]['rejected'] += len(info['rejected'])
+                if coverage is not None and info['coverage'] is not None:
+                    coverage[name].add(base_name, item['index'], info['coverage'])
+            if tag_gate is not None:
+                tag_gate.add(base_name, info['rejected'], group['variants'])
+
+    def stage_decompress(item):
+        if cache is not None:
+            item['hash'] = cache.block_hash(item['comp'])
+            ids = cache.block_ids(item['hash'])
+            if ids is not None:
+                groups = group_variants(ids)
+                for subset_hash, group in groups.items():
+                    group['record'], group['info'] = cache.get(cache.make_key(item['hash'], subset_hash, tag_gate))
+                if all(group['record'] is not None for group in groups.values()):
+                    item['ids'] = ids
+                    item['groups'] = groups
+                    item['hit'] = True
+                    return item
+
+        item['data'] = decompress_block(item['comp'], item['index'])
+        return item if item['data'] is not None else None
+
+    def stage_parse(item):
+        if 'groups' not in item and item['index'] != 0:
+            parsed = parse_text_block(item['data'], f"{base_name}_{item['index']}.dat")
+            item['parsed'] = parsed if parsed is not None and parsed[2] else None
+        return item
+
+    def stage_apply(item):
+        if 'groups' in item:
+            return item
+        parsed = item.get('parsed')
+        item['ids'] = [id_val for _, id_val, _ in parsed[2]] if parsed is not None else []
+        item['groups'] = group_variants(item['ids'])
+        for group in item['groups'].values():
+            group['info'] = {'coverage': None, 'rejected': []}
+            if parsed is not None:
+                translations = variants[group['variants'][0]]
+                group['info']['coverage'] = new_coverage()
+                group['records'], _ = apply_block_translations(parsed[2], translations, tag_gate,
+                                                               group['info']['rejected'], group['info']['coverage'])
+        return item
+
+    def stage_serialize(item):
+        for group in item['groups'].values():
+            if group.get('record') is not None:
+                continue
+            if 'records' in group:
+                count_full, count_text, _ = item['parsed']
+                group['data'] = build_text_block(count_full, count_text, group.pop('records'))
+            else:
+                group['data'] = item['data']
+        return item
+
+    def stage_compress(item):
+        if item.get('hit'):
+            counters['hits'] += 1
+        for subset_hash, group in item['groups'].items():
+            if group.get('record') is None:
+                group['record'] = compress_block(group.pop('data'))
+                counters['rebuilt'] += 1
+                if cache is not None:
+                    cache.put(cache.make_key(item['hash'], subset_hash, tag_gate), group['record'])
+            if cache is not None:
+                cache.mark(item['hash'], item['ids'], cache.make_key(item['hash'], subset_hash, tag_gate),
+                           group['info'])
+        count(item)
+        return item
+
+    return [
+        ('decompress', stage_decompress),
+        ('parse', stage_parse),
+        ('apply', stage_apply),
+        ('serialize', stage_serialize),
+        ('compress', stage_compress),
+    ]
+
+
+def load_variants(variant_specs, debug_specs=(), debug_tags_file=None):
+    """Варианты сборки: имя -> перевод (ChainMap слоёв или debug-обёртка над ним)."""
+    tags = load_translations(debug_tags_file) if debug_tags_file else None
+    variants = {}
+    for spec, debug in [(s, False) for s in variant_specs] + [(s, True) for s in debug_specs]:
+        name, layers = parse_variant_spec(spec)
+        if name in variants:
+            raise ValueError(f"Вариант '{name}' указан дважды")
+        translations = load_translation_layers(layers)
+        variants[name] = DebugTaggedTranslations(translations, tags) if debug else translations
+    return variants
+
+
+def process_game_file_variants(input_file, variants, output_dir, cache_dir=None, pipelined=False, report=None,
+                               tag_gate=None, release=None, coverage=None):
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+
+    log(f"\n{'='*50}")
+    log(f"Обработка файла: {base_name}, вариантов: {len(variants)} ({', '.join(variants)})")
+    log(f"{'='*50}")
+
+    try:
+        cache = BlockCache(cache_dir, base_name) if cache_dir else None
+        counters = {'hits': 0, 'rebuilt': 0, 'blocks': 0}
+        for name in variants:
+            counters[name] = {'replaced': 0, 'total': 0, 'rejected': 0}
+
+        stages = make_variant_stages(base_name, variants, cache, counters, tag_gate, coverage)
+        if report is not None:
+            stages = [(name, report.wrap_stage(base_name, name, func)) for name, func in stages]
+        source = ({'index': index, 'comp': comp_block} for index, comp_block in iter_container_blocks(input_file))
+
+        block_records = {name: [] for name in variants}
+
+        def sink(item):
+            counters['blocks'] += 1
+            for group in item['groups'].values():
+                for name in group['variants']:
+                    block_records[name].append(group['record'])
+
+        executor = run_pipeline if pipelined else run_sequential
+        executor(source, stages, sink)
+
+        for name in variants:
+            variant_dir = os.path.join(output_dir, name)
+            os.makedirs(variant_dir, exist_ok=True)
+            output_file = os.path.join(variant_dir, base_name)
+            archive_len = write_container(output_file, block_records[name], release, f"{name}/{base_name}")
+            log(f"✅ [{name}] Применено переводов: {counters[name]['replaced']} из {counters[name]['total']}, "
+                f"размер {archive_len} байт → {output_file}")
+            if counters[name]['rejected']:
+                log(f"🛡️  [{name}] Сломаны теги, оставлен оригинал: {counters[name]['rejected']}")
+
+        if cache is not None:
+            cache.save()
+            log(f"♻️  Блоков из кэша: {counters['hits']}")
+
+        shared = counters['blocks'] * len(variants) - counters['rebuilt'] - counters['hits'] * len(variants)
+        log(f"✅ Блоков: {counters['blocks']}, сжато записей: {counters['rebuilt']}, общих между вариантами: {max(shared, 0)}")
+    except Exception as e:
+        log(f"❌ Ошибка сборки вариантов: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    log(f"\n✅ {base_name} готов!")
+    return True
+
+
+class ContainerState:
+    """Разобранный контейнер в памяти: исходные блоки, записи и индекс ID → блоки (для --watch)."""
+
+    def __init__(self, input_file):
+        self.input_file = input_file
+        self.base_name = os.path.splitext(os.path.basename(input_file))[0]
+        self.blocks = []
+        self.id_to_blocks = {}
+
+        blocks = read_container_blocks(input_file)
+        if blocks is None:
+            raise ValueError(f"неверный формат файла: {input_file}")
+
+        for index, comp_block in blocks:
+            data = decompress_block(comp_block, index)
+            if data is None:
+                continue
+            parsed = parse_text_block(data, f"{self.base_name}_{index}.dat") if index != 0 else None
+            if parsed is not None and not parsed[2]:
+                parsed = None
+
+            pos = len(self.blocks)
+            self.blocks.append({'index': index, 'data': data, 'parsed': parsed, 'record': None})
+            if parsed is not None:
+                for _, id_val, _ in parsed[2]:
+                    self.id_to_blocks.setdefault(id_val.strip(), set()).add(pos)
+
+    def rebuild(self, translations, changed_ids=None, tag_gate=None):
+        """
+        Пересобирает блоки с изменёнными ID (или все, если changed_ids=None).
+        Возвращает (число блоков, отклонённые проверкой тегов переводы).
+        """
+        if changed_ids is None:
+            positions = range(len(self.blocks))
+        else:
+            positions = set()
+            for id_val in changed_ids:
+                positions |= self.id_to_blocks.get(id_val, set())
+
+        rejected = []
+        for pos in positions:
+            block = self.blocks[pos]
+            data, _ = patch_block(block['data'], block['parsed'], translations, tag_gate, rejected)
+            block['record'] = compress_block(data)
+        return len(positions), rejected
+
+    def write(self, output_dir):
+        output_file = os.path.join(output_dir, self.base_name)
+        write_container(output_file, [block['record'] for block in self.blocks])
+        return output_file
+
+
+def diff_translations(old, new):
+    """ID, у которых перевод добавлен, удалён или изменён."""
+    return {id_val for id_val in old.keys() | new.keys() if old.get(id_val) != new.get(id_val)}
+
+
+def log_rejected(rejected, limit=20):
+    for entry in rejected[:limit]:
+        log(f"🛡️  {entry['id']}: сломаны теги ({', '.join(entry['codes'])}), оставлен оригинал")
+    if len(rejected) > limit:
+        log(f"🛡️  ... и ещё {len(rejected) - limit}")
+
+
+def watch_translation(input_files, translation_file, output_dir, interval=0.5, tag_gate=None):
+    log("👀 Режим наблюдения: разбор контейнеров...")
+    translation_files = [translation_file] if isinstance(translation_file, str) else list(translation_file)
+    translations = load_translation_layers(translation_files)
+    containers = []
+    for input_file in input_files:
+        state = ContainerState(input_file)
+        _, rejected = state.rebuild(translations, tag_gate=tag_gate)
+        output_file = state.write(output_dir)
+        containers.append(state)
+        log(f"✅ {state.base_name}: блоков {len(state.blocks)}, ID {len(state.id_to_blocks)} → {output_file}")
+        log_rejected(rejected)
+
+    def file_stamp():
+        return [(st.st_mtime_ns, st.st_size) for st in map(os.stat, translation_files)]
+
+    stamp = file_stamp()
+    log(f"👀 Слежу за {', '.join(translation_files)} (Ctrl+C — выход)")
+
+    try:
+        while True:
+            time.sleep(interval)
+            try:
+                new_stamp = file_stamp()
+            except OSError:
+                continue
+            if new_stamp == stamp:
+                continue
+
+            # Ждём, пока редактор допишет файл
+            time.sleep(interval)
+            try:
+                if file_stamp() != new_stamp:
+                    continue
+                started = time.perf_counter()
+                new_translations = load_translation_layers(translation_files)
+            except Exception as e:
+                log(f"⚠️  Не удалось прочитать перевод: {e}")
+                continue
+            stamp = new_stamp
+
+            changed = diff_translations(translations, new_translations)
+            translations = new_translations
+            if not changed:
+                log("ℹ️  Изменений в переводах нет")
+                continue
+
+            for state in containers:
+                rebuilt, rejected = state.rebuild(translations, changed, tag_gate)
+                log_rejected([entry for entry in rejected if entry['id'] in changed])
+                if not rebuilt:
+                    continue
+                try:
+                    state.write(output_dir)
+                except OSError as e:
+                    log(f"❌ Не удалось записать {state.base_name}: {e}")
+                    continue
+                log(f"🔁 {state.base_name}: пересобрано блоков {rebuilt}")
+
+            log(f"✅ Изменено ID: {len(changed)}, готово за {time.perf_counter() - started:.2f} с")
+    except KeyboardInterrupt:
+        log("👋 Наблюдение остановлено")
+    return 0
+
+
+def process_game_file(input_file, translation_file, work_dir, output_dir, cache_dir=None, pipelined=False,
+                      report=None, tag_gate=None, release=None, coverage=None):
+    if report is None:
+        report = BuildReport()
+    if cache_dir or pipelined:
+        return process_game_file_blocks(input_file, translation_file, output_dir, cache_dir, pipelined, report,
+                                        tag_gate, release, coverage)
+
     base_name = os.path.splitext(os.path.basename(input_file))[0]
     
     log(f"\n{'='*50}")
@@ -370,26 +1680,49 @@ def process_game_file(input_file, translation_file, work_dir, output_dir):
     
     log(f"\n[Распаковка] {base_name}...")
     extract_dir = os.path.join(work_dir, base_name)
-    if not extract_file(input_file, work_dir):
+    with report.measure(report.stage(base_name, 'extract')) as stats:
+        ok = extract_file(input_file, work_dir)
+        stats['bytes_in'] = file_size(input_file)
+        stats['bytes_out'] = dir_size(extract_dir)
+        stats['blocks'] = dir_count(extract_dir)
+    if not ok:
         return False
     
     log(f"\n[Извлечение] Текстов из {base_name}...")
-    csv_path = extract_text(extract_dir, work_dir, base_name)
+    with report.measure(report.stage(base_name, 'extract_text')) as stats:
+        csv_path = extract_text(extract_dir, work_dir, base_name, stats)
+        stats['bytes_in'] = dir_size(extract_dir)
+        stats['bytes_out'] = file_size(csv_path) if csv_path else 0
+        stats['blocks'] = dir_count(extract_dir)
     if not csv_path:
         return False
     
     log(f"\n[Перевод] Применяю перевод к {base_name}...")
     translated_csv = os.path.join(work_dir, f"TextExtractor_{base_name}_translated.csv")
-    if not apply_translation(translation_file, csv_path, translated_csv):
+    with report.measure(report.stage(base_name, 'apply')) as stats:
+        ok = apply_translation(translation_file, csv_path, translated_csv, stats, tag_gate, base_name, coverage)
+        stats['bytes_in'] = file_size(csv_path)
+        stats['bytes_out'] = file_size(translated_csv)
+    if not ok:
         return False
     
     log(f"\n[Запеканье] Текстов для {base_name}...")
-    if not pak_text(translated_csv, extract_dir):
+    with report.measure(report.stage(base_name, 'pak_text')) as stats:
+        ok = pak_text(translated_csv, extract_dir)
+        stats['bytes_in'] = file_size(translated_csv)
+        stats['bytes_out'] = dir_size(extract_dir)
+        stats['blocks'] = dir_count(extract_dir)
+    if not ok:
         return False
     
     log(f"\n[Упаковка] Финальная упаковка {base_name}...")
     output_file = os.path.join(output_dir, f"{base_name}")
-    if not pak_file(extract_dir, output_file):
+    with report.measure(report.stage(base_name, 'pack')) as stats:
+        ok = pak_file(extract_dir, output_file, release)
+        stats['bytes_in'] = dir_size(extract_dir)
+        stats['bytes_out'] = file_size(output_file)
+        stats['blocks'] = dir_count(extract_dir)
+    if not ok:
         return False
     
     log(f"\n✅ {base_name} готов!")
@@ -400,11 +1733,44 @@ def main():
     parser = argparse.ArgumentParser(description='WWM Translation Builder - Multi-file Pipeline')
     parser.add_argument('--input', '-i', nargs='+', required=True, 
                        help='Входные файлы игры (можно несколько: file1 file2)')
-    parser.add_argument('--translation', '-t', required=True, help='TSV перевод (ID\\tTranslation)')
+    parser.add_argument('--translation', '-t', nargs='+',
+                       help='TSV перевод (ID\\tTranslation); можно несколько слоёв: base beta user — поздние перекрывают ранние')
     parser.add_argument('--output', '-o', default='release/', help='Выходная папка для релиза (.bin файлы)')
     parser.add_argument('--workdir', '-w', default='work/', help='Рабочая папка (временные файлы)')
+    parser.add_argument('--cache-dir', default=None,
+                       help='Папка кэша готовых блоков: пересобираются только блоки с изменёнными переводами')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Потоковая сборка: чтение, zstd и разбор блоков идут параллельно в отдельных потоках')
+    parser.add_argument('--report', default=None,
+                       help='JSON-отчёт: время, CPU, байты, блоки/записи и пики памяти по контейнерам и стадиям')
+    parser.add_argument('--profile', default=None, help='Сохранить статистику cProfile всего запуска (.prof)')
+    parser.add_argument('--variant', action='append', default=[],
+                       help='Вариант сборки NAME=base.tsv[,beta.tsv...] (можно несколько); результат в --output/NAME/')
+    parser.add_argument('--debug-variant', action='append', default=[],
+                       help='Debug-вариант NAME=base.tsv[,...]: к строкам перевода добавляются теги [xxxx]')
+    parser.add_argument('--debug-tags', default=None,
+                       help='TSV ID\\tUUID с тегами для debug-вариантов (как *_uuid.tsv мультитула)')
+    parser.add_argument('--no-tag-gate', action='store_true',
+                       help='Не проверять теги при сборке (по умолчанию перевод со сломанными тегами заменяется оригиналом)')
+    parser.add_argument('--tag-report', default=None,
+                       help='JSON со списком переводов, отклонённых проверкой тегов')
+    parser.add_argument('--coverage', default=None,
+                       help='Компактный JSON покрытия перевода по контейнерам и блокам (для www/status.html)')
+    parser.add_argument('--zip', default=None,
+                       help='Сразу писать zip релиза (детерминированный) и манифест *_manifest.json с sha256 файлов')
+    parser.add_argument('--watch', action='store_true',
+                       help='Следить за файлом перевода и пересобирать изменённые блоки сразу в --output (например, папку locale игры)')
     
     args = parser.parse_args()
+    variant_mode = bool(args.variant or args.debug_variant)
+    if not args.translation and not variant_mode:
+        parser.error('нужен --translation или хотя бы один --variant')
+    if variant_mode and args.watch:
+        parser.error('--watch не поддерживает варианты сборки')
+    if args.watch and (args.zip or args.coverage):
+        parser.error('--zip и --coverage не поддерживаются в режиме --watch')
+    if args.no_tag_gate and args.tag_report:
+        parser.error('--tag-report нельзя использовать с --no-tag-gate')
     
     os.makedirs(args.output, exist_ok=True)
     os.makedirs(args.workdir, exist_ok=True)
@@ -419,14 +1785,98 @@ def main():
             log(f"❌ Файл не найден: {input_file}")
             return 1
     
-    if not os.path.exists(args.translation):
-        log(f"❌ Файл перевода не найден: {args.translation}")
-        return 1
+    translation_files = list(args.translation or [])
+    for spec in args.variant + args.debug_variant:
+        try:
+            translation_files.extend(parse_variant_spec(spec)[1])
+        except ValueError as e:
+            log(f"❌ {e}")
+            return 1
+    if args.debug_tags:
+        translation_files.append(args.debug_tags)
+
+    for translation_file in translation_files:
+        if not os.path.exists(translation_file):
+            log(f"❌ Файл перевода не найден: {translation_file}")
+            return 1
     
+    tag_gate = None if args.no_tag_gate else TagGate()
+
+    if args.watch:
+        return watch_translation(args.input, args.translation, args.output, tag_gate=tag_gate)
+
+    report = BuildReport(trace_memory=bool(args.report))
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    variants = None
+    if variant_mode:
+        variants = load_variants(args.variant, args.debug_variant, args.debug_tags)
+        if args.translation:
+            log("ℹ️  Заданы варианты сборки: --translation не используется")
+
+    input_files = args.input
+    release = None
+    if args.zip:
+        # Порядок записей в архиве не должен зависеть от порядка аргументов
+        input_files = sorted(args.input, key=os.path.basename)
+        release = ReleaseArchive(args.zip)
+
+    coverage = None
+    if args.coverage:
+        coverage = {name: CoverageReport() for name in variants} if variants is not None else {None: CoverageReport()}
+
     failed_files = []
-    for input_file in args.input:
-        if not process_game_file(input_file, args.translation, args.workdir, args.output):
+    for input_file in input_files:
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        with report.measure(report.container(base_name)) as stats:
+            if variants is not None:
+                ok = process_game_file_variants(input_file, variants, args.output,
+                                                args.cache_dir, args.pipeline, report, tag_gate, release,
+                                                coverage)
+            else:
+                ok = process_game_file(input_file, args.translation, args.workdir, args.output,
+                                       args.cache_dir, args.pipeline, report, tag_gate, release,
+                                       coverage[None] if coverage is not None else None)
+        stats['ok'] = ok
+        stats['bytes_in'] = file_size(input_file)
+        if not ok:
+            stats['bytes_out'] = 0
+        elif variants is not None:
+            stats['bytes_out'] = sum(file_size(os.path.join(args.output, name, base_name)) for name in variants)
+        else:
+            stats['bytes_out'] = file_size(os.path.join(args.output, base_name))
+        if not ok:
             failed_files.append(input_file)
+
+    if release is not None:
+        if failed_files:
+            release.abort()
+            log("❌ Архив релиза не создан: есть ошибки сборки")
+        else:
+            release.close()
+            log(f"🗜️  Архив релиза: {args.zip} (файлов: {len(release.files)}), манифест: {release.manifest_path}")
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        log(f"📈 Профиль cProfile сохранён: {args.profile}")
+
+    if args.report:
+        mode = 'pipeline' if args.pipeline else ('blocks' if args.cache_dir or variant_mode else 'files')
+        report.save(args.report, mode=mode, cache=bool(args.cache_dir),
+                    variants=list(variants) if variants is not None else None)
+        log(f"📈 Отчёт о сборке сохранён: {args.report}")
+
+    if coverage is not None:
+        CoverageReport.save(args.coverage, coverage)
+        log(f"📊 Покрытие перевода сохранено: {args.coverage}")
+
+    if args.tag_report:
+        tag_gate.save(args.tag_report)
+        log(f"🛡️  Отчёт проверки тегов сохранён: {args.tag_report} (отклонено: {len(tag_gate.rejected)})")
     
     log("\n" + "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     log("📊 ИТОГОВЫЙ ОТЧЁТ")
@@ -434,6 +1884,8 @@ def main():
     
     success_count = len(args.input) - len(failed_files)
     log(f"✅ Успешно обработано: {success_count}/{len(args.input)}")
+    if tag_gate is not None and tag_gate.rejected:
+        log(f"🛡️  Переводов со сломанными тегами (оставлен оригинал): {len(tag_gate.rejected)}")
     
     if failed_files:
         log(f"❌ Ошибки при обработке:")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетических контейнеров WWM (0xDEADBEEF) и файлов перевода к ним.
+
+Игровые файлы в репозиторий не коммитятся, поэтому для бенчмарков и проверок
+сборки нужен воспроизводимый вход: контейнер с нужным числом блоков, записей
+в блоке, распределением длины строк и долей кириллицы/китайского текста,
+плюс TSV перевода для части ID.
+
+ИСПОЛЬЗОВАНИЕ:
+  python wwm_synth.py --output ./synth --blocks 50 --records 400 \\
+      --length lognormal:40,0.8 --cyrillic 0.2 --chinese 0.5 --translated 0.7
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+
+import pyzstd
+
+
+LATIN = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+CYRILLIC = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+# Базовый диапазон CJK, как в has_chinese() мультитула
+CHINESE_START = 0x4E00
+CHINESE_END = 0x9FFF
+
+TAGS = ['#G', '#R', '#Y', '#ffc89c']
+
+
+def parse_length_dist(spec):
+    """'uniform:MIN,MAX' или 'lognormal:MEDIAN,SIGMA' → функция rng -> длина строки."""
+    kind, _, params = spec.partition(':')
+    values = [float(v) for v in params.split(',')] if params else []
+
+    if kind == 'uniform' and len(values) == 2:
+        low, high = int(values[0]), int(values[1])
+        return lambda rng: rng.randint(low, high)
+    if kind == 'lognormal' and len(values) == 2:
+        import math
+        mu, sigma = math.log(values[0]), values[1]
+        return lambda rng: max(1, min(4000, int(rng.lognormvariate(mu, sigma))))
+    raise ValueError(f"Неизвестное распределение длины: {spec}")
+
+
+def random_text(rng, length, cyrillic, chinese, tags):
+    roll = rng.random()
+    if roll < chinese:
+        chars = [chr(rng.randint(CHINESE_START, CHINESE_END)) for _ in range(length)]
+    else:
+        alphabet = CYRILLIC if roll < chinese + cyrillic else LATIN
+        chars = [' ' if rng.random() < 0.15 else rng.choice(alphabet) for _ in range(length)]
+    text = ''.join(chars)
+
+    if tags and rng.random() < tags:
+        tag = rng.choice(TAGS)
+        pos = rng.randint(0, len(text))
+        text = f"{text[:pos]}{tag}{text[pos:]}#E {{0}}"
+    return text
+
+
+def build_block(records, rng):
+    """Текстовый блок в формате игры: заголовок, управляющие байты, записи (ID, смещение, длина), тексты."""
+    count = len(records)
+    ctrl = bytes(rng.randrange(0, 0x80) for _ in range(count))
+    tail = b'\xFF' + (ctrl[:16] if count >= 16 else ctrl + b'\x80' * (16 - count))
+
+    start_id = 24 + count + 17
+    curr_text = start_id + count * 16
+    ids = []
+    texts = []
+    for i, (id_raw, text) in enumerate(records):
+        text_bytes = text.encode('utf-8')
+        offset_pos = start_id + i * 16 + 8
+        ids.append(id_raw + struct.pack('<II', curr_text - offset_pos, len(text_bytes)))
+        texts.append(text_bytes)
+        curr_text += len(text_bytes)
+
+    header = struct.pack('<IIII', count, 0, count, 0) + b'\xDC\x96\x58\x59\x00\x00\x00\x00'
+    return header + ctrl + tail + b''.join(ids) + b''.join(texts)
+
+
+def write_container(path, blocks):
+    """Контейнер 0xDEADBEEF: количество блоков, смещения начала каждого блока + конец архива, блоки zstd."""
+    block_records = []
+    for data in blocks:
+        comp = pyzstd.compress(data)
+        block_records.append(struct.pack('<BII', 4, len(comp), len(data)) + comp)
+
+    with open(path, 'wb') as f:
+        f.write(b'\xEF\xBE\xAD\xDE\x01\x00\x00\x00')
+        f.write(struct.pack('<I', len(block_records)))
+        offset = 0
+        for record in block_records:
+            f.write(struct.pack('<I', offset))
+            offset += len(record)
+        f.write(struct.pack('<I', offset))
+        for record in block_records:
+            f.write(record)
+
+
+def generate(output_dir, name='translate_words_map_en', blocks=20, records=200, length='lognormal:40,0.8',
+             cyrillic=0.1, chinese=0.5, tags=0.1, translated=0.7, seed=1):
+    """
+    Создаёт контейнер и TSV перевода. Возвращает (путь контейнера, путь TSV, количество записей).
+    """
+    rng = random.Random(seed)
+    length_fn = parse_length_dist(length)
+    os.makedirs(output_dir, exist_ok=True)
+
+    all_ids = []
+    block_datas = [rng.randbytes(256)]  # блок 0 — не текстовый, упаковывается как есть
+    for _ in range(blocks):
+        block_records = []
+        for _ in range(records):
+            id_raw = rng.randbytes(8)
+            all_ids.append(id_raw.hex())
+            block_records.append((id_raw, random_text(rng, length_fn(rng), cyrillic, chinese, tags)))
+        block_datas.append(build_block(block_records, rng))
+
+    container_path = os.path.join(output_dir, name)
+    write_container(container_path, block_datas)
+
+    tsv_path = os.path.join(output_dir, f"translation_{name}.tsv")
+    with open(tsv_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('ID\tOriginalText\n')
+        for id_val in all_ids:
+            if rng.random() < translated:
+                f.write(f"{id_val}\t{random_text(rng, length_fn(rng), 1.0, 0.0, tags)}\n")
+
+    return container_path, tsv_path, len(all_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических контейнеров WWM')
+    parser.add_argument('--output', '-o', required=True, help='Папка для контейнера и TSV')
+    parser.add_argument('--name', default='translate_words_map_en', help='Имя контейнера')
+    parser.add_argument('--blocks', type=int, default=20, help='Количество текстовых блоков')
+    parser.add_argument('--records', type=int, default=200, help='Записей в блоке')
+    parser.add_argument('--length', default='lognormal:40,0.8',
+                        help="Распределение длины строк: 'uniform:MIN,MAX' или 'lognormal:MEDIAN,SIGMA'")
+    parser.add_argument('--cyrillic', type=float, default=0.1, help='Доля строк на кириллице')
+    parser.add_argument('--chinese', type=float, default=0.5, help='Доля строк на китайском')
+    parser.add_argument('--tags', type=float, default=0.1, help='Доля строк с тегами #X...#E и {0}')
+    parser.add_argument('--translated', type=float, default=0.7, help='Доля ID с переводом в TSV')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    container_path, tsv_path, total = generate(
+        args.output, args.name, args.blocks, args.records, args.length,
+        args.cyrillic, args.chinese, args.tags, args.translated, args.seed,
+    )
+    print(f"✅ Контейнер: {container_path} ({total} записей)")
+    print(f"✅ Перевод: {tsv_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
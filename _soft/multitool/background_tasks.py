@@ -0,0 +1,206 @@
+"""
+Фоновые операции для GUI мультитула (tsv_transfer_gui.py, sort_master.py).
+
+Операция — обычная функция func(task), которая выполняется в QThread, пока
+окно остаётся отзывчивым. Через task она сообщает прогресс в строках
+(task.iterate) и сама проверяет отмену; результат передаётся обратно в поток
+интерфейса, в on_done.
+
+Откат при отмене: до записи операция не меняет ни файлы, ни документы в
+памяти, а запись выполняет через commit() — с этого момента отмена уже не
+действует. Отменённая операция ничего не оставляет.
+"""
+
+import threading
+
+from PyQt5 import QtWidgets, QtCore
+
+
+class TaskCancelled(Exception):
+    """Операция отменена пользователем."""
+
+
+class Task:
+    """Связь выполняемой операции с окном: этапы, прогресс, отмена, лог."""
+
+    # Как часто (в строках) сообщать прогресс и проверять отмену
+    STEP = 1000
+
+    def __init__(self, thread):
+        self._thread = thread
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._committing = False
+
+    def cancel(self):
+        """Запрос отмены из потока интерфейса. False — операция уже записывает результат."""
+        with self._lock:
+            if self._committing:
+                return False
+            self._cancelled = True
+            return True
+
+    def check(self):
+        """Прерывает операцию (TaskCancelled), если запрошена отмена."""
+        if self._cancelled:
+            raise TaskCancelled()
+
+    def stage(self, label, total=0):
+        """Новый этап операции; total — число строк (0 — без шкалы)."""
+        self.check()
+        self._thread.stage_signal.emit(label, total)
+
+    def iterate(self, items, label):
+        """Перебор items этапом label с прогрессом и проверкой отмены каждые STEP строк."""
+        total = len(items)
+        self.stage(label, total)
+        step = self.STEP
+        for i, item in enumerate(items):
+            if i % step == 0:
+                self.check()
+                self._thread.progress_signal.emit(i)
+            yield item
+        self._thread.progress_signal.emit(total)
+
+    def log(self, text):
+        self._thread.log_signal.emit(text)
+
+    def commit(self, label, func, *args):
+        """Запись результата: последняя проверка отмены, дальше операция доводится до конца."""
+        with self._lock:
+            if self._cancelled:
+                raise TaskCancelled()
+            self._committing = True
+        self._thread.stage_signal.emit(label, 0)
+        self._thread.committing_signal.emit()
+        return func(*args)
+
+
+def iterate(task, items, label):
+    """task.iterate, если операция фоновая; иначе items как есть."""
+    return items if task is None else task.iterate(items, label)
+
+
+def commit(task, label, func, *args):
+    """task.commit, если операция фоновая; иначе просто func(*args)."""
+    return func(*args) if task is None else task.commit(label, func, *args)
+
+
+class TaskThread(QtCore.QThread):
+    """Поток одной операции. finished_signal: (результат, исключение или None)."""
+
+    stage_signal = QtCore.pyqtSignal(str, int)
+    progress_signal = QtCore.pyqtSignal(int)
+    log_signal = QtCore.pyqtSignal(str)
+    committing_signal = QtCore.pyqtSignal()
+    finished_signal = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+        self.task = Task(self)
+
+    def run(self):
+        result = None
+        error = None
+        try:
+            result = self.func(self.task)
+        except Exception as e:
+            error = e
+        self.finished_signal.emit(result, error)
+
+
+class TaskRunner(QtCore.QObject):
+    """
+    Запускает операции окна по одной и показывает их ход: надпись этапа,
+    шкала прогресса в строках и кнопка «Отмена» (panel — добавить в layout окна).
+    task_finished — после каждой операции, в том числе отменённой или с ошибкой.
+    """
+
+    task_finished = QtCore.pyqtSignal()
+
+    def __init__(self, window, log):
+        super().__init__(window)
+        self.window = window
+        self.log = log
+        self.thread = None
+        self.description = ""
+        self.on_done = None
+        self.error_log = ""
+
+        self.panel = QtWidgets.QWidget()
+        panel_layout = QtWidgets.QHBoxLayout(self.panel)
+        panel_layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QtWidgets.QLabel()
+        self.progress = QtWidgets.QProgressBar()
+        self.progress.setFormat("%v / %m")
+        self.btn_cancel = QtWidgets.QPushButton("Отмена")
+        self.btn_cancel.clicked.connect(self.cancel)
+        panel_layout.addWidget(self.label)
+        panel_layout.addWidget(self.progress, 1)
+        panel_layout.addWidget(self.btn_cancel)
+        self.panel.hide()
+
+    def is_running(self):
+        return self.thread is not None
+
+    def start(self, description, func, on_done, error_log):
+        """
+        Запуск func(task) в фоне. on_done(результат) вызывается в потоке интерфейса;
+        ошибка показывается окном и пишется в лог как «{error_log}: {ошибка}».
+        Возвращает False, если уже выполняется другая операция.
+        """
+        if self.thread is not None:
+            QtWidgets.QMessageBox.warning(
+                self.window,
+                "Операция",
+                f"Ещё выполняется: {self.description}. Дождитесь завершения или отмените.",
+            )
+            return False
+
+        self.description = description
+        self.on_done = on_done
+        self.error_log = error_log
+        self.thread = TaskThread(func)
+        self.thread.stage_signal.connect(self._on_stage)
+        self.thread.progress_signal.connect(self.progress.setValue)
+        self.thread.log_signal.connect(self.log)
+        self.thread.committing_signal.connect(lambda: self.btn_cancel.setEnabled(False))
+        self.thread.finished_signal.connect(self._on_finished)
+
+        self.label.setText(description)
+        self.progress.setRange(0, 0)
+        self.btn_cancel.setEnabled(True)
+        self.panel.show()
+        self.thread.start()
+        return True
+
+    def cancel(self):
+        if self.thread is not None and self.thread.task.cancel():
+            self.btn_cancel.setEnabled(False)
+            self.label.setText(f"{self.description}: отмена...")
+
+    def shutdown(self):
+        """При закрытии окна: отменить операцию и дождаться потока (начатая запись завершится)."""
+        if self.thread is not None:
+            self.thread.task.cancel()
+            self.thread.wait()
+
+    def _on_stage(self, label, total):
+        self.label.setText(f"{self.description}: {label}")
+        self.progress.setRange(0, total)
+        self.progress.setValue(0)
+
+    def _on_finished(self, result, error):
+        self.thread.wait()
+        self.thread = None
+        self.panel.hide()
+
+        if isinstance(error, TaskCancelled):
+            self.log(f"{self.description}: отменено, файлы не изменены.")
+        elif error is not None:
+            QtWidgets.QMessageBox.critical(self.window, "Ошибка", str(error))
+            self.log(f"{self.error_log}: {error}")
+        else:
+            self.on_done(result)
+        self.task_finished.emit()
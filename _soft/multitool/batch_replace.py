@@ -0,0 +1,241 @@
+"""
+Пакетная замена фрагментов в OriginalText файла B по файлу правил (tsv_transfer_gui.py).
+
+Формат файла правил (UTF-8, по правилу на строку, поля через табуляцию):
+
+    найти<TAB>заменить[<TAB>параметры]
+
+Параметры через запятую или пробел:
+- own    — фрагмент не внутри слова: до и после него нет буквы или цифры;
+- nocase — без учёта регистра.
+Пустые строки и комментарии — строки без табуляции, начинающиеся с #, —
+пропускаются (строка с табуляцией — всегда правило: «#G<TAB>#Y» заменяет тег).
+Замена — обычный текст, без шаблонов.
+
+Правила применяются одновременно, строка просматривается слева направо:
+заменённый текст повторно не просматривается, совпадения не пересекаются;
+в одной позиции берётся самый длинный подходящий фрагмент, при одинаковой
+длине — правило выше в файле.
+
+Позиции, где может начинаться фрагмент, ищет одно регулярное выражение из всех
+правил в виде префиксного дерева (общие начала проверяются один раз). Выбор
+правила в найденной позиции — не по выражению: альтернатива в re берёт первую
+подошедшую ветвь, а не самую длинную. Из позиции проходится дерево фрагментов
+без учёта регистра, собираются все правила, которые в ней кончаются, и каждое
+сверяется точно (регистр, own).
+"""
+
+import re
+
+from background_tasks import iterate
+
+
+OPTIONS = ("own", "nocase")
+WORD_CHAR = re.compile(r'\w')
+# Ключ узла дерева для концов фрагментов (атомы выражения — всегда строки)
+END = None
+
+
+class ReplaceRule:
+    def __init__(self, find, replace, own=False, nocase=False, line=0):
+        self.find = find
+        self.replace = replace
+        self.own = own
+        self.nocase = nocase
+        self.line = line  # номер строки в файле правил
+        # Допустимые символы по позициям фрагмента (nocase): для accepts
+        self._variants = [set(_case_variants(ch, True)) | {ch} for ch in find] if nocase else None
+
+    def options(self):
+        return ", ".join(name for name in OPTIONS if getattr(self, name))
+
+    def atom_paths(self):
+        """
+        Пути правила в дереве выражения — элементы по символам фрагмента.
+        Первый элемент всегда один символ (у nocase — свой путь на каждый
+        вариант регистра): когда все ветви корня начинаются с символа, re
+        пропускает неподходящие позиции строки, не перебирая ветви.
+        """
+        tail = [_char_atom(ch, self.nocase) for ch in self.find[1:]]
+        if self.own:
+            # «Перед фрагментом нет буквы», проверенное после первого символа
+            tail.insert(0, r'(?<!\w[\s\S])')
+        return [[re.escape(first)] + tail for first in _case_variants(self.find[0], self.nocase)]
+
+    def accepts(self, text, start, end):
+        """Подходит ли правило к тексту text[start:end] (длина уже равна длине фрагмента)."""
+        if self.nocase:
+            for ch, variants in zip(text[start:end], self._variants):
+                if ch not in variants:
+                    return False
+        elif text[start:end] != self.find:
+            return False
+        if self.own and (WORD_CHAR.match(text, start - 1) if start else False):
+            return False
+        if self.own and WORD_CHAR.match(text, end):
+            return False
+        return True
+
+
+def _case_variants(ch, nocase):
+    if not nocase:
+        return [ch]
+    # Только односимвольные варианты: у 'ß'.upper() и подобных длина меняется
+    return sorted(v for v in {ch, ch.lower(), ch.upper()} if len(v) == 1)
+
+
+def _fold(ch):
+    # Ключ символа в дереве фрагментов: все варианты регистра из _case_variants
+    # сводятся к одному ключу (у 'ı', 'ſ', 'ς' lower() сам по себе этого не даёт)
+    key = _FOLDED.get(ch)
+    if key is None:
+        key = _FOLDED[ch] = ch.upper().lower()
+    return key
+
+
+_FOLDED = {}  # кэш _fold: символов в текстах немного, а вызовов — на каждый символ совпадений
+
+
+def _char_atom(ch, nocase):
+    variants = _case_variants(ch, nocase)
+    if len(variants) == 1:
+        return re.escape(ch)
+    return '[' + ''.join(re.escape(v) for v in variants) + ']'
+
+
+def load_replace_rules(path):
+    """Читает файл правил. Ошибка формата — ValueError с номером строки."""
+    rules = []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or ("\t" not in line and line.lstrip().startswith("#")):
+                continue
+            parts = line.split("\t")
+            if len(parts) < 2 or len(parts) > 3:
+                raise ValueError(
+                    f"{path}, строка {line_no}: нужно «найти<TAB>заменить[<TAB>параметры]»"
+                )
+            find, replace = parts[0], parts[1]
+            if not find:
+                raise ValueError(f"{path}, строка {line_no}: пустой фрагмент для поиска")
+            options = set(re.split(r"[,\s]+", parts[2].strip())) - {""} if len(parts) == 3 else set()
+            unknown = options - set(OPTIONS)
+            if unknown:
+                raise ValueError(
+                    f"{path}, строка {line_no}: неизвестные параметры {', '.join(sorted(unknown))} "
+                    f"(допустимы: {', '.join(OPTIONS)})"
+                )
+            rules.append(ReplaceRule(find, replace, "own" in options, "nocase" in options, line_no))
+    return rules
+
+
+def _trie_pattern(node):
+    parts = [atom + _trie_pattern(child) for atom, child in sorted(node.items(), key=_node_order)
+             if atom is not END]
+    # Концы фрагментов — после продолжений: в одной позиции сначала пробуется более длинный
+    parts.extend(sorted(node.get(END, ()), reverse=True))
+    if len(parts) == 1:
+        return parts[0]
+    return '(?:' + '|'.join(parts) + ')'
+
+
+def _node_order(item):
+    return '' if item[0] is END else item[0]
+
+
+class BatchReplacer:
+    """
+    Набор правил, собранный в одно выражение. apply() заменяет в тексте все
+    совпадения и ведёт счёт: hits — замен по каждому правилу, rows_hit — строк.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.hits = [0] * len(rules)
+        self.rows_hit = [0] * len(rules)
+
+        trie = {}
+        self._folded = {}  # дерево фрагментов по _fold(символ); END -> номера правил в порядке файла
+        for number, rule in enumerate(rules):
+            for path in rule.atom_paths():
+                node = trie
+                for atom in path:
+                    node = node.setdefault(atom, {})
+                node.setdefault(END, set()).add(r'(?!\w)' if rule.own else '')
+            node = self._folded
+            for ch in rule.find:
+                node = node.setdefault(_fold(ch), {})
+            node.setdefault(END, []).append(number)
+        # Выражение только находит позиции: совпадение в позиции есть, если есть подходящее правило
+        self._pattern = re.compile(_trie_pattern(trie)) if rules else None
+
+    def _longest(self, text, start):
+        """(номер правила, конец) самого длинного подходящего фрагмента в start, либо (None, start)."""
+        best, best_end = None, start
+        node = self._folded
+        end = start
+        length = len(text)
+        folded = _FOLDED
+        while end < length:
+            ch = text[end]
+            node = node.get(folded.get(ch) or _fold(ch))
+            if node is None:
+                break
+            end += 1
+            # Правила одной длины — в порядке файла, первое подошедшее; длиннее — перекрывает
+            for number in node.get(END, ()):
+                if self.rules[number].accepts(text, start, end):
+                    best, best_end = number, end
+                    break
+        return best, best_end
+
+    def apply(self, text):
+        """Текст после замен (тот же объект, если ничего не заменено)."""
+        if self._pattern is None:
+            return text
+        search = self._pattern.search
+        pieces = []
+        matched = set()
+        pos = last = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                break
+            start = match.start()
+            number, end = self._longest(text, start)
+            if number is None:
+                # Выражение шире правил (варианты регистра) — ищем со следующего символа
+                pos = start + 1
+                continue
+            pieces.append(text[last:start])
+            pieces.append(self.rules[number].replace)
+            self.hits[number] += 1
+            matched.add(number)
+            pos = last = end
+        if not matched:
+            return text
+        pieces.append(text[last:])
+        for number in matched:
+            self.rows_hit[number] += 1
+        return ''.join(pieces)
+
+
+def replace_in_rows(rows, id_idx, text_idx, replacer, task=None):
+    """
+    Применяет правила к OriginalText строк одним проходом.
+    Возвращает [(позиция, строка, новая строка)] для строк, где текст изменился;
+    новые строки — копии, исходные не меняются.
+    """
+    min_len = max(id_idx, text_idx) + 1
+    changes = []
+    for i, row in enumerate(iterate(task, rows, "Замена по правилам")):
+        if len(row) < min_len:
+            continue
+        text = row[text_idx]
+        new_text = replacer.apply(text)
+        if new_text != text:
+            new_row = list(row)
+            new_row[text_idx] = new_text
+            changes.append((i, row, new_row))
+    return changes
@@ -0,0 +1,103 @@
+"""
+Буферизованный лог окон мультитула (tsv_transfer_gui.py, sort_master.py).
+
+Вывод в QTextEdit по строке (append и прокрутка на каждую) на десятках тысяч
+строк занимает больше времени, чем сама операция. LogSink копит сообщения из
+любого потока и раз в FLUSH_INTERVAL мс выводит накопленное одной вставкой.
+В окне остаются последние MAX_VISIBLE строк, в памяти — последние MAX_RETAINED
+(кольцевой буфер); их можно сохранить в файл (save_as).
+"""
+
+import threading
+from collections import deque
+
+from PyQt5 import QtWidgets, QtCore
+from PyQt5.QtGui import QTextCursor
+
+
+class LogSink(QtCore.QObject):
+    """Лог окна поверх text_edit: write() — из любого потока, вывод — пачками по таймеру."""
+
+    FLUSH_INTERVAL = 100  # мс
+    MAX_VISIBLE = 5000
+    MAX_RETAINED = 200000
+
+    # write() из другого потока: таймер запускается в потоке окна
+    _wake = QtCore.pyqtSignal()
+
+    def __init__(self, text_edit):
+        super().__init__(text_edit)
+        self.text_edit = text_edit
+        text_edit.document().setMaximumBlockCount(self.MAX_VISIBLE)
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+        self._lines = deque(maxlen=self.MAX_RETAINED)
+        self._dropped = 0  # строк, вытесненных из кольцевого буфера
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._timer.start)
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    def flush(self):
+        """Выводит накопленные сообщения (вызывается таймером в потоке окна)."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+        if not batch:
+            return
+        overflow = len(self._lines) + len(batch) - self.MAX_RETAINED
+        if overflow > 0:
+            self._dropped += overflow
+        self._lines.extend(batch)
+
+        # Последние MAX_VISIBLE: остальное документ всё равно отбросит
+        text = "\n".join(batch[-self.MAX_VISIBLE:])
+        bar = self.text_edit.verticalScrollBar()
+        at_end = bar.value() >= bar.maximum() - 4
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        # Обычный текст, без разбора как HTML (теги-ссылки <...> в сообщениях)
+        cursor.insertText(text if self.text_edit.document().isEmpty() else "\n" + text)
+        if at_end:
+            bar.setValue(bar.maximum())
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+        self._lines.clear()
+        self._dropped = 0
+        self.text_edit.clear()
+
+    def save(self, path):
+        """Записывает сохранённые строки лога в файл (UTF-8)."""
+        self.flush()
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            if self._dropped:
+                f.write(f"... (первые строки лога не сохранены: {self._dropped})\n")
+            for line in self._lines:
+                f.write(line)
+                f.write("\n")
+
+    def save_as(self, parent):
+        """Диалог выбора файла и запись лога; ошибка — окном."""
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            parent, "Сохранить лог", "log.txt", "Text files (*.txt);;All files (*.*)"
+        )
+        if not path:
+            return
+        try:
+            self.save(path)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(parent, "Ошибка", f"Не удалось сохранить лог: {e}")
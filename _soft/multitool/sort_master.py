@@ -5,7 +5,9 @@ import sys
 from typing import List, Tuple
 
 from PyQt5 import QtWidgets, QtCore
-from PyQt5.QtGui import QTextCursor
+
+from background_tasks import TaskRunner, iterate
+from log_sink import LogSink
 
 
 # --- TSV helpers ---
@@ -125,17 +127,18 @@ def sort_rows(
 
 
 def build_source_index(
-    rows: List[List[str]], text_idx: int, id_idx: int, rules: List[SortRule]
+    rows: List[List[str]], text_idx: int, id_idx: int, rules: List[SortRule], task=None
 ) -> Tuple[dict, int]:
     """
     Строит индекс по ID из исходного файла:
     id -> (rank, score, text_lower)
     rank — позиция после сортировки ключом (-score, text_lower, id)
+    task — фоновая операция (background_tasks.Task) для прогресса и отмены.
     Возвращает (index, matched_count)
     """
     prepared = []
     matched = 0
-    for row in rows:
+    for row in iterate(task, rows, "Правила по исходному файлу"):
         text = row[text_idx] if len(row) > text_idx else ""
         rid = row[id_idx] if len(row) > id_idx else ""
         score, excluded = build_score(text, rules)
@@ -224,11 +227,27 @@ class MainWindow(QtWidgets.QMainWindow):
         btn_layout.addWidget(self.btn_filter_sort)
         layout.addLayout(btn_layout)
 
-        # Лог
+        # Ход фоновой операции (прогресс и отмена)
+        self.tasks = TaskRunner(self, self.append_log)
+        layout.addWidget(self.tasks.panel)
+
+        # Лог: выводится пачками по таймеру (log_sink.py)
         self.log = QtWidgets.QTextEdit()
         self.log.setReadOnly(True)
+        self.log_sink = LogSink(self.log)
         layout.addWidget(self.log)
 
+        log_btn_layout = QtWidgets.QHBoxLayout()
+        log_btn_layout.addStretch(1)
+        self.btn_save_log = QtWidgets.QPushButton("Сохранить лог...")
+        self.btn_save_log.clicked.connect(lambda: self.log_sink.save_as(self))
+        log_btn_layout.addWidget(self.btn_save_log)
+        layout.addLayout(log_btn_layout)
+
+    def closeEvent(self, event):
+        self.tasks.shutdown()
+        super().closeEvent(event)
+
     # --- browse helpers ---
     def browse_a(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -265,8 +284,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
     # --- log helper ---
     def append_log(self, text: str):
-        self.log.append(text)
-        self.log.moveCursor(QTextCursor.End)
+        self.log_sink.write(text)
 
     # --- core actions ---
     def get_path_by_key(self, key: str) -> str:
@@ -322,28 +340,32 @@ class MainWindow(QtWidgets.QMainWindow):
     def run_sort(self, filter_only: bool):
         try:
             src, dst, sort_path = self.ensure_paths()
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
+            self.append_log(f"Ошибка: {e}")
+            return
 
+        def work(task):
             # Загружаем исходный файл для построения индекса
+            task.stage("Чтение исходного файла")
             header_src, rows_src = load_tsv(src)
             if not rows_src:
-                QtWidgets.QMessageBox.information(self, "Сортировка", "Исходный файл пуст или без данных.")
-                return
+                return "information", "Сортировка", "Исходный файл пуст или без данных."
 
             id_idx_src = find_column_index(header_src, "ID", 0)
             text_idx_src = find_column_index(header_src, "OriginalText", 1 if len(header_src) > 1 else 0)
 
             rules = load_sort_rules(sort_path)
             if not rules:
-                QtWidgets.QMessageBox.warning(self, "Сортировка", "В sort.txt нет правил.")
-                return
+                return "warning", "Сортировка", "В sort.txt нет правил."
 
-            src_index, matched_src = build_source_index(rows_src, text_idx_src, id_idx_src, rules)
+            src_index, matched_src = build_source_index(rows_src, text_idx_src, id_idx_src, rules, task)
 
             # Загружаем целевой файл, который будем сортировать/фильтровать
+            task.stage("Чтение целевого файла")
             header_dst, rows_dst = load_tsv(dst)
             if not rows_dst:
-                QtWidgets.QMessageBox.information(self, "Сортировка", "Целевой файл пуст или без данных.")
-                return
+                return "information", "Сортировка", "Целевой файл пуст или без данных."
 
             id_idx_dst = find_column_index(header_dst, "ID", 0)
             text_idx_dst = find_column_index(header_dst, "OriginalText", 1 if len(header_dst) > 1 else 0)
@@ -353,7 +375,7 @@ class MainWindow(QtWidgets.QMainWindow):
             matched_dst = 0
             big_rank = len(rows_dst) + len(src_index) + 10  # для не найденных ID
 
-            for row in rows_dst:
+            for row in task.iterate(rows_dst, "Ранжирование целевого файла"):
                 rid = row[id_idx_dst] if len(row) > id_idx_dst else ""
                 text = row[text_idx_dst] if len(row) > text_idx_dst else ""
                 if rid in src_index:
@@ -371,29 +393,35 @@ class MainWindow(QtWidgets.QMainWindow):
                 kept += 1
 
             if filter_only and kept == 0:
-                QtWidgets.QMessageBox.information(
-                    self, "Результат", "Совпадений по словам из sort.txt не найдено."
-                )
-                return
+                return "information", "Результат", "Совпадений по словам из sort.txt не найдено."
 
+            task.stage("Сортировка")
             prepared.sort(key=lambda x: x[0])
             sorted_rows = [row for _, row in prepared]
 
             out_path = self.make_output_path(dst)
-            save_tsv(out_path, header_dst, sorted_rows)
+            task.commit("Сохранение", save_tsv, out_path, header_dst, sorted_rows)
 
-            msg = (
+            return "done", "Сортировка", (
                 f"Готово. Исходный файл: {os.path.basename(src)}. "
                 f"Целевой файл: {os.path.basename(dst)}. "
                 f"Всего строк в целевом: {len(rows_dst)}, сохранено: {len(sorted_rows)}. "
                 f"Совпало по словам в исходнике: {matched_src}, совпало ID в целевом: {matched_dst}. "
                 f"Итоговый файл: {out_path}"
             )
-            self.append_log(msg)
-            QtWidgets.QMessageBox.information(self, "Сортировка", msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка: {e}")
+
+        def done(result):
+            # Итог операции: ("done" | "information" | "warning", заголовок окна, сообщение)
+            kind, title, msg = result
+            if kind == "warning":
+                QtWidgets.QMessageBox.warning(self, title, msg)
+                return
+            if kind == "done":
+                self.append_log(msg)
+            QtWidgets.QMessageBox.information(self, title, msg)
+
+        description = "Вырезка по словам" if filter_only else "Полная сортировка"
+        self.tasks.start(description, work, done, "Ошибка")
 
 
 def main():
@@ -0,0 +1,98 @@
+"""
+Проверка batch_replace.BatchReplacer по эталону перебором (pytest).
+
+Эталон идёт по строке слева направо и в каждой позиции пробует все правила:
+берётся самый длинный подходящий фрагмент, при одинаковой длине — правило
+выше в файле; без совпадения — один символ дальше.
+"""
+
+import random
+import re
+
+import pytest
+
+from batch_replace import BatchReplacer, ReplaceRule
+
+
+def reference(rules, text):
+    hits = [0] * len(rules)
+    pieces = []
+    pos = 0
+    while pos < len(text):
+        best = None
+        for number, rule in enumerate(rules):
+            end = pos + len(rule.find)
+            piece = text[pos:end]
+            if len(piece) < len(rule.find):
+                continue
+            if rule.nocase:
+                if piece.lower() != rule.find.lower():
+                    continue
+            elif piece != rule.find:
+                continue
+            if rule.own and (re.match(r'\w', text[pos - 1]) if pos else False):
+                continue
+            if rule.own and re.match(r'\w', text[end:end + 1]):
+                continue
+            if best is None or len(rule.find) > len(rules[best].find):
+                best = number
+        if best is None:
+            pieces.append(text[pos])
+            pos += 1
+        else:
+            pieces.append(rules[best].replace)
+            hits[best] += 1
+            pos += len(rules[best].find)
+    return ''.join(pieces), hits
+
+
+def numbered(rules):
+    # Замена — номер правила: по результату видно, какое правило сработало
+    for number, rule in enumerate(rules):
+        rule.replace = f"<{number}>"
+    return rules
+
+
+@pytest.mark.parametrize("rules, text", [
+    # Правило без учёта регистра и более длинное с учётом
+    ([ReplaceRule("aa", "", nocase=True), ReplaceRule("aab", "")], "aab"),
+    # own и более длинное без own
+    ([ReplaceRule("a", "", own=True), ReplaceRule("a.B", "")], "a.B"),
+    # Только без учёта регистра
+    ([ReplaceRule("B.", "", nocase=True), ReplaceRule("b", "", own=True, nocase=True)], "B.."),
+    # При одинаковой длине — правило выше в файле
+    ([ReplaceRule("ab", "", nocase=True), ReplaceRule("AB", "")], "AB ab"),
+    # Теги и знаки
+    ([ReplaceRule("#G", ""), ReplaceRule("#G#E", "")], "#G#E #G #Gx"),
+])
+def test_longest_rule_wins(rules, text):
+    rules = numbered(rules)
+    replacer = BatchReplacer(rules)
+    assert (replacer.apply(text), replacer.hits) == reference(rules, text)
+
+
+def test_matches_reference_on_random_rules():
+    rng = random.Random(48)
+    alphabet = "aAbB.ы Ы_1#"
+    for _ in range(3000):
+        rules = numbered([
+            ReplaceRule(
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))),
+                "",
+                own=rng.random() < 0.3,
+                nocase=rng.random() < 0.4,
+            )
+            for _ in range(rng.randint(1, 6))
+        ])
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        replacer = BatchReplacer(rules)
+        assert (replacer.apply(text), replacer.hits) == reference(rules, text), (
+            [(r.find, r.own, r.nocase) for r in rules], text
+        )
+
+
+def test_unchanged_text_is_same_object():
+    replacer = BatchReplacer([ReplaceRule("нет", "да")])
+    text = "ничего"
+    assert replacer.apply(text) is text
+    assert replacer.rows_hit == [0]
@@ -0,0 +1,128 @@
+"""
+Индекс текста файла B для операций по фрагменту (tsv_transfer_gui.py).
+
+Двухуровневый n-граммный индекс: триграмма -> слова словаря, слово -> строки.
+Для фрагмента берётся самая длинная его часть из букв и цифр (не короче трёх
+символов): по триграммам находятся слова, в которые она входит, и проверка
+`fragment in text` выполняется только для строк с этими словами. Фрагменты
+без такой части (знаки, теги, одна-две буквы) ищутся обычным перебором.
+
+Строки хранятся под порядковыми номерами, а не позициями в файле. После
+сохранения документа индексируются только новые строки: строка, оставшаяся
+тем же объектом списка, не переиндексируется (строки документа не меняются
+на месте — изменённая строка всегда новый список). Номера удалённых строк
+отбрасываются при поиске; когда их становится больше, чем живых, индекс
+строится заново.
+"""
+
+import re
+
+from background_tasks import iterate
+
+
+WORD_PATTERN = re.compile(r'\w+')
+GRAM_SIZE = 3
+
+
+def search_piece(fragment):
+    """Часть фрагмента для поиска по индексу, либо None (тогда нужен перебор)."""
+    piece = max(WORD_PATTERN.findall(fragment), key=len, default='')
+    return piece if len(piece) >= GRAM_SIZE else None
+
+
+class TextIndex:
+    """Индекс колонки text_idx строк документа; sync() обновляет его под текущую версию строк."""
+
+    def __init__(self, text_idx):
+        self.text_idx = text_idx
+        self.version = None
+        self._reset()
+
+    def _reset(self):
+        self._word_rows = {}   # слово -> номера строк
+        self._gram_words = {}  # триграмма -> слова
+        self._rows = {}        # номер -> строка (только строки текущей версии)
+        self._serial_of = {}   # id(строки) -> номер
+        self._position = {}    # номер -> позиция строки в документе
+        self._next_serial = 0
+        self._dead = 0
+
+    def sync(self, rows, version, task=None):
+        """Приводит индекс к строкам rows (версия документа version)."""
+        if version == self.version:
+            return
+        if self._dead > len(self._rows):
+            self._reset()
+
+        old_rows = self._rows
+        old_serial_of = self._serial_of
+        live = {}
+        serial_of = {}
+        position = {}
+        added = 0
+        for pos, row in enumerate(iterate(task, rows, "Индекс текста B")):
+            serial = old_serial_of.get(id(row))
+            if serial is None or serial in live or old_rows.get(serial) is not row:
+                serial = self._next_serial
+                self._next_serial += 1
+                self._add_row(serial, row)
+                added += 1
+            live[serial] = row
+            serial_of[id(row)] = serial
+            position[serial] = pos
+
+        self._dead += len(old_rows) - (len(live) - added)
+        self._rows = live
+        self._serial_of = serial_of
+        self._position = position
+        self.version = version
+
+    def _add_row(self, serial, row):
+        text = row[self.text_idx] if len(row) > self.text_idx else ''
+        word_rows = self._word_rows
+        for word in set(WORD_PATTERN.findall(text)):
+            serials = word_rows.get(word)
+            if serials is None:
+                word_rows[word] = serials = []
+                self._add_word(word)
+            serials.append(serial)
+
+    def _add_word(self, word):
+        gram_words = self._gram_words
+        for i in range(len(word) - GRAM_SIZE + 1):
+            gram = word[i:i + GRAM_SIZE]
+            words = gram_words.get(gram)
+            if words is None:
+                gram_words[gram] = words = set()
+            words.add(word)
+
+    def find(self, fragment):
+        """
+        Отсортированные позиции строк, текст которых содержит fragment.
+        None — во фрагменте нет части для поиска по индексу (см. search_piece).
+        """
+        piece = search_piece(fragment)
+        if piece is None:
+            return None
+
+        # Слова с piece: из самого короткого списка по триграммам piece, с проверкой
+        grams = {piece[i:i + GRAM_SIZE] for i in range(len(piece) - GRAM_SIZE + 1)}
+        word_sets = [self._gram_words.get(gram) for gram in grams]
+        if not all(word_sets):
+            return []
+        words = [word for word in min(word_sets, key=len) if piece in word]
+
+        candidates = set()
+        for word in words:
+            candidates.update(self._word_rows[word])
+
+        rows = self._rows
+        position = self._position
+        text_idx = self.text_idx
+        found = []
+        for serial in candidates:
+            row = rows.get(serial)
+            if row is not None and len(row) > text_idx and fragment in row[text_idx]:
+                found.append(position[serial])
+        found.sort()
+        return found
@@ -0,0 +1,377 @@
+"""
+Таблица файла B для просмотра и правки (tsv_transfer_gui.py).
+
+TsvTableModel показывает строки документа (TsvDocument) без копирования:
+данные ячеек запрашиваются у модели, только когда таблица их рисует. Модель
+держит свой снимок списка строк: операция главного окна заменяет doc.rows в
+фоновом потоке, а таблица видит новые строки только после reload() в потоке
+окна — иначе перерисовка запросила бы строку, которой уже нет.
+Сортировка и фильтр — в TsvViewProxy: у него есть только список номеров
+строк документа, а сами строки не копируются. Строки отдаются виду порциями
+по FETCH_STEP по мере прокрутки (canFetchMore/fetchMore).
+
+Правка ячейки записывается в документ (TsvDocument.set_cell) и остаётся в
+памяти до «Сохранить»; операции главного окна видят её сразу. Пока
+выполняется операция главного окна или фильтр таблицы, правка недоступна.
+"""
+
+from PyQt5 import QtWidgets, QtCore
+
+from background_tasks import TaskRunner
+
+
+class TsvTableModel(QtCore.QAbstractTableModel):
+    """Строки документа как таблица; колонки — header файла."""
+
+    def __init__(self, doc, can_edit):
+        super().__init__()
+        self.doc = doc
+        self.can_edit = can_edit
+        self._snapshot()
+
+    def _snapshot(self):
+        # Строки документа не меняются на месте, поэтому хватает ссылок на списки
+        self.header, self.rows, self.version = self.doc.snapshot()
+
+    def reload(self):
+        """Сброс модели после изменения документа (загрузка, сохранение операцией)."""
+        self.beginResetModel()
+        self._snapshot()
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.header)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole) or not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        return row[column] if column < len(row) else ''
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self.header[section] if section < len(self.header) else None
+        # Номер строки данных в файле (1 — первая после заголовка)
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if role != QtCore.Qt.EditRole or not index.isValid() or not self.can_edit():
+            return False
+        # Документ изменён операцией, а модель ещё не перезагружена — номер строки не тот
+        if self.doc.rows is not self.rows:
+            return False
+        if value == self.data(index, role):
+            return False
+        self.doc.set_cell(index.row(), index.column(), value)
+        self._snapshot()
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole])
+        return True
+
+
+class TsvViewProxy(QtCore.QAbstractProxyModel):
+    """
+    Отбор и порядок строк TsvTableModel: список номеров строк документа
+    (None в фильтре — все строки) и сортировка по колонке.
+    """
+
+    # Сколько строк добавлять при прокрутке к концу таблицы
+    FETCH_STEP = 5000
+
+    def __init__(self, source):
+        super().__init__()
+        self._filtered = None
+        self._sort_column = -1
+        self._sort_order = QtCore.Qt.AscendingOrder
+        self._mapping = []
+        self._proxy_row = None  # номер строки документа -> номер в таблице, строится по запросу
+        self._fetched = 0
+        self.setSourceModel(source)
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._source_reset)
+        source.dataChanged.connect(self._source_data_changed)
+        self._rebuild()
+
+    def _source_reset(self):
+        # Номера строк отфильтрованного набора после смены документа недействительны
+        self._filtered = None
+        self._rebuild()
+        self.endResetModel()
+
+    def _rebuild(self):
+        rows = self.sourceModel().rows
+        mapping = list(range(len(rows))) if self._filtered is None else list(self._filtered)
+        column = self._sort_column
+        if column >= 0:
+            mapping.sort(
+                key=lambda i: rows[i][column] if column < len(rows[i]) else '',
+                reverse=self._sort_order == QtCore.Qt.DescendingOrder,
+            )
+        self._mapping = mapping
+        self._proxy_row = None
+        self._fetched = min(len(mapping), self.FETCH_STEP)
+
+    def set_filter(self, source_rows):
+        """Показывать только строки документа source_rows (None — все)."""
+        self.beginResetModel()
+        self._filtered = source_rows
+        self._rebuild()
+        self.endResetModel()
+
+    def total(self):
+        """Число строк, прошедших фильтр (в том числе ещё не подгруженных)."""
+        return len(self._mapping)
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self.beginResetModel()
+        self._sort_column = column
+        self._sort_order = order
+        self._rebuild()
+        self.endResetModel()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._fetched < len(self._mapping)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        end = min(len(self._mapping), self._fetched + self.FETCH_STEP)
+        if end > self._fetched:
+            self.beginInsertRows(QtCore.QModelIndex(), self._fetched, end - 1)
+            self._fetched = end
+            self.endInsertRows()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if parent.isValid() or not (0 <= row < self._fetched) or not (0 <= column < self.columnCount()):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        return QtCore.QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QtCore.QModelIndex()
+        return self.sourceModel().index(self._mapping[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QtCore.QModelIndex()
+        if self._proxy_row is None:
+            self._proxy_row = {source_row: row for row, source_row in enumerate(self._mapping)}
+        row = self._proxy_row.get(source_index.row())
+        if row is None or row >= self._fetched:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, source_index.column())
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Vertical and role == QtCore.Qt.DisplayRole:
+            return self._mapping[section] + 1 if section < self._fetched else None
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def _source_data_changed(self, top_left, bottom_right, roles):
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            left = self.mapFromSource(self.sourceModel().index(source_row, top_left.column()))
+            if left.isValid():
+                right = self.index(left.row(), bottom_right.column())
+                self.dataChanged.emit(left, right, roles)
+
+
+class TsvTableWindow(QtWidgets.QWidget):
+    """
+    Окно таблицы файла B: фильтр по фрагменту OriginalText (как у операций
+    по тексту), сортировка щелчком по заголовку, правка ячеек.
+    """
+
+    # Задержка фильтра после ввода, мс
+    FILTER_DELAY = 300
+
+    def __init__(self, parent, doc, main_tasks, log):
+        super().__init__(parent, QtCore.Qt.Window)
+        self.doc = doc
+        self.main_tasks = main_tasks
+        self.log = log
+        self.setWindowTitle(f"Таблица B — {doc.path}")
+        self.resize(1100, 700)
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        filter_layout = QtWidgets.QHBoxLayout()
+        filter_layout.addWidget(QtWidgets.QLabel("Фильтр по тексту (OriginalText):"))
+        self.edit_filter = QtWidgets.QLineEdit()
+        self.edit_filter.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.edit_filter)
+        layout.addLayout(filter_layout)
+
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DELAY)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.edit_filter.textChanged.connect(lambda _: self.filter_timer.start())
+
+        self.model = TsvTableModel(doc, self.editing_allowed)
+        self.proxy = TsvViewProxy(self.model)
+
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.proxy)
+        # Без индикатора сортировки — порядок файла, пока не щёлкнут по заголовку
+        self.view.horizontalHeader().setSortIndicator(-1, QtCore.Qt.AscendingOrder)
+        self.view.setSortingEnabled(True)
+        self.view.setWordWrap(False)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setEditTriggers(
+            QtWidgets.QAbstractItemView.DoubleClicked
+            | QtWidgets.QAbstractItemView.EditKeyPressed
+            | QtWidgets.QAbstractItemView.AnyKeyPressed
+        )
+        # Одинаковая высота строк и без подгонки по содержимому: иначе вид перебирает все строки
+        vertical = self.view.verticalHeader()
+        vertical.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        vertical.setDefaultSectionSize(self.view.fontMetrics().height() + 6)
+        horizontal = self.view.horizontalHeader()
+        horizontal.setDefaultSectionSize(180)
+        horizontal.setStretchLastSection(True)
+        layout.addWidget(self.view)
+
+        # Фильтр выполняется в фоне: индекс текста при первом запросе строится ~1 с
+        self.tasks = TaskRunner(self, log)
+        layout.addWidget(self.tasks.panel)
+
+        bottom_layout = QtWidgets.QHBoxLayout()
+        self.status = QtWidgets.QLabel()
+        bottom_layout.addWidget(self.status, 1)
+        self.btn_revert = QtWidgets.QPushButton("Отменить правки")
+        self.btn_revert.clicked.connect(self.handle_revert)
+        self.btn_save = QtWidgets.QPushButton("Сохранить B")
+        self.btn_save.clicked.connect(self.handle_save)
+        bottom_layout.addWidget(self.btn_revert)
+        bottom_layout.addWidget(self.btn_save)
+        layout.addLayout(bottom_layout)
+
+        self.proxy.modelReset.connect(self.update_status)
+        self.model.dataChanged.connect(lambda *args: self.update_status())
+        main_tasks.task_finished.connect(self.sync_document)
+        self.update_status()
+
+    def editing_allowed(self):
+        if self.main_tasks.is_running() or self.tasks.is_running():
+            self.status.setText("Правка недоступна, пока выполняется операция.")
+            return False
+        return True
+
+    def update_status(self):
+        shown = self.proxy.total()
+        total = len(self.model.rows)
+        text = f"Строк: {shown}" if shown == total else f"Строк: {shown} из {total}"
+        if self.doc.modified:
+            text += " — есть несохранённые правки"
+        self.status.setText(text)
+        self.btn_save.setEnabled(self.doc.modified)
+        self.btn_revert.setEnabled(self.doc.modified)
+
+    def apply_filter(self):
+        fragment = self.edit_filter.text()
+        if not fragment:
+            self.proxy.set_filter(None)
+            return
+        if self.main_tasks.is_running() or self.tasks.is_running():
+            # Повторим, когда операция закончится
+            self.filter_timer.start()
+            return
+
+        doc = self.doc
+        version = doc.version
+
+        def work(task):
+            return doc.find_text(fragment, task)
+
+        def done(rows):
+            # Пока искали, документ, таблица или фильтр могли измениться — тогда ищем заново
+            if doc.version != version or self.model.version != version or self.edit_filter.text() != fragment:
+                self.filter_timer.start()
+                return
+            self.proxy.set_filter(rows)
+
+        self.tasks.start("Фильтр таблицы B", work, done, "Ошибка фильтра таблицы B")
+
+    def sync_document(self):
+        """После операции главного окна: показать документ заново, если он изменился."""
+        if self.main_tasks.is_running():
+            return
+        try:
+            self.doc.refresh()
+        except (OSError, RuntimeError) as e:
+            self.log(f"Таблица B: {e}")
+        if self.doc.version != self.model.version:
+            self.model.reload()
+            if self.edit_filter.text():
+                self.apply_filter()
+
+    def handle_save(self):
+        if not self.editing_allowed():
+            return
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            self.doc.save(self.doc.header, self.doc.rows)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
+            self.log(f"Ошибка сохранения таблицы B: {e}")
+            return
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.model.version = self.doc.version
+        self.log(f"Таблица B: правки сохранены в {self.doc.path}")
+        self.update_status()
+
+    def handle_revert(self):
+        if not self.editing_allowed():
+            return
+        try:
+            self.doc.revert()
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
+            return
+        self.log("Таблица B: несохранённые правки отменены.")
+        self.model.reload()
+        if self.edit_filter.text():
+            self.apply_filter()
+
+    def closeEvent(self, event):
+        if self.doc.modified:
+            reply = QtWidgets.QMessageBox.question(
+                self,
+                "Таблица B",
+                "Есть несохранённые правки. Сохранить их в файл B?",
+                QtWidgets.QMessageBox.Save | QtWidgets.QMessageBox.Discard | QtWidgets.QMessageBox.Cancel,
+                QtWidgets.QMessageBox.Save,
+            )
+            if reply == QtWidgets.QMessageBox.Cancel:
+                event.ignore()
+                return
+            if reply == QtWidgets.QMessageBox.Save:
+                self.handle_save()
+            else:
+                self.handle_revert()
+            if self.doc.modified:
+                # Не записано или выполняется операция — окно остаётся открытым
+                event.ignore()
+                return
+        self.tasks.shutdown()
+        self.main_tasks.task_finished.disconnect(self.sync_document)
+        super().closeEvent(event)
@@ -1,53 +1,189 @@
 import sys
 import os
+import io
 import csv
 import re
-import subprocess
 import random
+import threading
 
 from PyQt5 import QtWidgets, QtCore
-from PyQt5.QtGui import QTextCursor
+
+from background_tasks import TaskRunner, commit, iterate
+from batch_replace import BatchReplacer, load_replace_rules, replace_in_rows
+from log_sink import LogSink
+from text_index import TextIndex, search_piece
+from tsv_table import TsvTableWindow
+
+
+def scripts_dir():
+    """Папка валидаторов репозитория wwm_russian (.github/scripts)."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(base_dir, "..", "..", ".github", "scripts"))
 
 
 class ValidatorThread(QtCore.QThread):
-    """Фоновый поток для запуска внешних валидаторов без подвисания GUI."""
+    """
+    Фоновый поток проверки файла валидаторами из .github/scripts (validation_api.py)
+    в этом же процессе. Результат — список объектов Issue.
+
+    contents — (header, rows) документа с несохранёнными правками: проверяется
+    то, что запишет следующее сохранение; None — файл path читается с диска.
+    """
 
     log_signal = QtCore.pyqtSignal(str)
-    finished_signal = QtCore.pyqtSignal(int, str)  # returncode, description
+    finished_signal = QtCore.pyqtSignal(object, str)  # issues (None при сбое), description
 
-    def __init__(self, script_path: str, args: list[str] | None, description: str):
+    def __init__(self, path: str, checks: tuple, description: str, en_path: str | None = None,
+                 contents: tuple | None = None):
         super().__init__()
-        self.script_path = script_path
-        self.args = args or []
+        self.path = path
+        self.checks = checks
         self.description = description
+        self.en_path = en_path
+        self.contents = contents
 
     def run(self):
+        issues = None
         try:
-            cmd = [sys.executable, self.script_path] + self.args
             self.log_signal.emit(f"=== {self.description} ===")
-            self.log_signal.emit("Запуск: " + " ".join(cmd))
-
-            proc = subprocess.Popen(
-                cmd,
-                cwd=os.path.dirname(self.script_path),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-            )
+            api_dir = scripts_dir()
+            if api_dir not in sys.path:
+                sys.path.insert(0, api_dir)
+            import validation_api
 
-            if proc.stdout is not None:
-                for line in proc.stdout:
-                    self.log_signal.emit(line.rstrip("\n\r"))
-
-            proc.wait()
-            returncode = proc.returncode
+            if self.contents is not None:
+                lines = tsv_lines(*self.contents)
+            else:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+            en_lines = None
+            if self.en_path:
+                with open(self.en_path, 'r', encoding='utf-8') as f:
+                    en_lines = f.readlines()
+                self.log_signal.emit(f"EN для сравнения тегов: {self.en_path}")
+
+            issues = validation_api.validate_lines(lines, en_lines, self.checks, self.path)
         except Exception as e:
-            self.log_signal.emit(f"Ошибка запуска валидатора {self.description}: {e}")
-            returncode = -1
+            self.log_signal.emit(f"Ошибка валидатора {self.description}: {e}")
+
+        self.finished_signal.emit(issues, self.description)
+
+
+class ValidationResultsDialog(QtWidgets.QDialog):
+    """Результаты проверки в таблице с сортировкой по любому столбцу."""
+
+    COLUMNS = ["Уровень", "Проверка", "Код", "ID", "Строка", "Сообщение"]
+
+    def __init__(self, parent, description, issues):
+        super().__init__(parent)
+        self.setWindowTitle(description)
+        self.resize(1000, 500)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        errors = sum(1 for issue in issues if issue.severity == "error")
+        layout.addWidget(QtWidgets.QLabel(
+            f"Ошибок: {errors}, предупреждений: {len(issues) - errors}. "
+            f"Щелчок по заголовку столбца — сортировка."
+        ))
+
+        table = QtWidgets.QTableWidget(len(issues), len(self.COLUMNS))
+        table.setHorizontalHeaderLabels(self.COLUMNS)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        table.setSortingEnabled(False)
+        for row, issue in enumerate(issues):
+            values = [
+                "ошибка" if issue.severity == "error" else "предупреждение",
+                issue.check,
+                issue.code,
+                issue.id or "",
+                issue.line,
+                issue.message,
+            ]
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                # Номер строки — числом, чтобы сортировка была числовой
+                item.setData(QtCore.Qt.DisplayRole, value)
+                if column == len(values) - 1:
+                    item.setToolTip(issue.context)
+                table.setItem(row, column, item)
+        # Изначально — по номеру строки файла
+        table.horizontalHeader().setSortIndicator(4, QtCore.Qt.AscendingOrder)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+        table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(table)
+
+        close_btn = QtWidgets.QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        btn_layout = QtWidgets.QHBoxLayout()
+        btn_layout.addStretch(1)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
 
-        self.finished_signal.emit(returncode, self.description)
+
+class BatchReplacePreviewDialog(QtWidgets.QDialog):
+    """Предпросмотр пакетной замены: отчёт по правилам и изменённые строки B до сохранения."""
+
+    RULE_COLUMNS = ["Строка", "Найти", "Заменить", "Параметры", "Замен", "Строк B"]
+    CHANGE_COLUMNS = ["ID", "Было", "Стало"]
+    # Изменённых строк в таблице не больше этого (в файл записываются все)
+    PREVIEW_LIMIT = 2000
+
+    def __init__(self, parent, replacer, changes, id_idx, text_idx):
+        super().__init__(parent)
+        self.setWindowTitle("Пакетная замена — предпросмотр")
+        self.resize(1000, 650)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        shown = min(len(changes), self.PREVIEW_LIMIT)
+        layout.addWidget(QtWidgets.QLabel(
+            f"Правил: {len(replacer.rules)}, замен: {sum(replacer.hits)}, "
+            f"изменится строк B: {len(changes)}"
+            + (f" (ниже первые {shown})" if shown < len(changes) else "")
+            + ". Файл B будет записан только после «Сохранить»."
+        ))
+
+        rule_values = [
+            [rule.line, rule.find, rule.replace, rule.options(), hits, rows_hit]
+            for rule, hits, rows_hit in zip(replacer.rules, replacer.hits, replacer.rows_hit)
+        ]
+        change_values = [
+            [row[id_idx], row[text_idx], new_row[text_idx]]
+            for _, row, new_row in changes[:shown]
+        ]
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        splitter.addWidget(self._table(self.RULE_COLUMNS, rule_values))
+        splitter.addWidget(self._table(self.CHANGE_COLUMNS, change_values))
+        splitter.setSizes([250, 400])
+        layout.addWidget(splitter)
+
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Save | QtWidgets.QDialogButtonBox.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    @staticmethod
+    def _table(columns, values):
+        table = QtWidgets.QTableWidget(len(values), len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        for row, row_values in enumerate(values):
+            for column, value in enumerate(row_values):
+                item = QtWidgets.QTableWidgetItem()
+                # Числа — числами, чтобы сортировка была числовой
+                item.setData(QtCore.Qt.DisplayRole, value)
+                if isinstance(value, str):
+                    item.setToolTip(value)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
 
 
 def load_tsv(path):
@@ -65,14 +201,30 @@ def load_tsv(path):
 
 
 def save_tsv(path, header, rows):
-    """Сохранение TSV-файла."""
-    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+    """
+    Сохранение TSV-файла. Пишется во временный файл, который затем заменяет
+    исходный: при ошибке записи старый файл остаётся целым.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
         # Используем стандартные настройки CSV (QUOTE_MINIMAL по умолчанию)
         # Это позволяет корректно обрабатывать кавычки и специальные символы
         writer = csv.writer(f, delimiter='\t')
         if header:
             writer.writerow(header)
         writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def tsv_lines(header, rows):
+    """Строки файла, который запишет save_tsv(header, rows), — как из readlines()."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter='\t')
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    # Переводы строк — как при чтении файла в текстовом режиме (\r\n -> \n)
+    return io.StringIO(buffer.getvalue(), newline=None).readlines()
 
 
 def find_column_index(header, name, default_index=0):
@@ -83,6 +235,175 @@ def find_column_index(header, name, default_index=0):
         return default_index if len(header) > default_index else 0
 
 
+class TsvDocument:
+    """
+    TSV-файл, разобранный в память: header и rows как у load_tsv.
+
+    С диска перечитывается, только если у файла изменились время изменения
+    или размер (правка в другой программе). Изменения сохраняются через save():
+    файл записывается один раз, а новые строки остаются в памяти без повторного
+    разбора. version растёт при каждой загрузке, сохранении и правке — по нему
+    пересчитываются производные данные (словарь ID, индекс текста).
+
+    Правки из таблицы (set_cell) держатся в памяти до save(); пока они не
+    сохранены (modified), документ не перечитывается с диска молча.
+
+    Строки в памяти не меняются на месте: изменённая строка — новый список,
+    и список строк при правке тоже заменяется копией (операция в фоне читает
+    прежний). На этом держится обновление индекса текста только по новым строкам.
+
+    header, rows и version меняются вместе под блокировкой документа: поток,
+    читающий документ параллельно с операцией (фильтр таблицы, валидатор),
+    берёт их через snapshot() и не увидит новые строки со старой версией.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = []
+        self.rows = []
+        self.version = 0
+        self.modified = False
+        self._stamp = None
+        self._id_map = None  # (version, словарь ID -> строка)
+        self._text_index = None
+        # save/refresh/set_cell и snapshot(); RLock — revert вызывает refresh
+        self._lock = threading.RLock()
+        # Индекс текста строят и читают фоновые операции окна и таблицы B
+        self._text_index_lock = threading.Lock()
+
+    def _disk_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self):
+        """(header, rows, version) одной версии документа."""
+        with self._lock:
+            return self.header, self.rows, self.version
+
+    def refresh(self):
+        """Перечитывает файл, если он изменился на диске. Возвращает True, если файл был разобран."""
+        with self._lock:
+            stamp = self._disk_stamp()
+            if stamp == self._stamp:
+                return False
+            if self.modified:
+                raise RuntimeError(
+                    f"Файл изменён на диске, а в таблице есть несохранённые правки: {self.path}. "
+                    f"Сохраните или отмените правки."
+                )
+            self.header, self.rows = load_tsv(self.path)
+            self._stamp = stamp
+            self.version += 1
+            return True
+
+    def revert(self):
+        """Отменяет несохранённые правки: перечитывает файл с диска."""
+        with self._lock:
+            self.modified = False
+            self._stamp = None
+            self.refresh()
+
+    def save(self, header, rows):
+        """Записывает header и rows в файл и делает их текущим содержимым документа."""
+        with self._lock:
+            save_tsv(self.path, header, rows)
+            self.header, self.rows = header, rows
+            self._stamp = self._disk_stamp()
+            self.version += 1
+            self.modified = False
+
+    def set_cell(self, index, column, value):
+        """Правка ячейки строки index в памяти (в файл — через save())."""
+        with self._lock:
+            row = list(self.rows[index])
+            if len(row) <= column:
+                row.extend([''] * (column + 1 - len(row)))
+            row[column] = value
+            rows = list(self.rows)
+            rows[index] = row
+            self.rows = rows
+            self.version += 1
+            self.modified = True
+
+    def columns(self, header=None):
+        """Индексы колонок (ID, OriginalText) в header (по умолчанию — документа)."""
+        header = self.header if header is None else header
+        id_idx = find_column_index(header, 'ID', 0)
+        text_idx = find_column_index(header, 'OriginalText', 1 if len(header) > 1 else 0)
+        return id_idx, text_idx
+
+    def id_map(self):
+        """Словарь ID -> строка (при повторах — последняя). Строится один раз на версию файла."""
+        header, rows, version = self.snapshot()
+        if self._id_map is None or self._id_map[0] != version:
+            id_idx = self.columns(header)[0]
+            self._id_map = (version, {row[id_idx]: row for row in rows if len(row) > id_idx})
+        return self._id_map[1]
+
+    def text_index(self, task=None):
+        """
+        Индекс колонки OriginalText (text_index.TextIndex): строится при первом
+        запросе, после сохранений дополняется только новыми строками.
+        Вызывается под _text_index_lock (см. find_text).
+        """
+        header, rows, version = self.snapshot()
+        text_idx = self.columns(header)[1]
+        if self._text_index is None or self._text_index.text_idx != text_idx:
+            self._text_index = TextIndex(text_idx)
+        self._text_index.sync(rows, version, task)
+        return self._text_index
+
+    def find_text(self, fragment, task=None):
+        """
+        Позиции строк, где OriginalText содержит fragment, по возрастанию —
+        в строках версии документа на момент вызова.
+        """
+        if search_piece(fragment) is None:
+            # Во фрагменте нет букв/цифр подряд от трёх символов — индекс не поможет
+            header, rows, _ = self.snapshot()
+            text_idx = self.columns(header)[1]
+            return [
+                i for i, row in enumerate(iterate(task, rows, "Поиск по тексту"))
+                if len(row) > text_idx and fragment in row[text_idx]
+            ]
+        with self._text_index_lock:
+            return self.text_index(task).find(fragment)
+
+
+class TsvDocumentStore:
+    """
+    Открытые документы по путям файлов; хранит последние MAX_DOCUMENTS
+    (документы с несохранёнными правками не вытесняются).
+    """
+
+    MAX_DOCUMENTS = 4
+
+    def __init__(self):
+        self._documents = {}
+
+    def get(self, path, label):
+        """
+        Документ для файла path, актуальный на момент вызова.
+        Возвращает (документ, был ли файл разобран заново).
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Файл {label} не найден: {path}")
+        key = os.path.normcase(os.path.abspath(path))
+        document = self._documents.pop(key, None) or TsvDocument(path)
+        # Последний использованный — в конце, самый давний вытесняется первым
+        self._documents[key] = document
+        excess = len(self._documents) - self.MAX_DOCUMENTS
+        if excess > 0:
+            evicted = [k for k, doc in self._documents.items() if k != key and not doc.modified][:excess]
+            for k in evicted:
+                del self._documents[k]
+        return document, document.refresh()
+
+    def opened(self, path):
+        """Уже загруженный документ файла path (без чтения с диска) или None."""
+        return self._documents.get(os.path.normcase(os.path.abspath(path)))
+
+
 def has_cyrillic(text):
     """Проверка, содержит ли текст кириллицу."""
     return bool(re.search(r'[А-Яа-яЁё]', text or ""))
@@ -101,18 +422,14 @@ def has_broken_param_ru_underscore(text):
     return bool(re.search(r'[А-Яа-яЁё]+_[А-Яа-яЁё]+', text or ""))
 
 
-def transfer_new_ids(path_a, path_b):
+def transfer_new_ids(doc_a, doc_b, task=None):
     """
-    Переносит строки с новыми ID из A в B.
+    Переносит строки с новыми ID из A в B (документы TsvDocument).
+    task — фоновая операция (background_tasks.Task) для прогресса и отмены.
     Возвращает количество добавленных строк.
     """
-    if not os.path.isfile(path_a):
-        raise FileNotFoundError(f"Файл A не найден: {path_a}")
-    if not os.path.isfile(path_b):
-        raise FileNotFoundError(f"Файл B не найден: {path_b}")
-
-    header_a, rows_a = load_tsv(path_a)
-    header_b, rows_b = load_tsv(path_b)
+    header_a, rows_a = doc_a.header, doc_a.rows
+    header_b, rows_b = doc_b.header, list(doc_b.rows)
 
     # Определяем индексы ID
     id_idx_a = find_column_index(header_a, 'ID', 0)
@@ -120,7 +437,7 @@ def transfer_new_ids(path_a, path_b):
 
     # Множество ID из B
     ids_b = set()
-    for row in rows_b:
+    for row in iterate(task, rows_b, "ID файла B"):
         if len(row) > id_idx_b:
             ids_b.add(row[id_idx_b])
 
@@ -139,7 +456,7 @@ def transfer_new_ids(path_a, path_b):
     size = len(target_header)
 
     # Перебираем строки из A, добавляем, если ID новый
-    for row in rows_a:
+    for row in iterate(task, rows_a, "Перенос строк из A"):
         if len(row) <= id_idx_a:
             continue
         row_id = row[id_idx_a]
@@ -150,32 +467,29 @@ def transfer_new_ids(path_a, path_b):
             added += 1
 
     # Сохраняем обратно в B
-    save_tsv(path_b, target_header, rows_b)
+    if added:
+        commit(task, "Сохранение B", doc_b.save, target_header, rows_b)
     return added
 
 
-def remove_duplicates_in_b(path_b):
+def remove_duplicates_in_b(doc_b, task=None):
     """
-    Удаляет дубли по ID в файле B.
+    Удаляет дубли по ID в файле B (документ TsvDocument).
     Приоритет: оставить строку С КИРИЛЛИЦЕЙ (русский), удалить без кириллицы (английский).
     Если все с кириллицей или все без — оставить первую, остальные удалить.
 
     Возвращает количество удалённых строк.
     """
-    if not os.path.isfile(path_b):
-        raise FileNotFoundError(f"Файл B не найден: {path_b}")
-
-    header_b, rows_b = load_tsv(path_b)
+    header_b, rows_b = doc_b.header, doc_b.rows
     if not rows_b:
         return 0
 
-    id_idx = find_column_index(header_b, 'ID', 0)
-    text_idx = find_column_index(header_b, 'OriginalText', 1 if len(header_b) > 1 else 0)
+    id_idx, text_idx = doc_b.columns()
 
     seen = {}  # ID -> (best_row, has_cyrillic_best)
     original_count = len(rows_b)
 
-    for row in rows_b:
+    for row in iterate(task, rows_b, "Поиск дублей"):
         if len(row) <= id_idx:
             # Строка без ID — можно либо пропустить, либо считать отдельной.
             # Считаем "ID" пустой строкой.
@@ -199,7 +513,8 @@ def remove_duplicates_in_b(path_b):
     result_rows = [value[0] for value in seen.values()]
     removed = original_count - len(result_rows)
 
-    save_tsv(path_b, header_b, result_rows)
+    if removed:
+        commit(task, "Сохранение B", doc_b.save, header_b, result_rows)
     return removed
 
 
@@ -309,32 +624,81 @@ class MainWindow(QtWidgets.QMainWindow):
 
         text_ops_layout.addLayout(text_btns_layout)
 
+        # Пакетная замена фрагментов по файлу правил (найти<TAB>заменить[<TAB>own,nocase])
+        rules_layout = QtWidgets.QHBoxLayout()
+        rules_layout.addWidget(QtWidgets.QLabel("Правила замены (найти<TAB>заменить):"))
+        self.edit_rules = QtWidgets.QLineEdit()
+        rules_layout.addWidget(self.edit_rules)
+        self.btn_browse_rules = QtWidgets.QPushButton("Обзор правил...")
+        self.btn_browse_rules.clicked.connect(self.browse_rules)
+        rules_layout.addWidget(self.btn_browse_rules)
+        self.btn_batch_replace = QtWidgets.QPushButton("Пакетная замена по правилам (B)")
+        self.btn_batch_replace.clicked.connect(self.handle_batch_replace)
+        rules_layout.addWidget(self.btn_batch_replace)
+        text_ops_layout.addLayout(rules_layout)
+
         # Кнопка создания debug_*.tsv с UUID-тегами в начале текста
         debug_btn_layout = QtWidgets.QHBoxLayout()
         self.btn_create_debug_tsv = QtWidgets.QPushButton("Создать debug_*.tsv с [UUID] в тексте (B)")
         self.btn_create_debug_tsv.clicked.connect(self.handle_create_debug_tsv)
         debug_btn_layout.addWidget(self.btn_create_debug_tsv)
         debug_btn_layout.addStretch(1)
+        self.btn_open_table = QtWidgets.QPushButton("Открыть B в таблице...")
+        self.btn_open_table.clicked.connect(self.handle_open_table)
+        debug_btn_layout.addWidget(self.btn_open_table)
         text_ops_layout.addLayout(debug_btn_layout)
 
         layout.addLayout(text_ops_layout)
 
-        # Лог
+        # Лог: выводится пачками по таймеру (log_sink.py)
         self.log = QtWidgets.QTextEdit()
         self.log.setReadOnly(True)
+        self.log_sink = LogSink(self.log)
 
-        # Кнопка очистки лога
+        # Кнопки сохранения и очистки лога
         clear_layout = QtWidgets.QHBoxLayout()
+        self.btn_save_log = QtWidgets.QPushButton("Сохранить лог...")
+        self.btn_save_log.clicked.connect(lambda: self.log_sink.save_as(self))
         self.btn_clear_log = QtWidgets.QPushButton("Очистить лог")
         self.btn_clear_log.clicked.connect(self.handle_clear_log)
         clear_layout.addStretch(1)
+        clear_layout.addWidget(self.btn_save_log)
         clear_layout.addWidget(self.btn_clear_log)
 
+        # Ход фоновой операции (прогресс и отмена) — над логом
+        self.tasks = TaskRunner(self, self.append_log)
+        layout.addWidget(self.tasks.panel)
+
         layout.addWidget(self.log)
         layout.addLayout(clear_layout)
 
-        # Текущий поток-валидатор (чтобы не собрать GC)
+        # Текущий поток-валидатор и окно результатов (чтобы не собрал GC)
         self.validator_thread: ValidatorThread | None = None
+        self.results_dialog: ValidationResultsDialog | None = None
+
+        # Файлы A и B, разобранные в память: перечитываются только после изменения на диске
+        self.documents = TsvDocumentStore()
+        # Открытое окно таблицы B (tsv_table.py)
+        self.table_window: TsvTableWindow | None = None
+
+    def closeEvent(self, event):
+        # Окно таблицы спрашивает о несохранённых правках и может отменить закрытие
+        if self.table_window is not None and not self.table_window.close():
+            event.ignore()
+            return
+        self.tasks.shutdown()
+        super().closeEvent(event)
+
+    def document(self, path, label, task):
+        """
+        Документ файла A или B для фоновой операции task; при (повторной)
+        загрузке с диска пишет об этом в лог.
+        """
+        task.stage(f"Чтение файла {label}")
+        doc, loaded = self.documents.get(path, label)
+        if loaded:
+            task.log(f"Файл {label} загружен: {path} (строк: {len(doc.rows)})")
+        return doc
 
     def browse_a(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -355,10 +719,28 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         if path:
             self.edit_b.setText(path)
+            self.try_auto_rules_path(path)
+
+    def browse_rules(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Выберите файл правил замены",
+            "",
+            "Text files (*.txt *.tsv);;All files (*.*)"
+        )
+        if path:
+            self.edit_rules.setText(path)
+
+    def try_auto_rules_path(self, tsv_path):
+        """Если replace.txt в папке B — подставляем, но не затираем уже выбранный вручную."""
+        if self.edit_rules.text().strip():
+            return
+        candidate = os.path.join(os.path.dirname(tsv_path), "replace.txt")
+        if os.path.isfile(candidate):
+            self.edit_rules.setText(candidate)
 
     def append_log(self, text):
-        self.log.append(text)
-        self.log.moveCursor(QTextCursor.End)
+        self.log_sink.write(text)
 
     def handle_transfer(self):
         path_a = self.edit_a.text().strip()
@@ -368,14 +750,17 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите пути к файлам A и B.")
             return
 
-        try:
-            added = transfer_new_ids(path_a, path_b)
+        def work(task):
+            doc_a = self.document(path_a, "A", task)
+            doc_b = self.document(path_b, "B", task)
+            return transfer_new_ids(doc_a, doc_b, task)
+
+        def done(added):
             msg = f"Перенос завершён. Добавлено строк: {added}."
             QtWidgets.QMessageBox.information(self, "Готово", msg)
             self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка переноса: {e}")
+
+        self.tasks.start("Перенос новых ID", work, done, "Ошибка переноса")
 
     def handle_remove_dups(self):
         path_b = self.edit_b.text().strip()
@@ -384,14 +769,36 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите путь к файлу B.")
             return
 
-        try:
-            removed = remove_duplicates_in_b(path_b)
+        def work(task):
+            return remove_duplicates_in_b(self.document(path_b, "B", task), task)
+
+        def done(removed):
             msg = f"Удаление дублей завершено. Удалено строк: {removed}."
             QtWidgets.QMessageBox.information(self, "Готово", msg)
             self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка удаления дублей: {e}")
+
+        self.tasks.start("Удаление дублей", work, done, "Ошибка удаления дублей")
+
+    def save_b(self, description, doc_b, build_rows, on_saved, error_log):
+        """
+        Фоновая запись в B после подтверждения пользователем: build_rows(task)
+        готовит новые строки, затем они записываются вместе с header B.
+        """
+        def work(task):
+            rows = build_rows(task)
+            task.commit("Сохранение B", doc_b.save, doc_b.header, rows)
+
+        self.tasks.start(description, work, lambda _: on_saved(), error_log)
+
+    def move_to_end_of_b(self, description, doc_b, indices, on_saved, error_log):
+        """Фоновое перемещение строк B с номерами indices в конец файла (порядок внутри групп сохраняется)."""
+        def build_rows(task):
+            rows_b = doc_b.rows
+            moved = set(indices)
+            kept_rows = [row for i, row in enumerate(task.iterate(rows_b, "Перемещение строк")) if i not in moved]
+            return kept_rows + [rows_b[i] for i in indices]
+
+        self.save_b(description, doc_b, build_rows, on_saved, error_log)
 
     def handle_replace_fields(self):
         """
@@ -411,18 +818,14 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл B не найден: {path_b}")
             return
 
-        try:
-            header_a, rows_a = load_tsv(path_a)
-            header_b, rows_b = load_tsv(path_b)
-
+        def work(task):
+            doc_a = self.document(path_a, "A", task)
+            doc_b = self.document(path_b, "B", task)
+            header_b, rows_b = doc_b.header, doc_b.rows
             if not rows_b:
-                msg = "Файл B пуст или без данных. Замена не требуется."
-                QtWidgets.QMessageBox.information(self, "Замена полей", msg)
-                self.append_log(msg)
-                return
+                return doc_b, None, 0
 
-            id_idx_a = find_column_index(header_a, 'ID', 0)
-            id_idx_b = find_column_index(header_b, 'ID', 0)
+            id_idx_b = doc_b.columns()[0]
             size_b = len(header_b)
 
             def normalize_row(row):
@@ -433,24 +836,28 @@ class MainWindow(QtWidgets.QMainWindow):
                     return row[:size_b]
                 return row
 
-            map_a = {}
-            for row in rows_a:
-                if len(row) > id_idx_a:
-                    rid = row[id_idx_a]
-                    if rid:
-                        map_a[rid] = row
+            map_a = doc_a.id_map()
 
             new_rows = []
             replaced = 0
 
-            for row in rows_b:
+            for row in task.iterate(rows_b, "Сопоставление ID"):
                 if len(row) > id_idx_b:
                     rid = row[id_idx_b]
-                    if rid in map_a:
+                    if rid and rid in map_a:
                         new_rows.append(normalize_row(map_a[rid]))
                         replaced += 1
                         continue
                 new_rows.append(row)
+            return doc_b, new_rows, replaced
+
+        def done(result):
+            doc_b, new_rows, replaced = result
+            if new_rows is None:
+                msg = "Файл B пуст или без данных. Замена не требуется."
+                QtWidgets.QMessageBox.information(self, "Замена полей", msg)
+                self.append_log(msg)
+                return
 
             if replaced == 0:
                 msg = "В B нет ID, которые присутствуют в A. Замена не выполнена."
@@ -474,91 +881,89 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.append_log("Замена полей отменена пользователем.")
                 return
 
-            save_tsv(path_b, header_b, new_rows)
-            msg = f"Замена завершена. Обновлено строк: {replaced}."
-            QtWidgets.QMessageBox.information(self, "Замена полей", msg)
-            self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка замены полей: {e}")
-
-    def handle_clear_log(self):
-        """Очистка окна лога."""
-        self.log.clear()
-
-    # Запуск внешних валидаторов (из репозитория wwm_russian/.github/scripts) в фоне
-    def run_validator_script(self, script_relative_path, args=None, description=""):
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            repo_root = os.path.abspath(os.path.join(base_dir, "..", ".."))
-
-            # Если передан абсолютный путь — используем его, иначе собираем из .github/scripts
-            if os.path.isabs(script_relative_path):
-                script_path = script_relative_path
-            else:
-                script_path = os.path.join(repo_root, ".github", "scripts", script_relative_path)
-
-            if not os.path.isfile(script_path):
-                raise FileNotFoundError(f"Скрипт валидатора не найден: {script_path}")
+            def saved():
+                msg = f"Замена завершена. Обновлено строк: {replaced}."
+                QtWidgets.QMessageBox.information(self, "Замена полей", msg)
+                self.append_log(msg)
 
-            name = description or os.path.basename(script_path)
+            self.save_b("Замена полей", doc_b, lambda task: new_rows, saved, "Ошибка замены полей")
 
-            # Если предыдущий поток ещё жив – можно либо дождаться, либо просто запустить новый.
-            # Проще: не даём запускать второй валидатор параллельно.
-            if self.validator_thread is not None and self.validator_thread.isRunning():
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Валидатор",
-                    "Другой валидатор ещё выполняется. Дождитесь завершения.",
-                )
-                return
+        self.tasks.start("Замена полей", work, done, "Ошибка замены полей")
 
-            self.validator_thread = ValidatorThread(script_path, args, name)
-            self.validator_thread.log_signal.connect(self.append_log)
-            self.validator_thread.finished_signal.connect(self.on_validator_finished)
-            self.validator_thread.start()
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка валидатора", str(e))
-            self.append_log(f"Ошибка запуска валидатора {description or script_relative_path}: {e}")
+    def handle_clear_log(self):
+        """Очистка окна лога."""
+        self.log_sink.clear()
 
-    def on_validator_finished(self, returncode: int, description: str):
-        if returncode == 0:
-            QtWidgets.QMessageBox.information(
+    # Проверка валидаторами из репозитория wwm_russian/.github/scripts в фоновом потоке
+    def run_validator(self, path, checks, description, en_path=None):
+        # Не даём запускать вторую проверку параллельно
+        if self.validator_thread is not None and self.validator_thread.isRunning():
+            QtWidgets.QMessageBox.warning(
                 self,
                 "Валидатор",
-                f"{description} завершился успешно (код 0).",
+                "Другой валидатор ещё выполняется. Дождитесь завершения.",
             )
-        else:
+            return
+
+        # Без правок проверяется сам файл, как в CI: разбор load_tsv сглаживает
+        # кавычки, и ошибки формата в строках документа уже не те. С несохранёнными
+        # правками таблицы — документ в памяти (то, что запишет сохранение); строки
+        # не меняются на месте, так что снимок можно читать в потоке валидатора
+        contents = None
+        doc = self.documents.opened(path)
+        if doc is not None and doc.modified:
+            contents = doc.snapshot()[:2]
+            self.append_log(f"Проверяется файл в памяти, с несохранёнными правками таблицы: {path}")
+
+        self.validator_thread = ValidatorThread(path, checks, description, en_path, contents)
+        self.validator_thread.log_signal.connect(self.append_log)
+        self.validator_thread.finished_signal.connect(self.on_validator_finished)
+        self.validator_thread.start()
+
+    def on_validator_finished(self, issues, description: str):
+        if issues is None:
             QtWidgets.QMessageBox.warning(
                 self,
                 "Валидатор",
-                f"{description} завершился с кодом {returncode}. Подробности см. в логе.",
+                f"{description} не выполнена. Подробности см. в логе.",
             )
+            return
+
+        errors = sum(1 for issue in issues if issue.severity == "error")
+        self.append_log(f"{description}: ошибок {errors}, предупреждений {len(issues) - errors}")
+
+        if not issues:
+            QtWidgets.QMessageBox.information(self, "Валидатор", f"{description}: ошибок не найдено.")
+            return
+
+        self.results_dialog = ValidationResultsDialog(self, description, issues)
+        self.results_dialog.show()
 
     def handle_validate_tsv(self):
         path_b = self.edit_b.text().strip()
 
-        if not path_b:
-            QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите путь к файлу B.")
+        if not path_b or not os.path.isfile(path_b):
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите существующий файл B.")
             return
 
-        # validate_tsv.py принимает путь к файлу как аргумент
-        self.run_validator_script(
-            "validate_tsv.py",
-            args=[path_b],
-            description="Проверка TSV B (validate_tsv.py)",
-        )
+        self.run_validator(path_b, ("tsv",), "Проверка TSV B (validate_tsv.py)")
 
     def handle_validate_tags(self):
         """
-        Запуск validate_tags.py.
-        Скрипт сам берёт translation_ru.tsv / translation_en.tsv из папки wwm_russian,
-        так что имеет смысл использовать его, когда файл B — это translation_ru.tsv.
+        Проверка тегов в файле B (правила validate_tags.py).
+        Если рядом с B лежит translation_en.tsv, ошибки, которые есть и в EN,
+        считаются предупреждениями — как в validate_tags.py.
         """
-        self.run_validator_script(
-            "validate_tags.py",
-            description="Проверка тегов (validate_tags.py)",
-        )
+        path_b = self.edit_b.text().strip()
+
+        if not path_b or not os.path.isfile(path_b):
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите существующий файл B.")
+            return
+
+        en_path = os.path.join(os.path.dirname(os.path.abspath(path_b)), "translation_en.tsv")
+        if not os.path.isfile(en_path) or os.path.samefile(en_path, path_b):
+            en_path = None
+        self.run_validator(path_b, ("tags",), "Проверка тегов B (validate_tags.py)", en_path)
 
     def handle_find_chinese_in_b(self):
         """
@@ -575,29 +980,34 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл B не найден: {path_b}")
             return
 
-        try:
-            header_b, rows_b = load_tsv(path_b)
+        def work(task):
+            doc_b = self.document(path_b, "B", task)
+            rows_b = doc_b.rows
             if not rows_b:
-                QtWidgets.QMessageBox.information(self, "Результат", "Файл B пуст или без данных.")
-                return
+                return doc_b, None, None
 
-            id_idx = find_column_index(header_b, 'ID', 0)
-            text_idx = find_column_index(header_b, 'OriginalText', 1 if len(header_b) > 1 else 0)
+            id_idx, text_idx = doc_b.columns()
 
-            total = 0
             ids = []
             chinese_indices = []
 
-            for idx, row in enumerate(rows_b):
+            for idx, row in enumerate(task.iterate(rows_b, "Поиск китайских символов")):
                 if len(row) <= max(id_idx, text_idx):
                     continue
                 text = row[text_idx]
                 if has_chinese(text):
-                    total += 1
                     row_id = row[id_idx] if len(row) > id_idx else ''
                     ids.append((row_id, text))
                     chinese_indices.append(idx)
+            return doc_b, ids, chinese_indices
 
+        def done(result):
+            doc_b, ids, chinese_indices = result
+            if ids is None:
+                QtWidgets.QMessageBox.information(self, "Результат", "Файл B пуст или без данных.")
+                return
+
+            total = len(ids)
             if total == 0:
                 msg = "Китайские символы в файле B не найдены."
                 QtWidgets.QMessageBox.information(self, "Поиск китайских символов", msg)
@@ -631,24 +1041,23 @@ class MainWindow(QtWidgets.QMainWindow):
             )
 
             if reply == QtWidgets.QMessageBox.Yes:
+                def moved():
+                    move_msg = (
+                        f"Строки с китайскими символами перемещены в конец файла B. "
+                        f"Всего перемещено: {total}."
+                    )
+                    self.append_log(move_msg)
+                    QtWidgets.QMessageBox.information(self, "Китайские символы", move_msg)
+
                 # Сохраняем порядок: сначала все нормальные строки, потом с китайскими символами
-                chinese_set = set(chinese_indices)
-                kept_rows = [row for i, row in enumerate(rows_b) if i not in chinese_set]
-                chinese_rows = [rows_b[i] for i in chinese_indices]
-                new_rows = kept_rows + chinese_rows
-
-                save_tsv(path_b, header_b, new_rows)
-                move_msg = (
-                    f"Строки с китайскими символами перемещены в конец файла B. "
-                    f"Всего перемещено: {total}."
+                self.move_to_end_of_b(
+                    "Перемещение китайских строк", doc_b, chinese_indices, moved,
+                    "Ошибка перемещения строк с китайскими символами",
                 )
-                self.append_log(move_msg)
-                QtWidgets.QMessageBox.information(self, "Китайские символы", move_msg)
             else:
                 QtWidgets.QMessageBox.information(self, "Китайские символы", msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка поиска китайских символов: {e}")
+
+        self.tasks.start("Поиск китайских символов", work, done, "Ошибка поиска китайских символов")
 
     def handle_find_broken_params(self):
         """
@@ -665,29 +1074,34 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл B не найден: {path_b}")
             return
 
-        try:
-            header_b, rows_b = load_tsv(path_b)
+        def work(task):
+            doc_b = self.document(path_b, "B", task)
+            rows_b = doc_b.rows
             if not rows_b:
-                QtWidgets.QMessageBox.information(self, "Результат", "Файл B пуст или без данных.")
-                return
+                return doc_b, None, None
 
-            id_idx = find_column_index(header_b, 'ID', 0)
-            text_idx = find_column_index(header_b, 'OriginalText', 1 if len(header_b) > 1 else 0)
+            id_idx, text_idx = doc_b.columns()
 
-            total = 0
             ids = []
             broken_indices = []
 
-            for idx, row in enumerate(rows_b):
+            for idx, row in enumerate(task.iterate(rows_b, "Поиск сломанных параметров")):
                 if len(row) <= max(id_idx, text_idx):
                     continue
                 text = row[text_idx]
                 if has_broken_param_ru_underscore(text):
-                    total += 1
                     row_id = row[id_idx] if len(row) > id_idx else ''
                     ids.append((row_id, text))
                     broken_indices.append(idx)
+            return doc_b, ids, broken_indices
 
+        def done(result):
+            doc_b, ids, broken_indices = result
+            if ids is None:
+                QtWidgets.QMessageBox.information(self, "Результат", "Файл B пуст или без данных.")
+                return
+
+            total = len(ids)
             if total == 0:
                 msg = "Сломанные параметры (РУ_РУ) в файле B не найдены."
                 QtWidgets.QMessageBox.information(self, "Сломанные параметры", msg)
@@ -721,37 +1135,41 @@ class MainWindow(QtWidgets.QMainWindow):
             )
 
             if reply == QtWidgets.QMessageBox.Yes:
+                def moved():
+                    move_msg = (
+                        f"Строки со сломанными параметрами перемещены в конец файла B. "
+                        f"Всего перемещено: {total}."
+                    )
+                    self.append_log(move_msg)
+                    QtWidgets.QMessageBox.information(self, "Сломанные параметры", move_msg)
+
                 # Сохраняем порядок: сначала все нормальные строки, потом сломанные
-                broken_set = set(broken_indices)
-                kept_rows = [row for i, row in enumerate(rows_b) if i not in broken_set]
-                broken_rows = [rows_b[i] for i in broken_indices]
-                new_rows = kept_rows + broken_rows
-
-                save_tsv(path_b, header_b, new_rows)
-                move_msg = (
-                    f"Строки со сломанными параметрами перемещены в конец файла B. "
-                    f"Всего перемещено: {total}."
+                self.move_to_end_of_b(
+                    "Перемещение сломанных параметров", doc_b, broken_indices, moved,
+                    "Ошибка перемещения строк со сломанными параметрами",
                 )
-                self.append_log(move_msg)
-                QtWidgets.QMessageBox.information(self, "Сломанные параметры", move_msg)
             else:
                 QtWidgets.QMessageBox.information(self, "Сломанные параметры", msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка поиска сломанных параметров: {e}")
+
+        self.tasks.start("Поиск сломанных параметров", work, done, "Ошибка поиска сломанных параметров")
 
     # --- Операции по фрагменту текста в файле B ---
 
     def _get_text_filter(self) -> str:
         return self.edit_text_filter.text().strip()
 
-    def _load_b_with_indices(self, path_b):
-        header_b, rows_b = load_tsv(path_b)
-        if not rows_b:
+    def _load_b_with_indices(self, path_b, task):
+        doc_b = self.document(path_b, "B", task)
+        if not doc_b.rows:
             raise ValueError("Файл B пуст или без данных.")
-        id_idx = find_column_index(header_b, 'ID', 0)
-        text_idx = find_column_index(header_b, 'OriginalText', 1 if len(header_b) > 1 else 0)
-        return header_b, rows_b, id_idx, text_idx
+        id_idx, text_idx = doc_b.columns()
+        return doc_b, id_idx, text_idx
+
+    def _rows_with_fragment(self, doc_b, fragment, task):
+        """Позиции строк B (с ID и текстом), где OriginalText содержит фрагмент, по возрастанию."""
+        min_len = max(doc_b.columns()) + 1
+        rows = doc_b.rows
+        return [i for i in doc_b.find_text(fragment, task) if len(rows[i]) >= min_len]
 
     def handle_find_ids_by_text(self):
         """Поиск всех ID в B, где OriginalText содержит заданный фрагмент."""
@@ -765,21 +1183,13 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Введите фрагмент текста для поиска.")
             return
 
-        try:
-            header_b, rows_b, id_idx, text_idx = self._load_b_with_indices(path_b)
-
-            total = 0
-            ids = []
-
-            for row in rows_b:
-                if len(row) <= max(id_idx, text_idx):
-                    continue
-                text = row[text_idx]
-                if fragment in text:
-                    total += 1
-                    row_id = row[id_idx] if len(row) > id_idx else ''
-                    ids.append(row_id)
+        def work(task):
+            doc_b, id_idx, text_idx = self._load_b_with_indices(path_b, task)
+            rows = doc_b.rows
+            return [rows[i][id_idx] for i in self._rows_with_fragment(doc_b, fragment, task)]
 
+        def done(ids):
+            total = len(ids)
             if total == 0:
                 msg = f"Строк с фрагментом текста '{fragment}' в файле B не найдено."
             else:
@@ -790,9 +1200,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.append_log(f"ID (TEXT='{fragment}'): {rid}")
 
             QtWidgets.QMessageBox.information(self, "Поиск по тексту", msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка поиска по тексту: {e}")
+
+        self.tasks.start("Поиск по тексту", work, done, "Ошибка поиска по тексту")
 
     def handle_delete_by_text(self):
         """Удалить из B все строки, где OriginalText содержит фрагмент."""
@@ -806,39 +1215,36 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", "Введите фрагмент текста для удаления.")
             return
 
-        try:
-            header_b, rows_b, id_idx, text_idx = self._load_b_with_indices(path_b)
+        def work(task):
+            doc_b = self._load_b_with_indices(path_b, task)[0]
+            header_b, rows_b = doc_b.header, doc_b.rows
 
             original_count = len(rows_b)
-            kept_rows = []
-            removed = 0
+            matched = self._rows_with_fragment(doc_b, fragment, task)
+            removed = len(matched)
 
-            for row in rows_b:
-                if len(row) <= max(id_idx, text_idx):
-                    kept_rows.append(row)
-                    continue
-                text = row[text_idx]
-                if fragment in text:
-                    removed += 1
-                else:
-                    kept_rows.append(row)
+            if removed:
+                matched = set(matched)
+                kept_rows = [row for i, row in enumerate(rows_b) if i not in matched]
+                task.commit("Сохранение B", doc_b.save, header_b, kept_rows)
+            return removed, original_count
 
+        def done(result):
+            removed, original_count = result
             if removed == 0:
                 msg = f"В файле B нет строк с фрагментом '{fragment}'. Ничего не удалено."
                 QtWidgets.QMessageBox.information(self, "Удаление по тексту", msg)
                 self.append_log(msg)
                 return
 
-            save_tsv(path_b, header_b, kept_rows)
             msg = (
                 f"Удаление по тексту завершено. Удалено строк: {removed} "
                 f"из {original_count} (фрагмент: '{fragment}')."
             )
             QtWidgets.QMessageBox.information(self, "Удаление по тексту", msg)
             self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка удаления по тексту: {e}")
+
+        self.tasks.start("Удаление по тексту", work, done, "Ошибка удаления по тексту")
 
     def handle_replace_by_text(self):
         """
@@ -859,16 +1265,12 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл A не найден: {path_a}")
             return
 
-        try:
-            # Загружаем A и строим словарь ID -> row
-            header_a, rows_a = load_tsv(path_a)
-            id_idx_a = find_column_index(header_a, 'ID', 0)
-            map_a = {}
-            for row in rows_a:
-                if len(row) > id_idx_a:
-                    map_a[row[id_idx_a]] = row
+        def work(task):
+            # Словарь ID -> row файла A (строится один раз, пока A не изменится)
+            map_a = self.document(path_a, "A", task).id_map()
 
-            header_b, rows_b, id_idx_b, text_idx_b = self._load_b_with_indices(path_b)
+            doc_b, id_idx_b, _ = self._load_b_with_indices(path_b, task)
+            header_b, rows_b = doc_b.header, doc_b.rows
 
             size_b = len(header_b)
 
@@ -879,31 +1281,26 @@ class MainWindow(QtWidgets.QMainWindow):
                     return row[:size]
                 return row
 
+            matched = self._rows_with_fragment(doc_b, fragment, task)
+            affected = len(matched)
             replaced = 0
-            affected = 0
-
-            new_rows = []
-            for row in rows_b:
-                if len(row) <= max(id_idx_b, text_idx_b):
-                    new_rows.append(row)
-                    continue
-
-                text = row[text_idx_b]
-                if fragment in text:
-                    affected += 1
-                    row_id = row[id_idx_b]
-                    if row_id in map_a:
-                        # Берём строку из A и приводим к размеру header B
-                            # Берём строку из A и приводим к размеру header B
-                        a_row = normalize_row(map_a[row_id], size_b)
-                        new_rows.append(a_row)
-                        replaced += 1
-                    else:
-                        # В A нет такого ID — оставляем как есть
-                        new_rows.append(row)
-                else:
-                    new_rows.append(row)
 
+            # Остальные строки B — те же объекты: индекс текста обновится только по заменённым
+            new_rows = list(rows_b)
+            for i in matched:
+                row_id = rows_b[i][id_idx_b]
+                if row_id in map_a:
+                    # Берём строку из A и приводим к размеру header B;
+                    # в A нет такого ID — строка остаётся как есть
+                    new_rows[i] = normalize_row(map_a[row_id], size_b)
+                    replaced += 1
+
+            if affected:
+                task.commit("Сохранение B", doc_b.save, header_b, new_rows)
+            return affected, replaced
+
+        def done(result):
+            affected, replaced = result
             if affected == 0:
                 msg = (
                     f"В файле B нет строк с фрагментом '{fragment}'. "
@@ -913,7 +1310,6 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.append_log(msg)
                 return
 
-            save_tsv(path_b, header_b, new_rows)
             msg = (
                 f"Замена по тексту завершена. "
                 f"Строк с фрагментом в B: {affected}, "
@@ -921,9 +1317,8 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             QtWidgets.QMessageBox.information(self, "Замена по тексту", msg)
             self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка замены по тексту: {e}")
+
+        self.tasks.start("Замена по тексту", work, done, "Ошибка замены по тексту")
 
     def handle_cut_by_text(self):
         """
@@ -943,45 +1338,148 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл B не найден: {path_b}")
             return
 
-        try:
-            header_b, rows_b, id_idx, text_idx = self._load_b_with_indices(path_b)
+        b_dir = os.path.dirname(path_b)
+        b_name = os.path.basename(path_b)
+        out_name = f"select_{b_name}"
+        out_path = os.path.join(b_dir, out_name)
 
-            selected = []
-            for row in rows_b:
-                if len(row) <= max(id_idx, text_idx):
-                    continue
-                text = row[text_idx]
-                if fragment in text:
-                    row_id = row[id_idx]
-                    selected.append((row_id, text))
+        def work(task):
+            doc_b, id_idx, text_idx = self._load_b_with_indices(path_b, task)
+
+            rows = doc_b.rows
+            selected = [
+                [rows[i][id_idx], rows[i][text_idx]]
+                for i in self._rows_with_fragment(doc_b, fragment, task)
+            ]
 
-            if not selected:
+            if selected:
+                # Создаём TSV только с колонками ID и OriginalText
+                task.commit(f"Запись {out_name}", save_tsv, out_path, ['ID', 'OriginalText'], selected)
+            return len(selected)
+
+        def done(count):
+            if not count:
                 msg = f"Строк с фрагментом '{fragment}' в файле B не найдено. Нечего вырезать."
                 QtWidgets.QMessageBox.information(self, "Вырезка по тексту", msg)
                 self.append_log(msg)
                 return
 
-            b_dir = os.path.dirname(path_b)
-            b_name = os.path.basename(path_b)
-            out_name = f"select_{b_name}"
-            out_path = os.path.join(b_dir, out_name)
-
-            # Создаём TSV только с колонками ID и OriginalText
-            with open(out_path, 'w', encoding='utf-8-sig', newline='') as f:
-                writer = csv.writer(f, delimiter='\t')
-                writer.writerow(['ID', 'OriginalText'])
-                for rid, txt in selected:
-                    writer.writerow([rid, txt])
-
             msg = (
-                f"Вырезка по тексту завершена. Строк: {len(selected)}. "
+                f"Вырезка по тексту завершена. Строк: {count}. "
                 f"Файл: {out_path} (ID\\tOriginalText)."
             )
             QtWidgets.QMessageBox.information(self, "Вырезка по тексту", msg)
             self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка вырезки по тексту: {e}")
+
+        self.tasks.start("Вырезка по тексту", work, done, "Ошибка вырезки по тексту")
+
+    def handle_batch_replace(self):
+        """
+        Пакетная замена фрагментов в OriginalText файла B по файлу правил
+        (batch_replace.py): все правила — одним проходом по B, затем отчёт
+        по правилам и предпросмотр изменений; B записывается после подтверждения.
+        """
+        path_b = self.edit_b.text().strip()
+        path_rules = self.edit_rules.text().strip()
+
+        if not path_b:
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите путь к файлу B.")
+            return
+        if not path_rules:
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите файл правил замены.")
+            return
+        if not os.path.isfile(path_rules):
+            QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл правил не найден: {path_rules}")
+            return
+
+        def work(task):
+            task.stage("Чтение правил")
+            rules = load_replace_rules(path_rules)
+            if not rules:
+                return None
+            doc_b, id_idx, text_idx = self._load_b_with_indices(path_b, task)
+            replacer = BatchReplacer(rules)
+            changes = replace_in_rows(doc_b.rows, id_idx, text_idx, replacer, task)
+            return doc_b, replacer, changes
+
+        def done(result):
+            if result is None:
+                msg = f"В файле правил нет правил: {path_rules}"
+                QtWidgets.QMessageBox.information(self, "Пакетная замена", msg)
+                self.append_log(msg)
+                return
+
+            doc_b, replacer, changes = result
+            total_hits = sum(replacer.hits)
+            self.append_log(
+                f"Пакетная замена: правил {len(replacer.rules)}, "
+                f"замен {total_hits} в {len(changes)} строках B."
+            )
+            unused = [rule.line for rule, hits in zip(replacer.rules, replacer.hits) if not hits]
+            if unused:
+                lines = ", ".join(map(str, unused[:20])) + (" ..." if len(unused) > 20 else "")
+                self.append_log(f"Правил без совпадений: {len(unused)} (строки файла правил: {lines})")
+
+            if not changes:
+                msg = "Совпадений по правилам в файле B нет. Файл не изменён."
+                QtWidgets.QMessageBox.information(self, "Пакетная замена", msg)
+                self.append_log(msg)
+                return
+
+            id_idx, text_idx = doc_b.columns()
+            dialog = BatchReplacePreviewDialog(self, replacer, changes, id_idx, text_idx)
+            if dialog.exec_() != QtWidgets.QDialog.Accepted:
+                self.append_log("Пакетная замена отменена пользователем.")
+                return
+
+            def build_rows(task):
+                # Остальные строки — те же объекты (см. TsvDocument)
+                rows = list(doc_b.rows)
+                for i, _, new_row in changes:
+                    rows[i] = new_row
+                return rows
+
+            def saved():
+                msg = f"Пакетная замена завершена. Изменено строк: {len(changes)}, замен: {total_hits}."
+                QtWidgets.QMessageBox.information(self, "Пакетная замена", msg)
+                self.append_log(msg)
+
+            self.save_b("Пакетная замена", doc_b, build_rows, saved, "Ошибка пакетной замены")
+
+        self.tasks.start("Пакетная замена", work, done, "Ошибка пакетной замены")
+
+    def handle_open_table(self):
+        """Открыть файл B в таблице для просмотра и правки (tsv_table.py)."""
+        path_b = self.edit_b.text().strip()
+
+        if not path_b:
+            QtWidgets.QMessageBox.warning(self, "Ошибка", "Укажите путь к файлу B.")
+            return
+
+        def work(task):
+            return self.document(path_b, "B", task)
+
+        def done(doc_b):
+            window = self.table_window
+            if window is not None:
+                if window.doc is doc_b:
+                    window.raise_()
+                    window.activateWindow()
+                    return
+                if not window.close():
+                    return
+
+            window = TsvTableWindow(self, doc_b, self.tasks, self.append_log)
+            window.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+            window.destroyed.connect(lambda: self._table_closed(window))
+            self.table_window = window
+            window.show()
+
+        self.tasks.start("Открытие таблицы B", work, done, "Ошибка открытия таблицы B")
+
+    def _table_closed(self, window):
+        if self.table_window is window:
+            self.table_window = None
 
     def handle_create_debug_tsv(self):
         """
@@ -1002,21 +1500,20 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Ошибка", f"Файл B не найден: {path_b}")
             return
 
-        try:
-            header_b, rows_b = load_tsv(path_b)
-            if not rows_b:
-                QtWidgets.QMessageBox.information(self, "Результат", "Файл B пуст или без данных.")
-                return
+        # Определяем пути к файлам
+        b_dir = os.path.dirname(path_b)
+        b_name = os.path.basename(path_b)
+        b_name_no_ext = os.path.splitext(b_name)[0]
+        uuid_file_path = os.path.join(b_dir, f"{b_name_no_ext}_uuid.tsv")
+        debug_file_path = os.path.join(b_dir, f"debug_{b_name}")
 
-            id_idx = find_column_index(header_b, 'ID', 0)
-            text_idx = find_column_index(header_b, 'OriginalText', 1 if len(header_b) > 1 else 0)
+        def work(task):
+            doc_b = self.document(path_b, "B", task)
+            header_b, rows_b = doc_b.header, doc_b.rows
+            if not rows_b:
+                return None
 
-            # Определяем пути к файлам
-            b_dir = os.path.dirname(path_b)
-            b_name = os.path.basename(path_b)
-            b_name_no_ext = os.path.splitext(b_name)[0]
-            uuid_file_path = os.path.join(b_dir, f"{b_name_no_ext}_uuid.tsv")
-            debug_file_path = os.path.join(b_dir, f"debug_{b_name}")
+            id_idx, text_idx = doc_b.columns()
 
             # Загружаем существующий UUID файл или создаём пустой словарь
             uuid_map: dict[str, str] = {}  # ID -> UUID
@@ -1036,9 +1533,9 @@ class MainWindow(QtWidgets.QMainWindow):
                             uuid_map[row_id] = row_uuid
                             used_uuids.add(row_uuid)
                     
-                    self.append_log(f"Загружено UUID из файла: {uuid_file_path} (строк: {len(uuid_map)})")
+                    task.log(f"Загружено UUID из файла: {uuid_file_path} (строк: {len(uuid_map)})")
                 except Exception as e:
-                    self.append_log(f"Предупреждение: не удалось загрузить UUID файл: {e}")
+                    task.log(f"Предупреждение: не удалось загрузить UUID файл: {e}")
 
             # Генератор UUID (4 символа из [A-Z, a-z, 1-9])
             allowed_chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz123456789"
@@ -1053,7 +1550,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
             # Собираем все ID из файла B
             ids_in_b = set()
-            for row in rows_b:
+            for row in task.iterate(rows_b, "Сбор ID"):
                 if len(row) > id_idx:
                     row_id = row[id_idx]
                     if row_id:
@@ -1066,18 +1563,11 @@ class MainWindow(QtWidgets.QMainWindow):
                     uuid_map[row_id] = gen_uuid()
                     new_uuids_count += 1
 
-            # Сохраняем UUID файл
-            uuid_rows = [[row_id, uuid_map[row_id]] for row_id in sorted(uuid_map.keys())]
-            save_tsv(uuid_file_path, ['ID', 'UUID'], uuid_rows)
-            
-            if new_uuids_count > 0:
-                self.append_log(f"Добавлено новых UUID: {new_uuids_count}")
-
             # Создаём debug версию с UUID-тегами
             new_rows = []
             tagged_count = 0
 
-            for row in rows_b:
+            for row in task.iterate(rows_b, "Добавление UUID-тегов"):
                 if len(row) > max(id_idx, text_idx):
                     row_id = row[id_idx]
                     text = row[text_idx]
@@ -1089,19 +1579,34 @@ class MainWindow(QtWidgets.QMainWindow):
                         tagged_count += 1
                 new_rows.append(row)
 
-            save_tsv(debug_file_path, header_b, new_rows)
+            # Сохраняем UUID файл и debug версию
+            uuid_rows = [[row_id, uuid_map[row_id]] for row_id in sorted(uuid_map.keys())]
+
+            def write_files():
+                save_tsv(uuid_file_path, ['ID', 'UUID'], uuid_rows)
+                save_tsv(debug_file_path, header_b, new_rows)
 
+            task.commit("Запись файлов", write_files)
+            if new_uuids_count > 0:
+                task.log(f"Добавлено новых UUID: {new_uuids_count}")
+            return tagged_count, len(uuid_map)
+
+        def done(result):
+            if result is None:
+                QtWidgets.QMessageBox.information(self, "Результат", "Файл B пуст или без данных.")
+                return
+
+            tagged_count, uuid_count = result
             msg = (
                 f"Создан файл {debug_file_path} с UUID-тегами.\n"
                 f"UUID файл: {uuid_file_path}\n"
                 f"Строк с тегами: {tagged_count}.\n"
-                f"Всего UUID в файле: {len(uuid_map)}."
+                f"Всего UUID в файле: {uuid_count}."
             )
             QtWidgets.QMessageBox.information(self, "Debug TSV", msg)
             self.append_log(msg)
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Ошибка", str(e))
-            self.append_log(f"Ошибка создания debug TSV: {e}")
+
+        self.tasks.start("Создание debug TSV", work, done, "Ошибка создания debug TSV")
 
 
 def main():
@@ -6,9 +6,11 @@ import sys
 import csv
 import configparser
 import random
+import threading
+from collections import deque
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout, QFileDialog, QLabel, QGroupBox, QGridLayout, QMessageBox, QComboBox
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtCore import Qt, QThread, QObject, QTimer, pyqtSignal
 
 def extract_file(input_file, output_dir, log_callback):
     try:
@@ -245,7 +247,87 @@ def pak_text(input_file, output_dir, log_callback):
     except Exception as e:
         log_callback(f"❌ Ошибка запаковки: {str(e)}")
         return False
-                            
+
+
+class LogSink(QObject):
+    """
+    Буферизованный лог окна: write() можно вызывать из любого потока, а в
+    QTextEdit накопленное выводится одной вставкой раз в FLUSH_INTERVAL мс
+    (append на каждую строку «Обработан ...» медленнее самой распаковки).
+    В окне остаются последние MAX_VISIBLE строк, в памяти — последние
+    MAX_RETAINED (кольцевой буфер) для сохранения в файл.
+    """
+
+    FLUSH_INTERVAL = 100  # мс
+    MAX_VISIBLE = 5000
+    MAX_RETAINED = 200000
+
+    # write() из другого потока: таймер запускается в потоке окна
+    _wake = pyqtSignal()
+
+    def __init__(self, text_edit):
+        super().__init__(text_edit)
+        self.text_edit = text_edit
+        text_edit.document().setMaximumBlockCount(self.MAX_VISIBLE)
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+        self._lines = deque(maxlen=self.MAX_RETAINED)
+        self._dropped = 0  # строк, вытесненных из кольцевого буфера
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._timer.start)
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+        if not batch:
+            return
+        overflow = len(self._lines) + len(batch) - self.MAX_RETAINED
+        if overflow > 0:
+            self._dropped += overflow
+        self._lines.extend(batch)
+
+        text = "\n".join(batch[-self.MAX_VISIBLE:])
+        bar = self.text_edit.verticalScrollBar()
+        at_end = bar.value() >= bar.maximum() - 4
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        # Обычный текст, без разбора как HTML
+        cursor.insertText(text if self.text_edit.document().isEmpty() else "\n" + text)
+        if at_end:
+            bar.setValue(bar.maximum())
+
+    def save_as(self, parent):
+        """Диалог выбора файла и запись сохранённых строк лога (UTF-8)."""
+        path, _ = QFileDialog.getSaveFileName(parent, "Сохранить лог", "log.txt", "Text files (*.txt);;All files (*.*)")
+        if not path:
+            return
+        self.flush()
+        try:
+            with open(path, "w", encoding="utf-8", newline="\n") as f:
+                if self._dropped:
+                    f.write(f"... (первые строки лога не сохранены: {self._dropped})\n")
+                for line in self._lines:
+                    f.write(line)
+                    f.write("\n")
+        except OSError as e:
+            QMessageBox.critical(parent, "Ошибка", f"Не удалось сохранить лог: {e}")
+
+
 class WorkerThread(QThread):
     log_signal = pyqtSignal(str)
 
@@ -425,6 +507,13 @@ class MyApp(QWidget):
         
         self.log_box = QTextEdit()
         self.log_box.setReadOnly(True)
+        self.log_sink = LogSink(self.log_box)
+
+        button_save_log = QPushButton('Сохранить лог...')
+        button_save_log.clicked.connect(lambda: self.log_sink.save_as(self))
+        log_buttons_layout = QHBoxLayout()
+        log_buttons_layout.addStretch(1)
+        log_buttons_layout.addWidget(button_save_log)
 
         main_layout.addWidget(group_box_extr_files)
         main_layout.addWidget(group_box_pack_files)
@@ -432,6 +521,7 @@ class MyApp(QWidget):
         main_layout.addWidget(group_box_pack_texts)
         main_layout.addWidget(group_box_translate)
         main_layout.addWidget(self.log_box)
+        main_layout.addLayout(log_buttons_layout)
 
         self.setLayout(main_layout)
 
@@ -520,9 +610,9 @@ class MyApp(QWidget):
         except Exception:
             pass
 
-    # Функция записи в лог
+    # Функция записи в лог (выводится пачками, см. LogSink)
     def log(self, message):
-        self.log_box.append(message)
+        self.log_sink.write(message)
 
     # Функция открытия файла для распаковки файла
     def selectEF_input_file(self):
@@ -6,9 +6,11 @@ import sys
 import csv
 import configparser
 import random
+import threading
+from collections import deque
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QTextEdit, QVBoxLayout, QHBoxLayout, QFileDialog, QLabel, QGroupBox, QGridLayout, QMessageBox, QComboBox
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtCore import Qt, QThread, QObject, QTimer, pyqtSignal
 
 # "JSON-подобный" словарь текстов интерфейса для разных языков
 LANG_UI = {
@@ -34,6 +36,7 @@ LANG_UI = {
         "btn_tr_export": "Create CSV/TSV: ID,OriginalText",
         "btn_tr_apply": "Apply translations from CSV/TSV",
         "btn_tr_debug": "Create debug TextExtractor.csv (tags)",
+        "btn_save_log": "Save log...",
     },
     "ru": {
         "ui_lang_label": "Язык интерфейса:",
@@ -57,6 +60,7 @@ LANG_UI = {
         "btn_tr_export": "Создать CSV/TSV: ID,OriginalText",
         "btn_tr_apply": "Применить переводы из CSV/TSV",
         "btn_tr_debug": "Создать debug TextExtractor.csv (теги)",
+        "btn_save_log": "Сохранить лог...",
     },
 }
 
@@ -334,6 +338,85 @@ def extract_all(input_file, output_dir, log_callback):
         return False
 
 
+class LogSink(QObject):
+    """
+    Буферизованный лог окна: write() можно вызывать из любого потока, а в
+    QTextEdit накопленное выводится одной вставкой раз в FLUSH_INTERVAL мс
+    (append на каждую строку «Обработан ...» медленнее самой распаковки).
+    В окне остаются последние MAX_VISIBLE строк, в памяти — последние
+    MAX_RETAINED (кольцевой буфер) для сохранения в файл.
+    """
+
+    FLUSH_INTERVAL = 100  # мс
+    MAX_VISIBLE = 5000
+    MAX_RETAINED = 200000
+
+    # write() из другого потока: таймер запускается в потоке окна
+    _wake = pyqtSignal()
+
+    def __init__(self, text_edit):
+        super().__init__(text_edit)
+        self.text_edit = text_edit
+        text_edit.document().setMaximumBlockCount(self.MAX_VISIBLE)
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+        self._lines = deque(maxlen=self.MAX_RETAINED)
+        self._dropped = 0  # строк, вытесненных из кольцевого буфера
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._timer.start)
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+        if not batch:
+            return
+        overflow = len(self._lines) + len(batch) - self.MAX_RETAINED
+        if overflow > 0:
+            self._dropped += overflow
+        self._lines.extend(batch)
+
+        text = "\n".join(batch[-self.MAX_VISIBLE:])
+        bar = self.text_edit.verticalScrollBar()
+        at_end = bar.value() >= bar.maximum() - 4
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        # Обычный текст, без разбора как HTML
+        cursor.insertText(text if self.text_edit.document().isEmpty() else "\n" + text)
+        if at_end:
+            bar.setValue(bar.maximum())
+
+    def save_as(self, parent):
+        """Диалог выбора файла и запись сохранённых строк лога (UTF-8)."""
+        path, _ = QFileDialog.getSaveFileName(parent, "Сохранить лог", "log.txt", "Text files (*.txt);;All files (*.*)")
+        if not path:
+            return
+        self.flush()
+        try:
+            with open(path, "w", encoding="utf-8", newline="\n") as f:
+                if self._dropped:
+                    f.write(f"... (первые строки лога не сохранены: {self._dropped})\n")
+                for line in self._lines:
+                    f.write(line)
+                    f.write("\n")
+        except OSError as e:
+            QMessageBox.critical(parent, "Ошибка", f"Не удалось сохранить лог: {e}")
+
+
 class WorkerThread(QThread):
     log_signal = pyqtSignal(str)
 
@@ -591,6 +674,10 @@ class MyApp(QWidget):
         
         self.log_box = QTextEdit()
         self.log_box.setReadOnly(True)
+        self.log_sink = LogSink(self.log_box)
+
+        button_save_log = QPushButton(self._t("btn_save_log"))
+        button_save_log.clicked.connect(lambda: self.log_sink.save_as(self))
 
         # Раскладка по строкам/колонкам
         # 0: Переключатель языка — на всю ширину
@@ -607,6 +694,8 @@ class MyApp(QWidget):
         main_layout.addWidget(group_box_translate, 4, 0, 1, 2)
         # 5: Лог — на всю ширину
         main_layout.addWidget(self.log_box, 5, 0, 1, 2)
+        # 6: Сохранение лога — справа
+        main_layout.addWidget(button_save_log, 6, 1, Qt.AlignRight)
 
         self.setLayout(main_layout)
 
@@ -738,9 +827,9 @@ class MyApp(QWidget):
             # Пересохраняем настройки (включая language)
             self.save_paths_config()
 
-    # Функция записи в лог
+    # Функция записи в лог (выводится пачками, см. LogSink)
     def log(self, message):
-        self.log_box.append(message)
+        self.log_sink.write(message)
 
     # Функция открытия файла для распаковки файла
     def selectEF_input_file(self):